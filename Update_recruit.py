@@ -18,55 +18,33 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.metrics import f1_score, roc_auc_score
-import shap
-
-
-# Retrieval (lightweight)
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Optional deps
-try:
-    from transformers import pipeline
-    TRANSFORMERS_AVAILABLE = True
-except Exception:
-    TRANSFORMERS_AVAILABLE = False
-
-try:
-    from pdfminer.high_level import extract_text as pdf_extract_text
-except Exception:
-    pdf_extract_text = None
-
-try:
-    import docx
-except Exception:
-    docx = None
-
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
-
-# OCR deps (optional)
-try:
-    from pdf2image import convert_from_bytes
-    import pytesseract
-    from PIL import Image, ImageOps  # noqa
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
-
-# Extra PDF fallback
-try:
-    import pypdf
-    PYPDF_OK = True
-except Exception:
-    PYPDF_OK = False
+
+
+from talentlens.synthetic import generate_dataset, DEFAULT_CHUNK_SIZE
+from talentlens.registry import ModelRegistry, fit_model
+from talentlens.explain import feature_frame, explain_matrix, load_shap_summary
+from talentlens import DATA_DIR
+from talentlens.retrieval import build_index, ThreadStore, IncrementalIndex, split_sections
+from talentlens.catalog import VacancyMatcher, catalog_store
+from talentlens.vacancies import fetch_vacancies, expand_pairs
+from talentlens.search import CandidateIndex, FTS5_AVAILABLE, content_hash
+from talentlens.batch import BatchJob, BatchItem, list_jobs, merge_results
+from talentlens.client import openai_client, llm_available, default_backend, Backend, BACKENDS
+from talentlens.ledger import ledger
+from talentlens.llm import complete, stream_complete, response_cache, rate_limiter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import atexit
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from talentlens.extract import OCR_AVAILABLE, OcrOptions, docx_text, pdf_text, file_text
+from talentlens.features import (basic_clean, detect_years_experience, emotion_vector, sentiment_score,
+                                 build_feature_row, prepare_cv)
+from talentlens.questions import question_bank, generate_questions, default_questions
+from talentlens.narrative import build_messages, NARRATIVE_MODES
+from talentlens.context import pack_context, QA_TOKEN_BUDGET, NARRATIVE_TOKEN_BUDGET, MIN_SNIPPET_SCORE
+from talentlens.shap_plots import (sector_importance_figure, beeswarm_figure, dependence_figure,
+                                   waterfall_figure, explain_and_plot)
+
 # --- Streamlit page & theme ---
 # --- Streamlit page & theme ---
 st.set_page_config(page_title="CynthAI© - Personato TalentLens", page_icon="🤝", layout="wide")
@@ -82,7 +60,6 @@ import streamlit as st
 import hashlib, json, os
 from datetime import datetime
 from pathlib import Path
-from PIL import Image
 
 # -------------------- USER STORAGE --------------------
 USER_FILE = Path("users.json")
@@ -646,120 +623,64 @@ def sample_vacancies_by_sector():
         "Healthcare":[{"JobTitle":"Healthcare Administrator","RequiredSkills":["EMR","Scheduling","Compliance","Communication","Billing"],"ValueWords":["care","trust","structure","service","quality"],"ExpMin":1,"ExpMax":6}]
     }
 def default_sector(): return "IT"
-SECTORS = sample_vacancies_by_sector()
 
-# --- Helpers for vacancy extraction / OCR ---
-def _tess_lang_code(ui_lang: str, override_label: str) -> str:
-    if override_label.startswith("English"): return "eng"
-    if override_label.startswith("Dutch"): return "nld"
-    return "nld" if str(ui_lang).lower().startswith("nl") else "eng"
-
-def _tess_psm_value(psm_label: str) -> int:
-    try:
-        return int(psm_label.split(" - ", 1)[0].strip())
-    except Exception:
-        return 3
+@st.cache_resource
+def get_catalog_store():
+    # Persistent, versioned catalog (talentlens/catalog.py); the built-in vacancies seed it on first start
+    store = catalog_store()
+    store.import_sectors(sample_vacancies_by_sector(), activate=not store.active_version())
+    return store
+
+catalog = get_catalog_store()
+
+def current_catalog_version():
+    # An uploaded vacancy CSV pins this session to its own catalog version; otherwise the active one
+    return st.session_state.get("catalog_version") or catalog.active_version()
+
+def import_vacancy_csv(upload, sector):
+    # Imported once per uploaded file: rows without a Sector column go to the sector selected at upload
+    # time, and later sector changes reuse that version instead of importing the file again
+    file_id = getattr(upload, "file_id", None) or upload.name
+    pin = st.session_state.get("vac_upload_pin")
+    if not pin or pin[0] != file_id:
+        try:
+            pin = (file_id, catalog.import_csv(upload.getvalue(), source=upload.name, sector=sector), "")
+        except Exception as e:
+            pin = (file_id, 0, str(e))
+        st.session_state["vac_upload_pin"] = pin
+    if pin[2]:
+        st.warning(f"Could not read vacancy CSV ({pin[2]}); using sector defaults.")
+    return pin[1]
+
+# --- Text extraction (talentlens/extract.py); OCR options come from the sidebar ---
+def ocr_options() -> OcrOptions:
+    return OcrOptions(
+        enabled=bool(st.session_state.get("ocr_enabled", False)),
+        ui_lang=st.session_state.get("lang_hint", "en"),
+        lang_label=st.session_state.get("ocr_lang_label", "Auto (based on UI language)"),
+        max_pages=int(st.session_state.get("ocr_pages", 5)),
+        poppler_bin=st.session_state.get("poppler_dir", "").strip(),
+        dpi=int(st.session_state.get("ocr_dpi", 300)),
+        psm_label=st.session_state.get("ocr_psm", "3 - Fully auto"),
+        tesseract_cmd=st.session_state.get("tesseract_cmd", ""),
+    )
 
-def _preprocess_for_ocr(img: "Image.Image") -> "Image.Image":
-    try:
-        gray = img.convert("L")
-        gray = ImageOps.autocontrast(gray)
-        return gray.point(lambda p: 255 if p > 180 else 0)
+def upload_bytes(upload) -> bytes:
+    if upload is None: return b""
+    try: return upload.getvalue()
     except Exception:
-        return img
-
-def _ocr_pdf_bytes(pdf_bytes: bytes,
-                   ui_lang: str = "en",
-                   override_lang_label: str = "Auto (based on UI language)",
-                   max_pages: int = 5,
-                   poppler_bin: str = "",
-                   dpi: int = 300,
-                   psm_label: str = "3 - Fully auto") -> str:
-    if not OCR_AVAILABLE or not pdf_bytes:
-        return ""
-    try:
-        kwargs = dict(fmt="png", first_page=1, last_page=max_pages, dpi=int(dpi))
-        if poppler_bin:
-            kwargs["poppler_path"] = poppler_bin
-        images = convert_from_bytes(pdf_bytes, **kwargs)
-        tess_lang = _tess_lang_code(st.session_state.get("lang_hint","en"), override_lang_label)
-        psm = _tess_psm_value(psm_label)
-        config = f"--psm {psm}"
-        texts = []
-        for img in images:
-            base = _preprocess_for_ocr(img)
-            cand_texts = []
-            for rot in (0, 90, 270):
-                try:
-                    img_rot = base if rot == 0 else base.rotate(rot, expand=True)
-                    cand_texts.append(pytesseract.image_to_string(img_rot, lang=tess_lang, config=config))
-                except Exception:
-                    cand_texts.append("")
-            page_text = max(cand_texts, key=lambda s: len(s or ""))
-            texts.append(page_text)
-        return "\n".join(texts)
-    except Exception:
-        return ""
+        try: return upload.read()
+        except Exception: return b""
 
 def extract_text_from_docx(file):
-    if docx is None: return ""
-    try: return "\n".join(p.text for p in docx.Document(file).paragraphs)
-    except Exception: return ""
+    return docx_text(upload_bytes(file))
 
 def extract_text_from_pdf(uploaded_file):
-    if uploaded_file is None: return ""
-    # Bytes buffer
-    try:
-        data = uploaded_file.getvalue()
-    except Exception:
-        try: data = uploaded_file.read()
-        except Exception: data = b""
-    text = ""
-
-    # A) pdfminer
-    if pdf_extract_text is not None and data:
-        try: text = pdf_extract_text(io.BytesIO(data)) or ""
-        except Exception: text = ""
-
-    # B) PyPDF fallback
-    if (not text or len(text.strip()) < 60) and PYPDF_OK and data:
-        try:
-            reader = pypdf.PdfReader(io.BytesIO(data))
-            if getattr(reader, "is_encrypted", False):
-                try: reader.decrypt("")
-                except Exception: pass
-            parts = []
-            for page in reader.pages[:15]:
-                try: parts.append(page.extract_text() or "")
-                except Exception: parts.append("")
-            alt = "\n".join(parts).strip()
-            if len(alt) > len(text): text = alt
-        except Exception:
-            pass
-
-    # C) OCR fallback (enhanced)
-    if (st.session_state.get("ocr_enabled", False) or len(text.strip()) < 60) and OCR_AVAILABLE and data:
-        ocr_text = _ocr_pdf_bytes(
-            data,
-            ui_lang=st.session_state.get("lang_hint","en"),
-            override_lang_label=st.session_state.get("ocr_lang_label","Auto (based on UI language)"),
-            max_pages=st.session_state.get("ocr_pages",5),
-            poppler_bin=st.session_state.get("poppler_dir","").strip(),
-            dpi=st.session_state.get("ocr_dpi",300),
-            psm_label=st.session_state.get("ocr_psm","3 - Fully auto")
-        )
-        if len((ocr_text or "").strip()) > len(text.strip()):
-            text = ocr_text
-
-    return text or ""
+    return pdf_text(upload_bytes(uploaded_file), ocr_options())
 
 def extract_cv_text(upload):
     if upload is None: return ""
-    name = upload.name.lower()
-    if name.endswith(".pdf"): return extract_text_from_pdf(upload)
-    if name.endswith(".docx"): return extract_text_from_docx(upload)
-    try: return upload.read().decode("utf-8", errors="ignore")
-    except Exception: return ""
+    return file_text(upload.name, upload_bytes(upload), ocr_options())
 
 def extract_texts(uploads):
     """Return combined_text, names_list, display_name for 0..N files (robust)."""
@@ -780,135 +701,11 @@ def extract_texts(uploads):
     display = names[0] + (f" (+{len(names)-1} more)" if len(names) > 1 else "")
     return combined, names, display
 
-# --- NLP feature engineering ---
-def basic_clean(text: str): return re.sub(r"\s+", " ", text or "").strip()
-
+# --- NLP feature engineering (talentlens/features.py) ---
 import re, datetime, numpy as np
 
-def detect_years_experience(text: str) -> int:
-    """Estimate realistic years of experience with contextual filtering."""
-    if not text:
-        return 0
-
-    t = text.lower()
-    yrs = 0
-
-    # --- Context-based pattern (stronger weight when 'experience' nearby) ---
-    context_matches = re.findall(
-        r"(?:over|about|around|approximately|up to)?\s*(\d{1,2})\s*(?:\+?\s*)?(?:years?|yrs?)\s*(?:of\s+)?(?:work|experience|career)?",
-        t,
-    )
-    if context_matches:
-        yrs = max(int(x) for x in context_matches if x.isdigit())
-
-    # --- If no explicit phrase found, try a 'since YEAR' or range heuristic ---
-    if yrs == 0:
-        # e.g., "since 2014", "2015–2022"
-        years = re.findall(r"(19|20)\d{2}", t)
-        if len(years) >= 2:
-            yrs = max(0, min(int(max(years)) - int(min(years)), 40))
-        elif years:
-            yrs = max(0, min(datetime.datetime.now().year - int(years[0]), 40))
-        else:
-            yrs = 0
-
-    # --- Sanity limits ---
-    if yrs < 0:
-        yrs = 0
-    yrs = int(np.clip(yrs, 0, 20))  # limit to 20 years max realistic value
-    return yrs
-
-SKILL_VOCAB = {
-"Data Analyst":["Python","SQL","PowerBI","Tableau","Statistics","ETL","Pandas","Numpy","Visualization","Dashboards"],
-"Data Engineer":["Python","SQL","ETL","Airflow","Cloud","Pandas","Spark"],
-"Software Developer":["Python","JavaScript","Git","APIs","Testing","CI/CD"],
-"HR Consultant":["Recruitment","Policy","HRIS","Stakeholder","Coaching","Onboarding","Compensation","Benefits","Compliance","Communication"],
-"Recruiter":["Sourcing","Screening","Interviewing","ATS","EmployerBranding","LinkedIn"],
-"Marketing Manager":["Campaigns","Brand","SEO","SEM","Content","Copywriting","Analytics","Social","Leadership","Strategy"],
-"Content Marketer":["Copywriting","SEO","Analytics","Social","CMS","Content"],
-"Logistics Planner":["Planning","WMS","Excel","Communication","Problem-solving"],
-"Supply Chain Analyst":["SQL","Forecasting","PowerBI","ERP","Inventory"],
-"Financial Controller":["Accounting","Excel","Reporting","IFRS","Analysis"],
-"Business Analyst":["Modelling","SQL","PowerBI","Stakeholder","Budgeting"],
-"Account Manager":["Prospecting","Negotiation","CRM","Forecasting","Presentation"],
-"Mechanical Engineer":["CAD","FEA","Materials","Testing","Manufacturing"],
-"Legal Counsel":["Contract","Compliance","GDPR","Negotiation","Advisory"],
-"Healthcare Administrator":["EMR","Scheduling","Compliance","Communication","Billing"]}
-
-def detect_skills(text: str, role: str) -> float:
-    vocab = SKILL_VOCAB.get(role, [])
-    if not text or not vocab: return 0.0
-    found = sum(1 for kw in vocab if re.search(r"\b"+re.escape(kw)+r"\b", text, re.I))
-    return found / len(vocab)
-
-EMOTION_LEX = {
-"joy":["happy","delight","enjoy","excited","proud","satisfied","enthusiastic","passion"],
-"trust":["trust","reliable","integrity","dependable","responsible","commitment"],
-"anticipation":["eager","looking forward","anticipate","expect","curious","aspire","ambition"],
-"surprise":["surprise","unexpected","discovery","novel","breakthrough"],
-"sadness":["sad","regret","unhappy","disappointed","loss","depress"],
-"anger":["angry","frustrated","upset","annoyed","irritated"],
-"fear":["afraid","fear","concern","worried","anxious","risk"],
-"disgust":["disgust","gross","repulsed","unethical","unfair"]}
-def emotion_vector(text: str) -> dict:
-    t = (text or "").lower(); vec = {}
-    for emo, kws in EMOTION_LEX.items():
-        hits = sum(len(re.findall(r"\b"+re.escape(kw)+r"\b", t)) for kw in kws)
-        vec[emo] = min(hits/10.0, 1.0)
-    return vec
-
-def sentiment_score(text: str) -> float:
-    if text is None or len(text)<20: return 0.5
-    if TRANSFORMERS_AVAILABLE:
-        try:
-            pipe = pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
-            res = pipe(text[:1500])[0]; label = res.get("label","NEU").upper(); score = res.get("score",0.5)
-            if label.startswith("POS"): return float(np.clip(0.6+0.4*score,0,1))
-            if label.startswith("NEG"): return float(np.clip(0.4-0.4*score,0,1))
-            return 0.5
-        except Exception:
-            pass
-    pos = len(re.findall(r"\b(excellent|achieved|improved|growth|success|impact|passion|motiv)\w*\b", text.lower()))
-    neg = len(re.findall(r"\b(problem|issue|failure|struggle|weak)\w*\b", text.lower()))
-    return float(np.clip(0.5+0.03*(pos-neg),0,1))
-
-def culture_fit_score(text: str, value_words: list) -> float:
-    if not text or not value_words: return 0.5
-    hits = sum(1 for w in value_words if re.search(r"\b"+re.escape(w)+r"\b", text, re.I))
-    return hits/max(len(value_words),1)
-
-def education_level_from_text(text: str) -> str:
-    t = (text or "").lower()
-    if re.search(r"\bwo\b|\bmaster\b|\bmsc\b|\buniversity\b|\buniversiteit\b", t): return "WO"
-    if re.search(r"\bhbo\b|\bbachelor\b", t): return "HBO"
-    if re.search(r"\bmbo\b", t): return "MBO"
-    return "HBO"
-
-def build_feature_row(role: str, combined_text: str, vacancy_row: dict, sector: str=None):
-    yrs = detect_years_experience(combined_text)
-    mot = sentiment_score(combined_text)
-    skill = detect_skills(combined_text, role)
-    fit = culture_fit_score(combined_text, vacancy_row.get("ValueWords", []))
-    emo = emotion_vector(combined_text)
-    emo_pos = (emo.get("joy",0)+emo.get("trust",0)+emo.get("anticipation",0)+emo.get("surprise",0))/4.0
-    emo_neg = (emo.get("sadness",0)+emo.get("anger",0)+emo.get("fear",0)+emo.get("disgust",0))/4.0
-    edu = education_level_from_text(combined_text)
-    return {
-        "ExperienceYears":yrs,"MotivationScore":mot,"SkillMatch":skill,"CultureFit":fit,"SentimentScore":mot,
-        "EmotionPos":float(emo_pos),"EmotionNeg":float(emo_neg),
-        "EducationLevel_HBO":1 if edu=="HBO" else 0,"EducationLevel_WO":1 if edu=="WO" else 0
-    }
-
 def predict_prob(feat: dict, sector: str=None) -> float:
-    row = pd.DataFrame([feat])
-    if sector:
-        for c in feature_cols:
-            if c.startswith("Sector_"): row[c]=0
-        sec_col = f"Sector_{sector}"
-        if sec_col in feature_cols: row[sec_col]=1
-    for c in feature_cols:
-        if c not in row.columns: row[c]=0
-    row = row[feature_cols]
+    row = feature_frame(feat, feature_cols, sector)
     return float(model.predict_proba(row)[0][1])
 
 def offer_uplift(base_prob: float, salary_pct: float, remote_days: int) -> float:
@@ -924,88 +721,115 @@ def acceptance_probability(success_prob: float, feat: dict, salary_pct: float=0.
     return float(1/(1+np.exp(-z)))
 
 # --- OpenAI client ---
+def llm_backend() -> Backend:
+    # Endpoint + model chosen in Settings (defaults from TALENTLENS_LLM_BACKEND / TALENTLENS_LLM_MODEL)
+    return st.session_state.get("llm_backend") or default_backend()
+
+def llm_model() -> str:
+    return llm_backend().model
+
+# Ledger rows are attributed to the Streamlit session of the calling thread (batch workers carry the ctx)
+ledger().session_resolver = lambda: getattr(get_script_run_ctx(), "session_id", "")
+
 def get_openai_client(api_key: str):
-    if not api_key or OpenAI is None: return None
-    try: return OpenAI(api_key=api_key)
-    except Exception: return None
-
-# --- Retrieval helpers ---
-def _chunk_text(text: str, size: int = 1000, overlap: int = 150):
-    text = text or ""
-    if len(text) <= size: return [text] if text else []
-    chunks, start = [], 0
-    while start < len(text):
-        end = min(len(text), start + size)
-        chunks.append(text[start:end])
-        if end == len(text): break
-        start = max(0, end - overlap)
-    return chunks
-
-def build_index(corpus_text: str):
-    chunks = _chunk_text(corpus_text, size=1000, overlap=150)
-    if not chunks: return {"chunks": [], "tfidf": None}
-    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1,2))
-    X = vectorizer.fit_transform(chunks)
-    return {"chunks": chunks, "tfidf": (vectorizer, X)}
-
-def retrieve(question: str, index, top_k: int = 8):
-    if not question or not index or not index.get("tfidf"): return []
-    vectorizer, X = index["tfidf"]
-    qv = vectorizer.transform([question])
-    sims = cosine_similarity(qv, X).ravel()
-    top = sims.argsort()[::-1][:top_k]
-    return [(index["chunks"][i], float(sims[i])) for i in top]
+    # Pooled per (backend, API key): keep-alive, timeouts, retries, circuit breaker — see talentlens/client.py
+    return openai_client(api_key, llm_backend())
+
+# --- Retrieval helpers (talentlens/retrieval.py) ---
+def get_thread_store():
+    # Per-user thread + index store on local disk; survives reloads and restarts
+    user_key = hashlib.sha256(st.session_state.get("user_email", "anonymous").encode()).hexdigest()[:12]
+    return ThreadStore(DATA_DIR / "threads" / user_key)
+
+# --- Cross-candidate search (talentlens/search.py) ---
+@st.cache_resource
+def get_candidate_index():
+    # Process-wide: every CV processed in any session lands in one BM25 index
+    return CandidateIndex() if FTS5_AVAILABLE else None
+
+def index_candidate_cv(cv_text: str, filename: str, role: str, sector: str, feat: dict = None) -> bool:
+    """Add one CV to the candidate search; experience is only detected for CVs not yet indexed."""
+    cand_index = get_candidate_index()
+    if cand_index is None or not (cv_text or "").strip():
+        return False
+    if feat is None:
+        if cand_index.contains(cv_text):
+            return False
+        feat = {"ExperienceYears": detect_years_experience(cv_text)}
+    try:
+        return cand_index.add(cv_text, filename, sector, role or "", feat.get("ExperienceYears", 0))
+    except Exception:
+        return False
+
+def index_corpus_cvs(corpus_text: str, cv_names: list, role: str, sector: str) -> int:
+    """Index every uploaded CV ('### FILE: <name>' section) of a thread corpus; returns how many were new."""
+    added = 0
+    for sec in split_sections(corpus_text):
+        body = sec[len("### FILE: "):] if sec.startswith("### FILE: ") else ""
+        fname = next((n for n in cv_names if body.startswith(n)), None)
+        if fname:
+            added += index_candidate_cv(body[len(fname):].strip(), fname, role, sector)
+    return added
 
 # --- LLM narrative + Q&A (grounded) ---
+STREAM_INTERRUPTED = "\n\n_(answer interrupted: {error}; generate again for the full answer)_"
+
+def _stream_with_fallback(client, messages, fallback, **kw):
+    """Yield completion deltas; if the request fails before any text arrived, yield the offline fallback.
+
+    A failure mid-answer ends the text with a visible STREAM_INTERRUPTED marker, so the partial answer is
+    never stored as if it were complete (the ledger records the failed call with its error status).
+    """
+    started = False
+    try:
+        for delta in stream_complete(client, messages, **kw):
+            started = True
+            yield delta
+    except Exception as e:
+        yield STREAM_INTERRUPTED.format(error=type(e).__name__) if started else fallback()
+
+def llm_messages(client, lang, role, prob, feat_dict, vacancy_row, question=None, corpus_text=None,
+                 retrieved=None, narrative_mode="Auto"):
+    """Chat messages for a narrative (no question) or a grounded Q&A answer; the map-reduce step may call the LLM."""
+    return build_messages(client, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved,
+                          narrative_mode, model=llm_model(),
+                          token_budget=int(st.session_state.get("narrative_token_budget", NARRATIVE_TOKEN_BUDGET)))
+
 def gpt_narrative_and_qa(client, lang, role, prob, feat_dict, vacancy_row,
-                         question=None, corpus_text=None, retrieved=None):
-    if client is None:
+                         question=None, corpus_text=None, retrieved=None, stream=False):
+    """Narrative (no question) or grounded Q&A answer; with stream=True an iterator of text chunks.
+
+    API failures fall back to the offline summary; errors while building the prompt are raised.
+    """
+    if not llm_available(client):
         if lang == "nl":
             base = (f"Profielschets:\n- Voorspelde succeskans: {prob:.0%}\n- Motivatie: {feat_dict['MotivationScore']:.0%}\n"
                     f"- Skills match: {feat_dict['SkillMatch']:.0%}\n- Cultuurfit: {feat_dict['CultureFit']:.0%}\n"
                     f"- Ervaring: {feat_dict['ExperienceYears']} jaar\n- Rol: {role}\n\n")
-            return base + ("(Geen API-sleutel: Q&A/narratief beperkt.)" if question else
+            text = base + ("(Geen API-sleutel: Q&A/narratief beperkt.)" if question else
                            "Narratief (beperkt zonder model).")
-        base = (f"Profile:\n- Predicted success: {prob:.0%}\n- Motivation: {feat_dict['MotivationScore']:.0%}\n"
-                f"- Skill match: {feat_dict['SkillMatch']:.0%}\n- Culture fit: {feat_dict['CultureFit']:.0%}\n"
-                f"- Experience: {feat_dict['ExperienceYears']} years\n- Role: {role}\n\n")
-        return base + ("(No API key: Q&A/narrative limited.)" if question else "Narrative (limited without model).")
-
-    retrieved_text = "\n\n---\n\n".join([c for c,_s in (retrieved or [])]) if retrieved else ""
-    mode = "qa" if (question or "").strip() else "narrative"
-
-    system = (
-        "You are a bilingual recruitment copilot. "
-        "Use only the provided CONTEXT to write your answer. "
-        "If the context is insufficient, say so. Keep tone professional, fair, and specific. "
-        "If 'lang' == 'nl' respond in Dutch; otherwise English."
-    )
-
-    if mode == "narrative":
-        user = {
-            "lang": lang, "task": "narrative", "role": role, "probability": prob,
-            "features": feat_dict, "vacancy": vacancy_row,
-            "instructions": ("Write a 6–10 bullet executive narrative of the candidate based on CONTEXT. "
-                             "Cover: core profile, key achievements, relevant skills vs. vacancy, culture/value alignment, "
-                             "risks/gaps, and recommendation. Ground claims with 'In the CV...' or 'In the letter...' "
-                             "when appropriate."),
-            "CONTEXT": (corpus_text or "")[:150000]
-        }
-    else:
-        user = {
-            "lang": lang, "task": "qa", "role": role, "question": question,
-            "instructions": ("Answer strictly from the retrieved snippets below. "
-                             "If uncertain, say you can't find it. Use concise bullets when helpful."),
-            "RETRIEVED_SNIPPETS": retrieved_text[:150000]
-        }
+        else:
+            base = (f"Profile:\n- Predicted success: {prob:.0%}\n- Motivation: {feat_dict['MotivationScore']:.0%}\n"
+                    f"- Skill match: {feat_dict['SkillMatch']:.0%}\n- Culture fit: {feat_dict['CultureFit']:.0%}\n"
+                    f"- Experience: {feat_dict['ExperienceYears']} years\n- Role: {role}\n\n")
+            text = base + ("(No API key: Q&A/narrative limited.)" if question else "Narrative (limited without model).")
+        return iter([text]) if stream else text
 
+    site = "qa" if (question or "").strip() else "narrative"
     try:
-        out = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role":"system","content":system},{"role":"user","content":json.dumps(user)}],
-            temperature=0.4, max_tokens=700
-        )
-        return out.choices[0].message.content
+        messages = llm_messages(client, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved,
+                                st.session_state.get("narrative_mode", "Auto"))
+    except Exception as e:
+        # A bug, not an outage: surface it instead of passing the offline text off as the answer
+        st.warning(f"Could not build the {site} prompt: {type(e).__name__}: {e}")
+        raise
+    if stream:
+        return _stream_with_fallback(
+            client, messages,
+            lambda: gpt_narrative_and_qa(None, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved),
+            model=llm_model(), temperature=0.4, max_tokens=700, site=site)
+    try:
+        return complete(client, messages, model=llm_model(), temperature=0.4, max_tokens=700, site=site)
     except Exception:
         return gpt_narrative_and_qa(None, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved)
 
@@ -1021,43 +845,151 @@ def generate_narrative_for_single_cv(
     cover_letter_text: str = ""
 ):
     """Return dict with filename, narrative, and key metrics for one CV file."""
-    # 1) Extract text for this specific CV
-    cv_text = extract_cv_text(upload_file)
+    # 1) Extract text, build the per-CV corpus (vacancy + this CV + optional cover letter) and features
     fname = getattr(upload_file, "name", "candidate")
+    prep = prepare_cv(fname, upload_bytes(upload_file), role, vac_row, vacancy_txt, cover_letter_text, ocr_options())
 
-    # 2) Build per-CV corpus (vacancy + this CV + optional cover letter)
-    vacancy_section = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
-    cl_section = f"\n\n### COVER LETTER\n{cover_letter_text}\n" if cover_letter_text else ""
-    corpus_text = basic_clean((vacancy_section + f"\n\n### FILE: {fname}\n{cv_text}" + cl_section).strip())
+    # 2) Make the CV findable in the cross-candidate search
+    index_candidate_cv(prep["cv_text"], fname, role, sector_for_model, prep["features"])
 
-    # 3) Features & probabilities
-    feat = build_feature_row(role, corpus_text, vac_row, sector=sector_for_model)
+    # 3) Probabilities + narrative
+    return narrate_prepared_cv(prep, role, vac_row, lang, sector_for_model, openai_key,
+                               st.session_state.get("blend", 0.4))
+
+def score_prepared_cv(prep: dict, role: str, sector_for_model: str, blend: float = 0.4):
+    """Result row (metrics + features, no narrative yet) for one CV prepared by talentlens.features.prepare_cv."""
+    feat = prep["features"]
     base_prob = predict_prob(feat, sector=sector_for_model)
     _w = get_sector_weights(sector_for_model)
-    _blend = st.session_state.get("blend", 0.4)
-    adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
-
-    # 4) Narrative via LLM (or lightweight fallback)
-    client = get_openai_client(openai_key)
-    narrative = gpt_narrative_and_qa(
-        client, lang, role, adj_prob, feat, vac_row,
-        question=None, corpus_text=corpus_text, retrieved=None
-    )
-
-    # 5) Collect outputs
-    out = {
-        "filename": fname,
+    adj_prob = adjust_with_custom_factors(base_prob, feat, _w, blend)
+    return {
+        "filename": prep["filename"],
+        "content_hash": content_hash(prep["cv_text"]),
         "role": role or "-",
         "pred_success_adj": adj_prob,
         "pred_success_model": base_prob,
+        "model_version": model_version,
         "skill_match": float(feat.get("SkillMatch", 0.0)),
         "culture_fit": float(feat.get("CultureFit", 0.0)),
         "motivation": float(feat.get("MotivationScore", 0.0)),
         "experience_years": int(feat.get("ExperienceYears", 0)),
-        "narrative": narrative.strip()
+        "features": feat
     }
+
+def narrate_prepared_cv(prep: dict, role: str, vac_row: dict, lang: str, sector_for_model: str,
+                        openai_key: str, blend: float = 0.4):
+    """LLM stage for one CV prepared by talentlens.features.prepare_cv; runs on batch worker threads."""
+    out = score_prepared_cv(prep, role, sector_for_model, blend)
+
+    # Narrative via LLM (or lightweight fallback)
+    client = get_openai_client(openai_key)
+    narrative = gpt_narrative_and_qa(
+        client, lang, role, out["pred_success_adj"], prep["features"], vac_row,
+        question=None, corpus_text=prep["corpus_text"], retrieved=None
+    )
+    out["narrative"] = narrative.strip()
     return out
 
+# --- Concurrent batch narratives: CPU stage in a process pool, LLM stage on threads ---
+BATCH_LLM_WORKERS = 8
+
+CPU_WORKERS = max(1, min(os.cpu_count() or 1, 4))
+
+@st.cache_resource
+def _cpu_pool():
+    # One long-lived pool per server process: workers keep what they loaded (sentiment pipeline, OCR)
+    # across batches instead of starting cold on every click
+    try:
+        pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    except Exception:
+        pool = ThreadPoolExecutor(max_workers=CPU_WORKERS)
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def cpu_pool():
+    pool = _cpu_pool()
+    if getattr(pool, "_broken", False):      # a crashed worker breaks a ProcessPoolExecutor for good
+        _cpu_pool.clear()
+        pool = _cpu_pool()
+    return pool
+
+def iter_batch_narratives(uploads, role, vac_row, vacancy_txt, lang, sector_for_model, openai_key, cover_letter_text=""):
+    """Yield (input_position, result, error) as each CV finishes, in completion order.
+
+    Extraction + features run in worker processes; as soon as a CV is prepared its narrative is
+    requested on a thread pool (LLM calls share the process-wide rate limiter in talentlens.llm).
+    """
+    jobs = [(getattr(up, "name", f"cv_{i}"), upload_bytes(up)) for i, up in enumerate(uploads)]
+    ocr, blend = ocr_options(), st.session_state.get("blend", 0.4)
+    get_sector_weights(sector_for_model)      # initialise session weights before worker threads read them
+    ctx = get_script_run_ctx()
+    cpu = cpu_pool()
+    with ThreadPoolExecutor(
+            max_workers=BATCH_LLM_WORKERS,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as llm:
+        position = {cpu.submit(prepare_cv, name, data, role, vac_row, vacancy_txt, cover_letter_text, ocr): i
+                    for i, (name, data) in enumerate(jobs)}
+        stage = dict.fromkeys(position, "cpu")
+        pending = set(position)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = position[fut]
+                    try:
+                        res = fut.result()
+                    except Exception as e:
+                        yield i, None, e
+                        continue
+                    if stage[fut] == "cpu":
+                        index_candidate_cv(res["cv_text"], res["filename"], role, sector_for_model, res["features"])
+                        nxt = llm.submit(narrate_prepared_cv, res, role, vac_row, lang, sector_for_model, openai_key, blend)
+                        position[nxt], stage[nxt] = i, "llm"
+                        pending.add(nxt)
+                    else:
+                        yield i, res, None
+        finally:
+            for fut in pending:
+                fut.cancel()        # the run was stopped: drop queued CVs from the shared pool
+
+# --- Offline narrative jobs for large campaigns (talentlens/batch.py) ---
+def submit_narrative_job(uploads, role, vac_row, vacancy_txt, lang, sector_for_model, openai_key,
+                         cover_letter_text="", on_progress=None):
+    """Prepare every CV in worker processes, write one narrative request per CV to a JSONL job file and
+    submit it to the batch endpoint. Returns (job, [(filename, error)]) for CVs that could not be prepared.
+
+    Job requests always use single-pass prompts; map-reduce would need LLM calls before the job is written.
+    """
+    client = get_openai_client(openai_key)
+    if client is None:
+        raise RuntimeError("An OpenAI API key is needed to submit a batch job.")
+    jobs = [(getattr(up, "name", f"cv_{i}"), upload_bytes(up)) for i, up in enumerate(uploads)]
+    ocr, blend = ocr_options(), st.session_state.get("blend", 0.4)
+    items, failed = [], []
+    cpu = cpu_pool()
+    futures = [cpu.submit(prepare_cv, name, data, role, vac_row, vacancy_txt, cover_letter_text, ocr)
+               for name, data in jobs]
+    for i, fut in enumerate(futures):
+        try:
+            prep = fut.result()
+        except Exception as e:
+            failed.append((jobs[i][0], e))
+            continue
+        index_candidate_cv(prep["cv_text"], prep["filename"], role, sector_for_model, prep["features"])
+        row = score_prepared_cv(prep, role, sector_for_model, blend)
+        messages = llm_messages(None, lang, role, row["pred_success_adj"], prep["features"], vac_row,
+                                corpus_text=prep["corpus_text"], narrative_mode="Single pass")
+        items.append(BatchItem(f"{i:05d}-{row['content_hash'][:12]}", row["filename"], row["content_hash"],
+                               messages, row))
+        if on_progress is not None:
+            on_progress(i + 1, len(jobs))
+    if not items:
+        raise RuntimeError("None of the CVs could be prepared.")
+    job = BatchJob.create(items, llm_model(), temperature=0.4, max_tokens=700,
+                          label=f"{role or '-'} · {len(items)} CVs")
+    job.submit(client)
+    return job, failed
+
 # --- Custom Factors ---
 def get_sector_weights(sector: str):
     defaults = {"ExperienceYears":0.6,"SkillMatch":1.4,"CultureFit":1.2,"MotivationScore":1.0,"SentimentScore":0.8,"EmotionPos":0.6,"EmotionNeg":0.4}
@@ -1134,11 +1066,7 @@ help="Use for image-only PDFs (requires Tesseract + Poppler)."
 st.session_state["ocr_pages"] = st.slider("OCR pages (first N)", 1, 15, st.session_state.get("ocr_pages", 5), 1)
 st.session_state["poppler_dir"] = st.text_input("Poppler bin path (optional)", value=st.session_state.get("poppler_dir", os.getenv("POPPLER_PATH","")))
 tess_cmd = st.text_input("Tesseract exe path (optional)", value=os.getenv("TESSERACT_CMD",""))
-try:
-        if tess_cmd:
-            pytesseract.pytesseract.tesseract_cmd = tess_cmd
-except Exception:
-        pass
+st.session_state["tesseract_cmd"] = tess_cmd          # applied by talentlens.extract via OcrOptions
 st.caption(f"OCR available: {'Yes' if OCR_AVAILABLE else 'No'}")
 
 st.session_state["ocr_lang_label"] = st.selectbox(
@@ -1172,24 +1100,20 @@ def _extract_vacancy_text(file):
         try: return file.read().decode("utf-8", errors="ignore")
         except Exception: return ""
 
-def _classify_vacancy_text(vtext: str):
-        if not vtext: return None, None, 0.0
-        all_vacs = []
-        for sec, vacs in SECTORS.items():
-            for v in vacs:
-                sig = " ".join([v["JobTitle"], " ".join(v.get("RequiredSkills", [])), " ".join(v.get("ValueWords", []))])
-                all_vacs.append({"Sector": sec, "JobTitle": v["JobTitle"], "Text": sig})
-        df_all = pd.DataFrame(all_vacs)
-        tfidf = TfidfVectorizer(stop_words="english")
-        X = tfidf.fit_transform(df_all["Text"])
-        qv = tfidf.transform([vtext])
-        sims = cosine_similarity(qv, X).ravel()
-        best_idx = int(np.argmax(sims))
-        return df_all.iloc[best_idx]["Sector"], df_all.iloc[best_idx]["JobTitle"], float(sims[best_idx])
+@st.cache_resource(max_entries=4)
+def get_vacancy_matcher(version: int):
+        # TF-IDF over one catalog version, fitted once and shared by every session on that version
+        return VacancyMatcher.from_store(catalog, version)
+
+def _classify_vacancy_text(vtext: str, top_k: int = 3):
+        """Top-k catalog matches (sector, job_title, score) for a vacancy text, best first."""
+        if not vtext: return []
+        return get_vacancy_matcher(current_catalog_version()).match(vtext, top_k)
 
 _vac_text = _extract_vacancy_text(vac_file) if vac_file is not None else (vac_text_paste.strip() if vac_text_paste else "")
 if _vac_text:
-        best_sector, best_role, score = _classify_vacancy_text(_vac_text)
+        _vac_matches = _classify_vacancy_text(_vac_text)
+        best_sector, best_role, score = _vac_matches[0] if _vac_matches else (None, None, 0.0)
         if best_sector and best_role:
             changed = (
                 st.session_state.get("sector", default_sector()) != best_sector or
@@ -1197,13 +1121,15 @@ if _vac_text:
             )
             st.session_state["auto_vac_text"] = _vac_text
             st.session_state["auto_vac_score"] = score
+            st.session_state["auto_vac_matches"] = [m._asdict() for m in _vac_matches]
             if changed:
                 st.session_state["sector"] = best_sector
                 st.session_state["vacancy_select"] = best_role
                 st.toast(f"Vacancy matched → Sector: {best_sector} · Role: {best_role}", icon="✅")
                 st.rerun()
             else:
-                st.caption(f"Detected sector: {best_sector} · role: {best_role} · similarity {score:.3f}")
+                st.caption(f"Detected sector: {best_sector} · role: {best_role} · similarity {score:.3f}"
+                           + "".join(f" · alt: {m.job_title} ({m.sector}) {m.score:.3f}" for m in _vac_matches[1:] if m.score > 0))
         else:
             st.warning("Could not confidently classify the vacancy. You can still select sector/role manually.")
 else:
@@ -1211,16 +1137,16 @@ else:
     # --------------------------------------------------------------------
 
     # ---------- 2) SELECTORS (widget keys are canonical; no manual post-assignments) ----------
-sector_opts = list(SECTORS.keys())
+sector_opts = catalog.sectors(current_catalog_version())
 sector_default = st.session_state.get("sector", default_sector())
 st.selectbox(
         t("select_sector", lang),
         sector_opts,
-        index=sector_opts.index(sector_default) if sector_default in sector_opts else sector_opts.index(default_sector()),
+        index=sector_opts.index(sector_default) if sector_default in sector_opts else (sector_opts.index(default_sector()) if default_sector() in sector_opts else 0),
         key="sector"   # widget manages st.session_state["sector"]
     )
 
-vac_options_for_sidebar = [v["JobTitle"] for v in SECTORS[st.session_state["sector"]]]
+vac_options_for_sidebar = catalog.job_titles(st.session_state["sector"], current_catalog_version())
 vac_default = st.session_state.get("vacancy_select", (vac_options_for_sidebar[0] if vac_options_for_sidebar else None))
 st.selectbox(
         t("select_vac", lang),
@@ -1229,72 +1155,50 @@ st.selectbox(
         key="vacancy_select"   # widget manages st.session_state["vacancy_select"]
     )
 
-    # Optional vacancy CSV to swap catalog entries per sector
+    # Optional vacancy CSV to swap catalog entries per sector — imported once as its own catalog version
 vac_upload = st.file_uploader(t("or_upload_vac", lang), type=["csv"])
+_upload_version = import_vacancy_csv(vac_upload, st.session_state["sector"]) if vac_upload is not None else 0
+if _upload_version != st.session_state.get("catalog_version", 0):
+    st.session_state["catalog_version"] = _upload_version
+    st.rerun()
 
 def get_current_sector(): return st.session_state.get("sector", default_sector())
 
 # --- Synthetic dataset & model ---
 @st.cache_data
 def make_data(n=1000, seed=13):
-    rng = np.random.default_rng(seed)
-    edu = rng.choice(["MBO","HBO","WO"], size=n, p=[0.35,0.45,0.20])
-    yrs = rng.integers(0, 16, size=n)
-    mot = np.clip(rng.normal(0.68,0.15,size=n),0,1)
-    skill = np.clip(rng.normal(0.72,0.12,size=n),0.2,1)
-    fit = np.clip(rng.normal(0.66,0.18,size=n),0,1)
-    sent = np.clip(rng.normal(0.65,0.2,size=n),0,1)
-    emo_pos = np.clip(sent + rng.normal(0,0.1,size=n), 0, 1)
-    emo_neg = np.clip(1 - sent + rng.normal(0,0.1,size=n), 0, 1)
-    gender = rng.choice(["F","M","X"], size=n, p=[0.48,0.48,0.04])
-    sector = rng.choice(list(SECTORS.keys()), size=n)
-    logit = -1.1 + 0.06*yrs + 0.9*mot + 1.2*skill + 0.9*fit + 0.4*sent + np.where(edu=="WO",0.25,np.where(edu=="HBO",0.15,0)) + rng.normal(0,0.55,size=n)
-    prob = 1/(1+np.exp(-logit))
-    hired = (prob>0.6).astype(int)
-    ret = (1/(1+np.exp(-0.5 + 0.04*yrs + 1.0*fit + 0.6*mot + rng.normal(0,0.5,size=n)))>0.55).astype(int)
-    df = pd.DataFrame({
-        "Sector":sector,"EducationLevel":edu,"ExperienceYears":yrs,"MotivationScore":mot,"SkillMatch":skill,"CultureFit":fit,
-        "SentimentScore":sent,"EmotionPos":emo_pos,"EmotionNeg":emo_neg,"Gender":gender,"Hired":hired,"Retained12m":ret
-    })
-    return df
+    # Chunked, compact-dtype generator (see talentlens/synthetic.py); small n runs inline
+    return generate_dataset(n, seed=seed, sectors=catalog.sectors(), n_jobs=1 if n <= DEFAULT_CHUNK_SIZE else -1)
 
 df = make_data()
 
 @st.cache_resource
-def train_model(df: pd.DataFrame):
-    base = df.drop(columns=[c for c in ["Retained12m","Gender"] if c in df.columns])
-    work = pd.get_dummies(base, columns=[c for c in ["EducationLevel","Sector"] if c in base.columns], drop_first=True)
-    X, y = work.drop(columns=["Hired"]), work["Hired"]
-    Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
-    model = GradientBoostingClassifier(random_state=42).fit(Xtr, ytr)
-    prob = model.predict_proba(Xte)[:,1]; pred = (prob>0.5).astype(int)
-    metrics = {"f1": float(f1_score(yte, pred)), "auc": float(roc_auc_score(yte, prob))}
-    return model, X.columns.tolist(), metrics
+def train_model(n: int = 1000, seed: int = 13):
+    # Keyed on (n, seed) instead of hashing the whole DataFrame on every rerun
+    return fit_model(make_data(n, seed))
 
-model, feature_cols, metrics = train_model(df)
+@st.cache_resource
+def get_model_registry():
+    # Process-wide: every session reads the live version; retrains swap it atomically
+    registry = ModelRegistry()
+    registry.register(*train_model(), source="make_data(n=1000, seed=13)", data=make_data())
+    return registry
 
+# Snapshot once per script run: this session keeps its version until the next rerun
+model_registry = get_model_registry()
+live_model = model_registry.current()
+model, feature_cols, metrics = live_model.model, live_model.feature_cols, live_model.metrics
+model_version = live_model.version
 
 
-# --- Vacancy CSV (optional, per selected sector) ---
-def get_vac_df(vac_upload_file, sector=None):
-    default_df = pd.DataFrame(SECTORS.get(sector or default_sector(), []))
-    if vac_upload_file is None: return default_df.copy()
-    try:
-        dfv = pd.read_csv(vac_upload_file)
-        def split_or(v): return [x.strip() for x in v.split(",") if x.strip()] if isinstance(v,str) else []
-        cols = {c.lower(): c for c in dfv.columns}
-        mapping = {"jobtitle":"JobTitle","requiredskills":"RequiredSkills","valuewords":"ValueWords","expmin":"ExpMin","expmax":"ExpMax"}
-        for low, proper in mapping.items():
-            if low in cols: dfv.rename(columns={cols[low]: proper}, inplace=True)
-        dfv["RequiredSkills"] = dfv["RequiredSkills"].apply(split_or)
-        dfv["ValueWords"] = dfv["ValueWords"].apply(split_or)
-        return dfv
-    except Exception:
-        st.warning("Could not read vacancy CSV; using sector defaults.")
-        return default_df.copy()
+
+# --- Vacancies of the selected sector (one indexed query per sector and catalog version) ---
+def get_vac_df(sector=None, version=None):
+    return pd.DataFrame(catalog.vacancies(sector or default_sector(), version or current_catalog_version()),
+                        columns=["JobTitle", "RequiredSkills", "ValueWords", "ExpMin", "ExpMax"])
 
 current_sector = get_current_sector()
-vac_df = get_vac_df(vac_upload, current_sector)
+vac_df = get_vac_df(current_sector)
 
 # ---------------- TABS ----------------
 tabs = [
@@ -1310,9 +1214,6 @@ tabs = [
 ]
 section = st.tabs(tabs)
 
-current_sector = get_current_sector()
-vac_df = get_vac_df(vac_upload, current_sector)
-
 # ===== DASHBOARD =====
 with section[0]:
     st.title(t("title_dashboard", lang))
@@ -1368,9 +1269,11 @@ with section[0]:
     st.markdown("</div>", unsafe_allow_html=True)
 
     with st.expander("Model metrics"):
-        m1,m2 = st.columns(2)
+        m1,m2,m3 = st.columns(3)
         m1.metric("F1", f"{metrics['f1']:.3f}")
         m2.metric("ROC AUC", f"{metrics['auc']:.3f}")
+        m3.metric("Model version", model_version)
+        st.caption(f"Trained {live_model.trained_at} · {live_model.source}")
 
     # Candidate card (after Chat analysis)
     if 'last_features' in st.session_state:
@@ -1379,6 +1282,8 @@ with section[0]:
         p_adj = adjust_with_custom_factors(p, lf, _w, _blend)
 
         st.markdown(f"### Candidate: **{st.session_state.get('last_candidate_name','Candidate')}**  ·  Role: **{st.session_state.get('last_role','-')}**  ·  File: _{st.session_state.get('last_cv_filename','')}_")
+        scored_by = st.session_state.get('last_model_version', model_version)
+        st.caption(f"Scored by model {scored_by}" + ("" if scored_by == model_version else f" · live model is now {model_version} (re-run the analysis to rescore)"))
 
         k1,k2,k3,k4,k5 = st.columns(5)
         k1.metric("Predicted Success", f"{p_adj*100:.1f}%")
@@ -1411,9 +1316,10 @@ with section[0]:
 with section[1]:
     st.title(t("title_chat", lang))
 
-    # Conversation store
+    # Conversation store (restored from disk on a fresh session)
+    thread_store = get_thread_store()
     if "threads" not in st.session_state:
-        st.session_state.threads = {}
+        st.session_state.threads = thread_store.load_threads()
     if "current_thread" not in st.session_state:
         st.session_state.current_thread = None
 
@@ -1443,10 +1349,10 @@ with section[1]:
             cl_combined = basic_clean(cl_text_area)
 
         vacancy_txt = st.session_state.get("auto_vac_text", "")
-        vacancy_section = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
+        vacancy_block = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
 
         current_corpus = basic_clean((
-            vacancy_section +
+            vacancy_block +
             (cv_combined or "") +
             (("\n\n### COVER LETTER\n" + cl_combined) if cl_combined else "")
         ).strip())
@@ -1479,6 +1385,7 @@ with section[1]:
                 "vacancy_text": ""
             }
             st.session_state.current_thread = tid
+            thread_store.save_thread(tid, st.session_state.threads[tid])
 
         threads = st.session_state.threads
         active_ids = [tid for tid, meta in threads.items() if not meta.get("archived")]
@@ -1500,6 +1407,8 @@ with section[1]:
         )
         st.session_state.current_thread = current_choice
         current_meta = threads[current_choice]
+        _idx_bytes = thread_store.index_size(current_choice)
+        st.caption(f"Stored retrieval index: {_idx_bytes/1024:.1f} KB" if _idx_bytes else "No stored retrieval index yet.")
 
         # New conversation form
         with st.form("new_thread_form", clear_on_submit=True):
@@ -1520,31 +1429,42 @@ with section[1]:
             }
             st.session_state.current_thread = tid
             current_meta = threads[tid]
+            thread_store.save_thread(tid, current_meta)
 
         # Buttons
         cA, cB, cC = st.columns(3)
         with cA:
             if st.button("Attach current files to thread"):
                 current_meta["corpus"] = current_corpus
-                current_meta["index"] = build_index(current_corpus) if current_corpus else None
+                # Incremental: only sections (files) not yet in the thread index are vectorised
+                _idx = current_meta.get("index") or thread_store.load_index(current_choice) or IncrementalIndex()
+                _delta = _idx.sync_corpus(current_corpus)
+                current_meta["index"] = _idx if len(_idx) else None
+                st.caption(f"Index: +{_delta['added_chunks']} chunks, {_delta['removed_sections']} sections removed.")
                 current_meta["role"] = role
                 current_meta["vac_row"] = (vac_df[vac_df["JobTitle"] == role].iloc[0].to_dict()
                                            if (role and not vac_df.empty) else {})
                 current_meta["display_name"] = cv_display or (cv_names[0] if cv_names else "")
                 current_meta["vacancy_text"] = vacancy_txt
+                thread_store.save_thread(current_choice, current_meta)
+                thread_store.save_index(current_choice, current_meta["index"])
+                index_corpus_cvs(current_corpus, cv_names, role, current_sector)
                 st.success("Files (incl. vacancy context) attached.")
         with cB:
             if not current_meta.get("archived"):
                 if st.button("Archive"):
                     current_meta["archived"] = True
+                    thread_store.save_thread(current_choice, current_meta)
                     st.success("Conversation archived.")
             else:
                 if st.button("Unarchive"):
                     current_meta["archived"] = False
+                    thread_store.save_thread(current_choice, current_meta)
                     st.success("Conversation unarchived.")
         with cC:
             if st.button("Delete"):
                 threads.pop(current_choice, None)
+                thread_store.delete(current_choice)
                 remaining = [tid for tid, meta in threads.items() if not meta.get("archived")]
                 st.session_state.current_thread = remaining[0] if remaining else None
                 st.info("Conversation deleted.")
@@ -1568,7 +1488,10 @@ with section[1]:
             vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
                                                       if (chosen_role and not vac_df.empty) else {})
             corpus_text = current_meta.get("corpus", current_corpus)
-            idx = current_meta.get("index") or (build_index(corpus_text) if corpus_text else None)
+            idx = current_meta.get("index") or thread_store.load_index(current_choice)
+            if idx is None and corpus_text:
+                idx = build_index(corpus_text)
+                thread_store.save_index(current_choice, idx)
             current_meta["index"] = idx
 
             # Feature engineering
@@ -1582,21 +1505,29 @@ with section[1]:
             adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
             acc = acceptance_probability(adj_prob, feat)
 
-            top_chunks = retrieve(prompt, idx, top_k=8) if (prompt and idx) else []
+            # Best evidence first, overlaps merged, weak matches dropped, within the Q&A token budget
+            packed = pack_context(idx, prompt, budget=int(st.session_state.get("qa_token_budget", QA_TOKEN_BUDGET)),
+                                  min_score=float(st.session_state.get("min_snippet_score", MIN_SNIPPET_SCORE)))
+            top_chunks = packed.snippets
             client = get_openai_client(openai_key)
-            answer = gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
-                                          question=prompt, corpus_text=corpus_text, retrieved=top_chunks)
-
-            reply = (f"{answer}\n\n---\n**{t('pred_prob', lang)}:** {adj_prob:.0%} "
-                     f"(model: {base_prob:.0%}) · **Acceptance (est.)**: {acc:.0%}\n"
-                     f"- {t('motivation', lang)}: {feat['MotivationScore']:.0%}\n"
-                     f"- {t('skillmatch', lang)}: {feat['SkillMatch']:.0%}\n"
-                     f"- {t('culturefit', lang)}: {feat['CultureFit']:.0%}\n"
-                     f"- {t('sentiment', lang)}: {feat['SentimentScore']:.0%}\n"
-                     f"- {t('exp_years', lang)}: {feat['ExperienceYears']}\n")
+            score_block = (f"**{t('pred_prob', lang)}:** {adj_prob:.0%} "
+                           f"(model {model_version}: {base_prob:.0%}) · **Acceptance (est.)**: {acc:.0%}\n"
+                           f"- {t('motivation', lang)}: {feat['MotivationScore']:.0%}\n"
+                           f"- {t('skillmatch', lang)}: {feat['SkillMatch']:.0%}\n"
+                           f"- {t('culturefit', lang)}: {feat['CultureFit']:.0%}\n"
+                           f"- {t('sentiment', lang)}: {feat['SentimentScore']:.0%}\n"
+                           f"- {t('exp_years', lang)}: {feat['ExperienceYears']}\n")
 
             with st.chat_message("assistant"):
-                st.markdown(reply)
+                # Tokens render as they arrive; write_stream hands back the assembled answer
+                answer = st.write_stream(gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
+                                                              question=prompt, corpus_text=corpus_text,
+                                                              retrieved=top_chunks, stream=True))
+                answer = answer if isinstance(answer, str) else "".join(map(str, answer))
+                st.markdown("---\n" + score_block)
+                st.caption(f"Context: {packed.tokens} tokens from {len(top_chunks)} snippet(s) · "
+                           f"{packed.dropped} of {packed.candidates} retrieved chunks left out")
+            reply = f"{answer}\n\n---\n{score_block}"
             current_meta["messages"].append(("assistant", reply))
 
             # ---- SYNC NARRATIVE TO ASSESSMENT ----
@@ -1604,12 +1535,14 @@ with section[1]:
             narrative_clean = re.sub(r"(\n\s*){2,}", "\n\n", answer.strip())
             st.session_state.setdefault("ai_narratives", {})[candidate_id] = narrative_clean
             current_meta["narrative"] = narrative_clean
+            thread_store.save_thread(current_choice, current_meta)
             st.info(f"✅ Narrative synced to Assessment for {candidate_id}.")
 
             # Update dashboard
             st.session_state['last_candidate_name'] = corpus_text.splitlines()[0].strip()[:60] if corpus_text else "Candidate"
             st.session_state['last_features'] = feat
             st.session_state['last_probability'] = base_prob
+            st.session_state['last_model_version'] = model_version
             st.session_state['last_role'] = chosen_role
             st.session_state['last_sector'] = current_sector
             st.session_state['last_cv_filename'] = current_meta.get("display_name", "")
@@ -1627,16 +1560,18 @@ with section[1]:
             _blend = st.session_state.get('blend', 0.4)
             adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
             client = get_openai_client(openai_key)
-            narrative = gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
-                                             question=None, corpus_text=corpus_text, retrieved=None)
             with st.chat_message("assistant"):
-                st.markdown(narrative)
+                narrative = st.write_stream(gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
+                                                                 question=None, corpus_text=corpus_text,
+                                                                 retrieved=None, stream=True))
+                narrative = narrative if isinstance(narrative, str) else "".join(map(str, narrative))
             current_meta.setdefault("messages", []).append(("assistant", narrative))
             # ---- SYNC ----
             candidate_id = current_meta.get("display_name") or (cv_names[0] if cv_names else "Candidate")
             narrative_clean = re.sub(r"(\n\s*){2,}", "\n\n", narrative.strip())
             st.session_state.setdefault("ai_narratives", {})[candidate_id] = narrative_clean
             current_meta["narrative"] = narrative_clean
+            thread_store.save_thread(current_choice, current_meta)
             st.success(f"✅ Narrative stored and synced for {candidate_id}.")
 
         # ----- BATCH NARRATIVES -----
@@ -1653,26 +1588,119 @@ with section[1]:
                 vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
                                                           if (chosen_role and not vac_df.empty) else {})
                 cover_text_for_all = basic_clean(cl_text_area) if cl_text_area else ""
-                for up in cv_files:
+                # Results stream in as they finish; the stored list (and CSV) keeps upload order
+                slots = [None] * len(cv_files)
+                batch_progress = st.progress(0.0, text=f"0 / {len(cv_files)} CVs")
+                live_box, finished = st.empty(), []
+                for n_done, (i, res, err) in enumerate(iter_batch_narratives(
+                        cv_files, chosen_role, vac_row, vacancy_txt, lang, current_sector, openai_key,
+                        cover_text_for_all), start=1):
+                    batch_progress.progress(n_done / len(cv_files), text=f"{n_done} / {len(cv_files)} CVs")
+                    if err is not None:
+                        st.error(f"Error processing {getattr(cv_files[i], 'name', 'file')}: {err}")
+                        continue
+                    slots[i] = res
+                    finished.append(res)
+                    with live_box.container():
+                        for _r in finished:
+                            with st.expander(f"📄 {_r['filename']} · Success {_r['pred_success_adj']*100:.1f}%"):
+                                st.markdown(_r["narrative"])
+                results = [r for r in slots if r is not None]
+                batch_progress.empty()
+                live_box.empty()
+
+                # One vectorised shap_values call for the whole batch; values are stored per result
+                if results:
                     try:
-                        res = generate_narrative_for_single_cv(upload_file=up, role=chosen_role,
-                            vac_row=vac_row, vacancy_txt=vacancy_txt, lang=lang,
-                            sector_for_model=current_sector, openai_key=openai_key,
-                            cover_letter_text=cover_text_for_all)
-                        results.append(res)
-                        with st.expander(f"📄 {res['filename']} · Success {res['pred_success_adj']*100:.1f}%"):
-                            st.markdown(res["narrative"])
+                        X_batch = pd.concat([feature_frame(r["features"], feature_cols, current_sector) for r in results],
+                                            ignore_index=True)
+                        sv_batch, base_batch = explain_matrix(live_model, X_batch)
+                        for r, vals, data_row in zip(results, sv_batch, X_batch.to_numpy()):
+                            r["shap"] = {"values": vals.tolist(), "base": base_batch,
+                                         "data": data_row.tolist(), "features": list(feature_cols)}
                     except Exception as e:
-                        st.error(f"Error processing {getattr(up, 'name', 'file')}: {e}")
-
-                if results:
-                    df_batch = pd.DataFrame(results)
-                    st.download_button("Download batch narratives as CSV",
-                                       data=df_batch.to_csv(index=False).encode("utf-8"),
-                                       file_name="batch_narratives.csv",
-                                       mime="text/csv")
+                        st.caption(f"Batch SHAP unavailable: {e}")
+                    st.session_state["batch_results"] = results
                     st.success(f"Generated {len(results)} narratives.")
 
+        with st.expander("🗂️ Offline batch job (large campaigns)"):
+            st.caption("Writes one narrative request per uploaded CV to a JSONL job file and submits it to the batch "
+                       "endpoint (results within 24h). Finished jobs are merged into the results below by filename "
+                       "and CV content hash.")
+            if st.button("Submit offline batch job", key="batch_job_submit"):
+                if not cv_files:
+                    st.warning("Please upload one or more CV files first.")
+                else:
+                    chosen_role = current_meta.get("role") or role
+                    vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
+                                                              if (chosen_role and not vac_df.empty) else {})
+                    job_progress = st.progress(0.0, text="Preparing CVs…")
+                    try:
+                        job, failed = submit_narrative_job(
+                            cv_files, chosen_role, vac_row, st.session_state.get("auto_vac_text", ""), lang,
+                            current_sector, openai_key, basic_clean(cl_text_area) if cl_text_area else "",
+                            on_progress=lambda n, total: job_progress.progress(n / total, text=f"{n} / {total} CVs prepared"))
+                        st.success(f"Submitted job {job.id} ({len(job.manifest['items'])} CVs).")
+                        for name, err in failed:
+                            st.error(f"Error processing {name}: {err}")
+                    except Exception as e:
+                        st.error(f"Batch job not submitted: {e}")
+                    job_progress.empty()
+            for job in list_jobs()[:10]:
+                counts = job.manifest["request_counts"]
+                jc1, jc2 = st.columns([3, 1])
+                jc1.markdown(f"**{job.id}** · {job.manifest.get('label', '')} · `{job.status}` · "
+                             f"{counts['completed']}/{counts['total']} done")
+                if jc2.button("Refresh / merge", key=f"batch_job_refresh_{job.id}"):
+                    try:
+                        client = get_openai_client(openai_key)
+                        if client is not None:
+                            job.refresh(client)
+                        rows = job.fetch(client) if client is not None else job.results()
+                        if rows:
+                            st.session_state["batch_results"] = merge_results(
+                                st.session_state.get("batch_results", []), rows)
+                            st.success(f"Merged {len(rows)} narratives from {job.id}.")
+                        else:
+                            st.info(f"Job {job.id} is {job.status}.")
+                    except Exception as e:
+                        st.error(f"Could not refresh {job.id}: {e}")
+
+        batch_results = st.session_state.get("batch_results", [])
+        if batch_results:
+            for res in batch_results:
+                with st.expander(f"📄 {res['filename']} · Success {res['pred_success_adj']*100:.1f}% · model {res['model_version']}"):
+                    st.markdown(res["narrative"])
+                    if res.get("shap"):
+                        _sh = res["shap"]
+                        st.plotly_chart(waterfall_figure(_sh["values"], _sh["base"], _sh["data"], _sh["features"]),
+                                        use_container_width=True)
+
+            # Export: one row per CV, SHAP values flattened into shap_<feature> columns
+            export_rows = []
+            for res in batch_results:
+                row_out = {k: v for k, v in res.items() if k not in ("features", "shap")}
+                if res.get("shap"):
+                    row_out["shap_base"] = res["shap"]["base"]
+                    row_out.update({f"shap_{f}": v for f, v in zip(res["shap"]["features"], res["shap"]["values"])})
+                export_rows.append(row_out)
+            df_batch = pd.DataFrame(export_rows)
+            d1, d2 = st.columns(2)
+            with d1:
+                st.download_button("Download batch narratives as CSV",
+                                   data=df_batch.to_csv(index=False).encode("utf-8"),
+                                   file_name="batch_narratives.csv",
+                                   mime="text/csv")
+            with d2:
+                try:
+                    _pq = io.BytesIO()
+                    df_batch.to_parquet(_pq, index=False)
+                    st.download_button("Download as Parquet", data=_pq.getvalue(),
+                                       file_name="batch_narratives.parquet",
+                                       mime="application/octet-stream")
+                except Exception:
+                    st.caption("Parquet export needs pyarrow.")
+
         # ----- WHAT-IF + SHAP EXPLAINABILITY -----
         st.markdown("---")
         cols = st.columns([1, 1])
@@ -1697,27 +1725,10 @@ with section[1]:
             st.subheader(t("shap_title", lang))
             try:
                 if 'last_features' in st.session_state:
-                    row = pd.DataFrame([st.session_state['last_features']])
-                    for c in feature_cols:
-                        if c.startswith("Sector_"):
-                            row[c] = 0
-                    sec_col = f"Sector_{current_sector}"
-                    if sec_col in feature_cols:
-                        row[sec_col] = 1
-                    for c in feature_cols:
-                        if c not in row.columns:
-                            row[c] = 0
-                    row = row[feature_cols]
-                    explainer = shap.TreeExplainer(model)
-                    sv = explainer.shap_values(row)
-                    fig = plt.figure()
-                    shap.waterfall_plot(
-                        shap.Explanation(values=sv[0], base_values=explainer.expected_value,
-                                         data=row.iloc[0].values, feature_names=row.columns.tolist()),
-                        show=False
-                    )
-                    st.pyplot(fig, clear_figure=True)
-                    plt.close(fig)
+                    row = feature_frame(st.session_state['last_features'], feature_cols, current_sector)
+                    # Cached per (model version, feature vector): What-if slider reruns reuse the figure
+                    _sv, _base, fig = explain_and_plot(live_model, row)
+                    st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.caption("Upload a CV to view per-candidate SHAP.")
             except Exception:
@@ -1741,6 +1752,43 @@ with section[2]:
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.dataframe(df.sample(25), use_container_width=True)
+
+    # ---- Global SHAP (precomputed when the model version was registered) ----
+    shap_summary = load_shap_summary(live_model)
+    st.markdown(f"#### Global explainability · model {model_version}")
+    if shap_summary is None:
+        st.caption(f"SHAP summary for {model_version} is still being computed — refresh in a moment.")
+    else:
+        st.plotly_chart(beeswarm_figure(shap_summary), use_container_width=True)
+        dep_feature = st.selectbox("Dependence plot feature", list(shap_summary["features"]), key="shap_dep_feature")
+        st.plotly_chart(dependence_figure(shap_summary, dep_feature), use_container_width=True)
+
+    # ---- Candidate search across every processed CV (batch runs + attached thread files) ----
+    st.markdown("#### Candidate search")
+    cand_index = get_candidate_index()
+    if cand_index is None:
+        st.caption("Candidate search needs SQLite with the FTS5 extension.")
+    else:
+        facets = cand_index.facets()
+        cand_q = st.text_input("Search all processed CVs", key="cand_search_q",
+                               placeholder="e.g. Airflow Dutch master")
+        cs1, cs2, cs3, cs4 = st.columns([2, 2, 2, 1])
+        with cs1: f_sector = st.multiselect("Sector", facets["sector"], key="cand_search_sector")
+        with cs2: f_role = st.multiselect("Role", facets["role"], key="cand_search_role")
+        with cs3: f_band = st.multiselect("Experience (years)", facets["experience_band"], key="cand_search_band")
+        with cs4: f_all = st.checkbox("All terms", value=True, key="cand_search_all")
+        if cand_q.strip():
+            _t0 = pd.Timestamp.now()
+            hits = cand_index.search(cand_q, sector=f_sector, role=f_role, experience_band=f_band,
+                                     match_all=f_all, limit=25)
+            _ms = (pd.Timestamp.now() - _t0).total_seconds() * 1000
+            st.caption(f"{len(hits)} match(es) among {len(cand_index)} indexed CVs · {_ms:.0f} ms")
+            for h in hits:
+                st.markdown(f"**{h.filename}** · {h.sector or '-'} · {h.role or '-'} · "
+                            f"{h.experience_years} yrs · score {h.score:.2f}  \n> {h.snippet}")
+        else:
+            st.caption(f"{len(cand_index)} CVs indexed. CVs are added when batch narratives run or files are attached to a thread.")
+
     if 'last_features' in st.session_state:
         st.markdown(f"#### Candidate Insights: **{st.session_state.get('last_candidate_name','Candidate')}**  ·  Role: **{st.session_state.get('last_role','-')}**")
         _pd = pd.DataFrame([st.session_state['last_features']])
@@ -1753,7 +1801,6 @@ with section[3]:
     import io
     import plotly.graph_objects as go
     import numpy as np
-    from openai import OpenAI
 
     # ---------- THEME ----------
     PRIMARY_BG, ACCENT, TEXT = "#0B1A33", "#FFD700", "#FFFFFF"
@@ -1824,67 +1871,33 @@ with section[3]:
         role = st.session_state.get("vacancy_select", "Data Analyst")
         openai_key = st.session_state.get("openai_key", os.getenv("OPENAI_API_KEY", ""))
 
-        # ---------- AI QUESTION GENERATOR ----------
-        def generate_ai_questions(vac_text, role_name, lang="en", api_key=None):
-            """Semantic recruiter-grade AI question generator."""
+        # ---------- AI QUESTION BANK (talentlens/questions.py) ----------
+        bank = question_bank()
+
+        def generate_ai_questions(vac_text, role_name, lang="en", api_key=None, fresh=False):
+            """Semantic recruiter-grade AI question generator; successful sets are stored in the bank."""
             try:
-                if not api_key:
-                    raise ValueError("No OpenAI key.")
-                client = OpenAI(api_key=api_key)
-                prompt = f"""
-                You are a professional recruiter. Generate 6–8 open-ended, high-quality assessment questions covering:
-                1. Motivation / ambition
-                2. Technical / role-fit skills
-                3. Experience relevance
-                4. Behavioral & social dynamics
-                5. Cultural alignment
-                6. Growth / potential
-                7. A reflective 'what-if' scenario
-                Role: {role_name}
-                Language: {"Dutch" if lang == "nl" else "English"}
-                VACANCY:
-                {vac_text[:2500]}
-                """
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert HR recruiter creating contextual interview questions.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.6,
-                    max_tokens=600,
-                )
-                txt = res.choices[0].message.content
-                questions = [
-                    q.strip("1234567890. ").strip()
-                    for q in txt.split("\n")
-                    if len(q.strip()) > 10
-                ]
-                return questions[:8]
+                client = get_openai_client(api_key)
+                if client is None:
+                    raise ValueError("No LLM client (API key).")
+                questions = generate_questions(client, vac_text, role_name, lang, fresh=fresh, model=llm_model())
+                bank.put(role_name, vac_text, lang, questions)
+                return questions
             except Exception:
-                return [
-                    f"What motivated you to apply for the {role_name} position?",
-                    "Which skills make you a strong fit for this role?",
-                    "Describe a past experience that shows your competence.",
-                    "How do you collaborate with others at work?",
-                    "What about our company culture appeals to you?",
-                    "Where do you see your growth potential?",
-                    "Imagine getting this job — what would you change or optimize first?",
-                ]
-
-        if st.button("🔄 Generate AI Questions"):
-            st.session_state["assessment_questions"] = generate_ai_questions(
-                vacancy_txt, role, lang, openai_key
-            )
-            st.success("✅ AI recruiter-grade questions generated.")
-
-        qs = st.session_state.get(
-            "assessment_questions",
-            generate_ai_questions(vacancy_txt, role, lang, openai_key),
-        )
+                return default_questions(role_name)
+
+        # Reuse the stored set for this (role, vacancy, language); the LLM is only called when none
+        # exists yet or on explicit regeneration — never as a side effect of a rerun.
+        regenerate = st.button("🔄 Regenerate AI Questions" if bank.get(role, vacancy_txt, lang) else "🔄 Generate AI Questions")
+        qs = None if regenerate else bank.get(role, vacancy_txt, lang)
+        if qs is None:
+            qs = generate_ai_questions(vacancy_txt, role, lang, openai_key, fresh=regenerate)
+            if regenerate:
+                st.success("✅ AI recruiter-grade questions generated.")
+        st.session_state["assessment_questions"] = qs
+        _bank_entry = bank.entry(role, vacancy_txt, lang)
+        st.caption(f"Question bank: stored set from {_bank_entry['created_at']} for {role} ({lang})." if _bank_entry
+                   else "Question bank: default questions (no API key or generation failed).")
 
         # ---------- ASSESSMENT FORM ----------
         st.markdown(f"### {L['form_title'][lang]} — *{candidate_name}*")
@@ -1942,55 +1955,33 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.metrics import f1_score, roc_auc_score
-import shap
-
-
-# Retrieval (lightweight)
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Optional deps
-try:
-    from transformers import pipeline
-    TRANSFORMERS_AVAILABLE = True
-except Exception:
-    TRANSFORMERS_AVAILABLE = False
-
-try:
-    from pdfminer.high_level import extract_text as pdf_extract_text
-except Exception:
-    pdf_extract_text = None
-
-try:
-    import docx
-except Exception:
-    docx = None
-
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
-
-# OCR deps (optional)
-try:
-    from pdf2image import convert_from_bytes
-    import pytesseract
-    from PIL import Image, ImageOps  # noqa
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
-
-# Extra PDF fallback
-try:
-    import pypdf
-    PYPDF_OK = True
-except Exception:
-    PYPDF_OK = False
+
+
+from talentlens.synthetic import generate_dataset, DEFAULT_CHUNK_SIZE
+from talentlens.registry import ModelRegistry, fit_model
+from talentlens.explain import feature_frame, explain_matrix, load_shap_summary
+from talentlens import DATA_DIR
+from talentlens.retrieval import build_index, ThreadStore, IncrementalIndex, split_sections
+from talentlens.catalog import VacancyMatcher, catalog_store
+from talentlens.vacancies import fetch_vacancies, expand_pairs
+from talentlens.search import CandidateIndex, FTS5_AVAILABLE, content_hash
+from talentlens.batch import BatchJob, BatchItem, list_jobs, merge_results
+from talentlens.client import openai_client, llm_available, default_backend, Backend, BACKENDS
+from talentlens.ledger import ledger
+from talentlens.llm import complete, stream_complete, response_cache, rate_limiter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import atexit
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from talentlens.extract import OCR_AVAILABLE, OcrOptions, docx_text, pdf_text, file_text
+from talentlens.features import (basic_clean, detect_years_experience, emotion_vector, sentiment_score,
+                                 build_feature_row, prepare_cv)
+from talentlens.questions import question_bank, generate_questions, default_questions
+from talentlens.narrative import build_messages, NARRATIVE_MODES
+from talentlens.context import pack_context, QA_TOKEN_BUDGET, NARRATIVE_TOKEN_BUDGET, MIN_SNIPPET_SCORE
+from talentlens.shap_plots import (sector_importance_figure, beeswarm_figure, dependence_figure,
+                                   waterfall_figure, explain_and_plot)
+
 # --- Streamlit page & theme ---
 # --- Streamlit page & theme ---
 st.set_page_config(page_title="CynthAI© - Personato TalentLens", page_icon="🤝", layout="wide")
@@ -2006,7 +1997,6 @@ import streamlit as st
 import hashlib, json, os
 from datetime import datetime
 from pathlib import Path
-from PIL import Image
 
 # -------------------- USER STORAGE --------------------
 USER_FILE = Path("users.json")
@@ -2569,120 +2559,64 @@ def sample_vacancies_by_sector():
         "Healthcare":[{"JobTitle":"Healthcare Administrator","RequiredSkills":["EMR","Scheduling","Compliance","Communication","Billing"],"ValueWords":["care","trust","structure","service","quality"],"ExpMin":1,"ExpMax":6}]
     }
 def default_sector(): return "IT"
-SECTORS = sample_vacancies_by_sector()
-
-# --- Helpers for vacancy extraction / OCR ---
-def _tess_lang_code(ui_lang: str, override_label: str) -> str:
-    if override_label.startswith("English"): return "eng"
-    if override_label.startswith("Dutch"): return "nld"
-    return "nld" if str(ui_lang).lower().startswith("nl") else "eng"
 
-def _tess_psm_value(psm_label: str) -> int:
-    try:
-        return int(psm_label.split(" - ", 1)[0].strip())
-    except Exception:
-        return 3
+@st.cache_resource
+def get_catalog_store():
+    # Persistent, versioned catalog (talentlens/catalog.py); the built-in vacancies seed it on first start
+    store = catalog_store()
+    store.import_sectors(sample_vacancies_by_sector(), activate=not store.active_version())
+    return store
+
+catalog = get_catalog_store()
+
+def current_catalog_version():
+    # An uploaded vacancy CSV pins this session to its own catalog version; otherwise the active one
+    return st.session_state.get("catalog_version") or catalog.active_version()
+
+def import_vacancy_csv(upload, sector):
+    # Imported once per uploaded file: rows without a Sector column go to the sector selected at upload
+    # time, and later sector changes reuse that version instead of importing the file again
+    file_id = getattr(upload, "file_id", None) or upload.name
+    pin = st.session_state.get("vac_upload_pin")
+    if not pin or pin[0] != file_id:
+        try:
+            pin = (file_id, catalog.import_csv(upload.getvalue(), source=upload.name, sector=sector), "")
+        except Exception as e:
+            pin = (file_id, 0, str(e))
+        st.session_state["vac_upload_pin"] = pin
+    if pin[2]:
+        st.warning(f"Could not read vacancy CSV ({pin[2]}); using sector defaults.")
+    return pin[1]
+
+# --- Text extraction (talentlens/extract.py); OCR options come from the sidebar ---
+def ocr_options() -> OcrOptions:
+    return OcrOptions(
+        enabled=bool(st.session_state.get("ocr_enabled", False)),
+        ui_lang=st.session_state.get("lang_hint", "en"),
+        lang_label=st.session_state.get("ocr_lang_label", "Auto (based on UI language)"),
+        max_pages=int(st.session_state.get("ocr_pages", 5)),
+        poppler_bin=st.session_state.get("poppler_dir", "").strip(),
+        dpi=int(st.session_state.get("ocr_dpi", 300)),
+        psm_label=st.session_state.get("ocr_psm", "3 - Fully auto"),
+        tesseract_cmd=st.session_state.get("tesseract_cmd", ""),
+    )
 
-def _preprocess_for_ocr(img: "Image.Image") -> "Image.Image":
-    try:
-        gray = img.convert("L")
-        gray = ImageOps.autocontrast(gray)
-        return gray.point(lambda p: 255 if p > 180 else 0)
-    except Exception:
-        return img
-
-def _ocr_pdf_bytes(pdf_bytes: bytes,
-                   ui_lang: str = "en",
-                   override_lang_label: str = "Auto (based on UI language)",
-                   max_pages: int = 5,
-                   poppler_bin: str = "",
-                   dpi: int = 300,
-                   psm_label: str = "3 - Fully auto") -> str:
-    if not OCR_AVAILABLE or not pdf_bytes:
-        return ""
-    try:
-        kwargs = dict(fmt="png", first_page=1, last_page=max_pages, dpi=int(dpi))
-        if poppler_bin:
-            kwargs["poppler_path"] = poppler_bin
-        images = convert_from_bytes(pdf_bytes, **kwargs)
-        tess_lang = _tess_lang_code(st.session_state.get("lang_hint","en"), override_lang_label)
-        psm = _tess_psm_value(psm_label)
-        config = f"--psm {psm}"
-        texts = []
-        for img in images:
-            base = _preprocess_for_ocr(img)
-            cand_texts = []
-            for rot in (0, 90, 270):
-                try:
-                    img_rot = base if rot == 0 else base.rotate(rot, expand=True)
-                    cand_texts.append(pytesseract.image_to_string(img_rot, lang=tess_lang, config=config))
-                except Exception:
-                    cand_texts.append("")
-            page_text = max(cand_texts, key=lambda s: len(s or ""))
-            texts.append(page_text)
-        return "\n".join(texts)
+def upload_bytes(upload) -> bytes:
+    if upload is None: return b""
+    try: return upload.getvalue()
     except Exception:
-        return ""
+        try: return upload.read()
+        except Exception: return b""
 
 def extract_text_from_docx(file):
-    if docx is None: return ""
-    try: return "\n".join(p.text for p in docx.Document(file).paragraphs)
-    except Exception: return ""
+    return docx_text(upload_bytes(file))
 
 def extract_text_from_pdf(uploaded_file):
-    if uploaded_file is None: return ""
-    # Bytes buffer
-    try:
-        data = uploaded_file.getvalue()
-    except Exception:
-        try: data = uploaded_file.read()
-        except Exception: data = b""
-    text = ""
-
-    # A) pdfminer
-    if pdf_extract_text is not None and data:
-        try: text = pdf_extract_text(io.BytesIO(data)) or ""
-        except Exception: text = ""
-
-    # B) PyPDF fallback
-    if (not text or len(text.strip()) < 60) and PYPDF_OK and data:
-        try:
-            reader = pypdf.PdfReader(io.BytesIO(data))
-            if getattr(reader, "is_encrypted", False):
-                try: reader.decrypt("")
-                except Exception: pass
-            parts = []
-            for page in reader.pages[:15]:
-                try: parts.append(page.extract_text() or "")
-                except Exception: parts.append("")
-            alt = "\n".join(parts).strip()
-            if len(alt) > len(text): text = alt
-        except Exception:
-            pass
-
-    # C) OCR fallback (enhanced)
-    if (st.session_state.get("ocr_enabled", False) or len(text.strip()) < 60) and OCR_AVAILABLE and data:
-        ocr_text = _ocr_pdf_bytes(
-            data,
-            ui_lang=st.session_state.get("lang_hint","en"),
-            override_lang_label=st.session_state.get("ocr_lang_label","Auto (based on UI language)"),
-            max_pages=st.session_state.get("ocr_pages",5),
-            poppler_bin=st.session_state.get("poppler_dir","").strip(),
-            dpi=st.session_state.get("ocr_dpi",300),
-            psm_label=st.session_state.get("ocr_psm","3 - Fully auto")
-        )
-        if len((ocr_text or "").strip()) > len(text.strip()):
-            text = ocr_text
-
-    return text or ""
+    return pdf_text(upload_bytes(uploaded_file), ocr_options())
 
 def extract_cv_text(upload):
     if upload is None: return ""
-    name = upload.name.lower()
-    if name.endswith(".pdf"): return extract_text_from_pdf(upload)
-    if name.endswith(".docx"): return extract_text_from_docx(upload)
-    try: return upload.read().decode("utf-8", errors="ignore")
-    except Exception: return ""
+    return file_text(upload.name, upload_bytes(upload), ocr_options())
 
 def extract_texts(uploads):
     """Return combined_text, names_list, display_name for 0..N files (robust)."""
@@ -2703,135 +2637,11 @@ def extract_texts(uploads):
     display = names[0] + (f" (+{len(names)-1} more)" if len(names) > 1 else "")
     return combined, names, display
 
-# --- NLP feature engineering ---
-def basic_clean(text: str): return re.sub(r"\s+", " ", text or "").strip()
-
+# --- NLP feature engineering (talentlens/features.py) ---
 import re, datetime, numpy as np
 
-def detect_years_experience(text: str) -> int:
-    """Estimate realistic years of experience with contextual filtering."""
-    if not text:
-        return 0
-
-    t = text.lower()
-    yrs = 0
-
-    # --- Context-based pattern (stronger weight when 'experience' nearby) ---
-    context_matches = re.findall(
-        r"(?:over|about|around|approximately|up to)?\s*(\d{1,2})\s*(?:\+?\s*)?(?:years?|yrs?)\s*(?:of\s+)?(?:work|experience|career)?",
-        t,
-    )
-    if context_matches:
-        yrs = max(int(x) for x in context_matches if x.isdigit())
-
-    # --- If no explicit phrase found, try a 'since YEAR' or range heuristic ---
-    if yrs == 0:
-        # e.g., "since 2014", "2015–2022"
-        years = re.findall(r"(19|20)\d{2}", t)
-        if len(years) >= 2:
-            yrs = max(0, min(int(max(years)) - int(min(years)), 40))
-        elif years:
-            yrs = max(0, min(datetime.datetime.now().year - int(years[0]), 40))
-        else:
-            yrs = 0
-
-    # --- Sanity limits ---
-    if yrs < 0:
-        yrs = 0
-    yrs = int(np.clip(yrs, 0, 20))  # limit to 20 years max realistic value
-    return yrs
-
-SKILL_VOCAB = {
-"Data Analyst":["Python","SQL","PowerBI","Tableau","Statistics","ETL","Pandas","Numpy","Visualization","Dashboards"],
-"Data Engineer":["Python","SQL","ETL","Airflow","Cloud","Pandas","Spark"],
-"Software Developer":["Python","JavaScript","Git","APIs","Testing","CI/CD"],
-"HR Consultant":["Recruitment","Policy","HRIS","Stakeholder","Coaching","Onboarding","Compensation","Benefits","Compliance","Communication"],
-"Recruiter":["Sourcing","Screening","Interviewing","ATS","EmployerBranding","LinkedIn"],
-"Marketing Manager":["Campaigns","Brand","SEO","SEM","Content","Copywriting","Analytics","Social","Leadership","Strategy"],
-"Content Marketer":["Copywriting","SEO","Analytics","Social","CMS","Content"],
-"Logistics Planner":["Planning","WMS","Excel","Communication","Problem-solving"],
-"Supply Chain Analyst":["SQL","Forecasting","PowerBI","ERP","Inventory"],
-"Financial Controller":["Accounting","Excel","Reporting","IFRS","Analysis"],
-"Business Analyst":["Modelling","SQL","PowerBI","Stakeholder","Budgeting"],
-"Account Manager":["Prospecting","Negotiation","CRM","Forecasting","Presentation"],
-"Mechanical Engineer":["CAD","FEA","Materials","Testing","Manufacturing"],
-"Legal Counsel":["Contract","Compliance","GDPR","Negotiation","Advisory"],
-"Healthcare Administrator":["EMR","Scheduling","Compliance","Communication","Billing"]}
-
-def detect_skills(text: str, role: str) -> float:
-    vocab = SKILL_VOCAB.get(role, [])
-    if not text or not vocab: return 0.0
-    found = sum(1 for kw in vocab if re.search(r"\b"+re.escape(kw)+r"\b", text, re.I))
-    return found / len(vocab)
-
-EMOTION_LEX = {
-"joy":["happy","delight","enjoy","excited","proud","satisfied","enthusiastic","passion"],
-"trust":["trust","reliable","integrity","dependable","responsible","commitment"],
-"anticipation":["eager","looking forward","anticipate","expect","curious","aspire","ambition"],
-"surprise":["surprise","unexpected","discovery","novel","breakthrough"],
-"sadness":["sad","regret","unhappy","disappointed","loss","depress"],
-"anger":["angry","frustrated","upset","annoyed","irritated"],
-"fear":["afraid","fear","concern","worried","anxious","risk"],
-"disgust":["disgust","gross","repulsed","unethical","unfair"]}
-def emotion_vector(text: str) -> dict:
-    t = (text or "").lower(); vec = {}
-    for emo, kws in EMOTION_LEX.items():
-        hits = sum(len(re.findall(r"\b"+re.escape(kw)+r"\b", t)) for kw in kws)
-        vec[emo] = min(hits/10.0, 1.0)
-    return vec
-
-def sentiment_score(text: str) -> float:
-    if text is None or len(text)<20: return 0.5
-    if TRANSFORMERS_AVAILABLE:
-        try:
-            pipe = pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
-            res = pipe(text[:1500])[0]; label = res.get("label","NEU").upper(); score = res.get("score",0.5)
-            if label.startswith("POS"): return float(np.clip(0.6+0.4*score,0,1))
-            if label.startswith("NEG"): return float(np.clip(0.4-0.4*score,0,1))
-            return 0.5
-        except Exception:
-            pass
-    pos = len(re.findall(r"\b(excellent|achieved|improved|growth|success|impact|passion|motiv)\w*\b", text.lower()))
-    neg = len(re.findall(r"\b(problem|issue|failure|struggle|weak)\w*\b", text.lower()))
-    return float(np.clip(0.5+0.03*(pos-neg),0,1))
-
-def culture_fit_score(text: str, value_words: list) -> float:
-    if not text or not value_words: return 0.5
-    hits = sum(1 for w in value_words if re.search(r"\b"+re.escape(w)+r"\b", text, re.I))
-    return hits/max(len(value_words),1)
-
-def education_level_from_text(text: str) -> str:
-    t = (text or "").lower()
-    if re.search(r"\bwo\b|\bmaster\b|\bmsc\b|\buniversity\b|\buniversiteit\b", t): return "WO"
-    if re.search(r"\bhbo\b|\bbachelor\b", t): return "HBO"
-    if re.search(r"\bmbo\b", t): return "MBO"
-    return "HBO"
-
-def build_feature_row(role: str, combined_text: str, vacancy_row: dict, sector: str=None):
-    yrs = detect_years_experience(combined_text)
-    mot = sentiment_score(combined_text)
-    skill = detect_skills(combined_text, role)
-    fit = culture_fit_score(combined_text, vacancy_row.get("ValueWords", []))
-    emo = emotion_vector(combined_text)
-    emo_pos = (emo.get("joy",0)+emo.get("trust",0)+emo.get("anticipation",0)+emo.get("surprise",0))/4.0
-    emo_neg = (emo.get("sadness",0)+emo.get("anger",0)+emo.get("fear",0)+emo.get("disgust",0))/4.0
-    edu = education_level_from_text(combined_text)
-    return {
-        "ExperienceYears":yrs,"MotivationScore":mot,"SkillMatch":skill,"CultureFit":fit,"SentimentScore":mot,
-        "EmotionPos":float(emo_pos),"EmotionNeg":float(emo_neg),
-        "EducationLevel_HBO":1 if edu=="HBO" else 0,"EducationLevel_WO":1 if edu=="WO" else 0
-    }
-
 def predict_prob(feat: dict, sector: str=None) -> float:
-    row = pd.DataFrame([feat])
-    if sector:
-        for c in feature_cols:
-            if c.startswith("Sector_"): row[c]=0
-        sec_col = f"Sector_{sector}"
-        if sec_col in feature_cols: row[sec_col]=1
-    for c in feature_cols:
-        if c not in row.columns: row[c]=0
-    row = row[feature_cols]
+    row = feature_frame(feat, feature_cols, sector)
     return float(model.predict_proba(row)[0][1])
 
 def offer_uplift(base_prob: float, salary_pct: float, remote_days: int) -> float:
@@ -2847,88 +2657,115 @@ def acceptance_probability(success_prob: float, feat: dict, salary_pct: float=0.
     return float(1/(1+np.exp(-z)))
 
 # --- OpenAI client ---
+def llm_backend() -> Backend:
+    # Endpoint + model chosen in Settings (defaults from TALENTLENS_LLM_BACKEND / TALENTLENS_LLM_MODEL)
+    return st.session_state.get("llm_backend") or default_backend()
+
+def llm_model() -> str:
+    return llm_backend().model
+
+# Ledger rows are attributed to the Streamlit session of the calling thread (batch workers carry the ctx)
+ledger().session_resolver = lambda: getattr(get_script_run_ctx(), "session_id", "")
+
 def get_openai_client(api_key: str):
-    if not api_key or OpenAI is None: return None
-    try: return OpenAI(api_key=api_key)
-    except Exception: return None
-
-# --- Retrieval helpers ---
-def _chunk_text(text: str, size: int = 1000, overlap: int = 150):
-    text = text or ""
-    if len(text) <= size: return [text] if text else []
-    chunks, start = [], 0
-    while start < len(text):
-        end = min(len(text), start + size)
-        chunks.append(text[start:end])
-        if end == len(text): break
-        start = max(0, end - overlap)
-    return chunks
-
-def build_index(corpus_text: str):
-    chunks = _chunk_text(corpus_text, size=1000, overlap=150)
-    if not chunks: return {"chunks": [], "tfidf": None}
-    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1,2))
-    X = vectorizer.fit_transform(chunks)
-    return {"chunks": chunks, "tfidf": (vectorizer, X)}
-
-def retrieve(question: str, index, top_k: int = 8):
-    if not question or not index or not index.get("tfidf"): return []
-    vectorizer, X = index["tfidf"]
-    qv = vectorizer.transform([question])
-    sims = cosine_similarity(qv, X).ravel()
-    top = sims.argsort()[::-1][:top_k]
-    return [(index["chunks"][i], float(sims[i])) for i in top]
+    # Pooled per (backend, API key): keep-alive, timeouts, retries, circuit breaker — see talentlens/client.py
+    return openai_client(api_key, llm_backend())
+
+# --- Retrieval helpers (talentlens/retrieval.py) ---
+def get_thread_store():
+    # Per-user thread + index store on local disk; survives reloads and restarts
+    user_key = hashlib.sha256(st.session_state.get("user_email", "anonymous").encode()).hexdigest()[:12]
+    return ThreadStore(DATA_DIR / "threads" / user_key)
+
+# --- Cross-candidate search (talentlens/search.py) ---
+@st.cache_resource
+def get_candidate_index():
+    # Process-wide: every CV processed in any session lands in one BM25 index
+    return CandidateIndex() if FTS5_AVAILABLE else None
+
+def index_candidate_cv(cv_text: str, filename: str, role: str, sector: str, feat: dict = None) -> bool:
+    """Add one CV to the candidate search; experience is only detected for CVs not yet indexed."""
+    cand_index = get_candidate_index()
+    if cand_index is None or not (cv_text or "").strip():
+        return False
+    if feat is None:
+        if cand_index.contains(cv_text):
+            return False
+        feat = {"ExperienceYears": detect_years_experience(cv_text)}
+    try:
+        return cand_index.add(cv_text, filename, sector, role or "", feat.get("ExperienceYears", 0))
+    except Exception:
+        return False
+
+def index_corpus_cvs(corpus_text: str, cv_names: list, role: str, sector: str) -> int:
+    """Index every uploaded CV ('### FILE: <name>' section) of a thread corpus; returns how many were new."""
+    added = 0
+    for sec in split_sections(corpus_text):
+        body = sec[len("### FILE: "):] if sec.startswith("### FILE: ") else ""
+        fname = next((n for n in cv_names if body.startswith(n)), None)
+        if fname:
+            added += index_candidate_cv(body[len(fname):].strip(), fname, role, sector)
+    return added
 
 # --- LLM narrative + Q&A (grounded) ---
+STREAM_INTERRUPTED = "\n\n_(answer interrupted: {error}; generate again for the full answer)_"
+
+def _stream_with_fallback(client, messages, fallback, **kw):
+    """Yield completion deltas; if the request fails before any text arrived, yield the offline fallback.
+
+    A failure mid-answer ends the text with a visible STREAM_INTERRUPTED marker, so the partial answer is
+    never stored as if it were complete (the ledger records the failed call with its error status).
+    """
+    started = False
+    try:
+        for delta in stream_complete(client, messages, **kw):
+            started = True
+            yield delta
+    except Exception as e:
+        yield STREAM_INTERRUPTED.format(error=type(e).__name__) if started else fallback()
+
+def llm_messages(client, lang, role, prob, feat_dict, vacancy_row, question=None, corpus_text=None,
+                 retrieved=None, narrative_mode="Auto"):
+    """Chat messages for a narrative (no question) or a grounded Q&A answer; the map-reduce step may call the LLM."""
+    return build_messages(client, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved,
+                          narrative_mode, model=llm_model(),
+                          token_budget=int(st.session_state.get("narrative_token_budget", NARRATIVE_TOKEN_BUDGET)))
+
 def gpt_narrative_and_qa(client, lang, role, prob, feat_dict, vacancy_row,
-                         question=None, corpus_text=None, retrieved=None):
-    if client is None:
+                         question=None, corpus_text=None, retrieved=None, stream=False):
+    """Narrative (no question) or grounded Q&A answer; with stream=True an iterator of text chunks.
+
+    API failures fall back to the offline summary; errors while building the prompt are raised.
+    """
+    if not llm_available(client):
         if lang == "nl":
             base = (f"Profielschets:\n- Voorspelde succeskans: {prob:.0%}\n- Motivatie: {feat_dict['MotivationScore']:.0%}\n"
                     f"- Skills match: {feat_dict['SkillMatch']:.0%}\n- Cultuurfit: {feat_dict['CultureFit']:.0%}\n"
                     f"- Ervaring: {feat_dict['ExperienceYears']} jaar\n- Rol: {role}\n\n")
-            return base + ("(Geen API-sleutel: Q&A/narratief beperkt.)" if question else
+            text = base + ("(Geen API-sleutel: Q&A/narratief beperkt.)" if question else
                            "Narratief (beperkt zonder model).")
-        base = (f"Profile:\n- Predicted success: {prob:.0%}\n- Motivation: {feat_dict['MotivationScore']:.0%}\n"
-                f"- Skill match: {feat_dict['SkillMatch']:.0%}\n- Culture fit: {feat_dict['CultureFit']:.0%}\n"
-                f"- Experience: {feat_dict['ExperienceYears']} years\n- Role: {role}\n\n")
-        return base + ("(No API key: Q&A/narrative limited.)" if question else "Narrative (limited without model).")
-
-    retrieved_text = "\n\n---\n\n".join([c for c,_s in (retrieved or [])]) if retrieved else ""
-    mode = "qa" if (question or "").strip() else "narrative"
-
-    system = (
-        "You are a bilingual recruitment copilot. "
-        "Use only the provided CONTEXT to write your answer. "
-        "If the context is insufficient, say so. Keep tone professional, fair, and specific. "
-        "If 'lang' == 'nl' respond in Dutch; otherwise English."
-    )
-
-    if mode == "narrative":
-        user = {
-            "lang": lang, "task": "narrative", "role": role, "probability": prob,
-            "features": feat_dict, "vacancy": vacancy_row,
-            "instructions": ("Write a 6–10 bullet executive narrative of the candidate based on CONTEXT. "
-                             "Cover: core profile, key achievements, relevant skills vs. vacancy, culture/value alignment, "
-                             "risks/gaps, and recommendation. Ground claims with 'In the CV...' or 'In the letter...' "
-                             "when appropriate."),
-            "CONTEXT": (corpus_text or "")[:150000]
-        }
-    else:
-        user = {
-            "lang": lang, "task": "qa", "role": role, "question": question,
-            "instructions": ("Answer strictly from the retrieved snippets below. "
-                             "If uncertain, say you can't find it. Use concise bullets when helpful."),
-            "RETRIEVED_SNIPPETS": retrieved_text[:150000]
-        }
+        else:
+            base = (f"Profile:\n- Predicted success: {prob:.0%}\n- Motivation: {feat_dict['MotivationScore']:.0%}\n"
+                    f"- Skill match: {feat_dict['SkillMatch']:.0%}\n- Culture fit: {feat_dict['CultureFit']:.0%}\n"
+                    f"- Experience: {feat_dict['ExperienceYears']} years\n- Role: {role}\n\n")
+            text = base + ("(No API key: Q&A/narrative limited.)" if question else "Narrative (limited without model).")
+        return iter([text]) if stream else text
 
+    site = "qa" if (question or "").strip() else "narrative"
     try:
-        out = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role":"system","content":system},{"role":"user","content":json.dumps(user)}],
-            temperature=0.4, max_tokens=700
-        )
-        return out.choices[0].message.content
+        messages = llm_messages(client, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved,
+                                st.session_state.get("narrative_mode", "Auto"))
+    except Exception as e:
+        # A bug, not an outage: surface it instead of passing the offline text off as the answer
+        st.warning(f"Could not build the {site} prompt: {type(e).__name__}: {e}")
+        raise
+    if stream:
+        return _stream_with_fallback(
+            client, messages,
+            lambda: gpt_narrative_and_qa(None, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved),
+            model=llm_model(), temperature=0.4, max_tokens=700, site=site)
+    try:
+        return complete(client, messages, model=llm_model(), temperature=0.4, max_tokens=700, site=site)
     except Exception:
         return gpt_narrative_and_qa(None, lang, role, prob, feat_dict, vacancy_row, question, corpus_text, retrieved)
 
@@ -2944,43 +2781,151 @@ def generate_narrative_for_single_cv(
     cover_letter_text: str = ""
 ):
     """Return dict with filename, narrative, and key metrics for one CV file."""
-    # 1) Extract text for this specific CV
-    cv_text = extract_cv_text(upload_file)
+    # 1) Extract text, build the per-CV corpus (vacancy + this CV + optional cover letter) and features
     fname = getattr(upload_file, "name", "candidate")
+    prep = prepare_cv(fname, upload_bytes(upload_file), role, vac_row, vacancy_txt, cover_letter_text, ocr_options())
+
+    # 2) Make the CV findable in the cross-candidate search
+    index_candidate_cv(prep["cv_text"], fname, role, sector_for_model, prep["features"])
 
-    # 2) Build per-CV corpus (vacancy + this CV + optional cover letter)
-    vacancy_section = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
-    cl_section = f"\n\n### COVER LETTER\n{cover_letter_text}\n" if cover_letter_text else ""
-    corpus_text = basic_clean((vacancy_section + f"\n\n### FILE: {fname}\n{cv_text}" + cl_section).strip())
+    # 3) Probabilities + narrative
+    return narrate_prepared_cv(prep, role, vac_row, lang, sector_for_model, openai_key,
+                               st.session_state.get("blend", 0.4))
 
-    # 3) Features & probabilities
-    feat = build_feature_row(role, corpus_text, vac_row, sector=sector_for_model)
+def score_prepared_cv(prep: dict, role: str, sector_for_model: str, blend: float = 0.4):
+    """Result row (metrics + features, no narrative yet) for one CV prepared by talentlens.features.prepare_cv."""
+    feat = prep["features"]
     base_prob = predict_prob(feat, sector=sector_for_model)
     _w = get_sector_weights(sector_for_model)
-    _blend = st.session_state.get("blend", 0.4)
-    adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
-
-    # 4) Narrative via LLM (or lightweight fallback)
-    client = get_openai_client(openai_key)
-    narrative = gpt_narrative_and_qa(
-        client, lang, role, adj_prob, feat, vac_row,
-        question=None, corpus_text=corpus_text, retrieved=None
-    )
-
-    # 5) Collect outputs
-    out = {
-        "filename": fname,
+    adj_prob = adjust_with_custom_factors(base_prob, feat, _w, blend)
+    return {
+        "filename": prep["filename"],
+        "content_hash": content_hash(prep["cv_text"]),
         "role": role or "-",
         "pred_success_adj": adj_prob,
         "pred_success_model": base_prob,
+        "model_version": model_version,
         "skill_match": float(feat.get("SkillMatch", 0.0)),
         "culture_fit": float(feat.get("CultureFit", 0.0)),
         "motivation": float(feat.get("MotivationScore", 0.0)),
         "experience_years": int(feat.get("ExperienceYears", 0)),
-        "narrative": narrative.strip()
+        "features": feat
     }
+
+def narrate_prepared_cv(prep: dict, role: str, vac_row: dict, lang: str, sector_for_model: str,
+                        openai_key: str, blend: float = 0.4):
+    """LLM stage for one CV prepared by talentlens.features.prepare_cv; runs on batch worker threads."""
+    out = score_prepared_cv(prep, role, sector_for_model, blend)
+
+    # Narrative via LLM (or lightweight fallback)
+    client = get_openai_client(openai_key)
+    narrative = gpt_narrative_and_qa(
+        client, lang, role, out["pred_success_adj"], prep["features"], vac_row,
+        question=None, corpus_text=prep["corpus_text"], retrieved=None
+    )
+    out["narrative"] = narrative.strip()
     return out
 
+# --- Concurrent batch narratives: CPU stage in a process pool, LLM stage on threads ---
+BATCH_LLM_WORKERS = 8
+
+CPU_WORKERS = max(1, min(os.cpu_count() or 1, 4))
+
+@st.cache_resource
+def _cpu_pool():
+    # One long-lived pool per server process: workers keep what they loaded (sentiment pipeline, OCR)
+    # across batches instead of starting cold on every click
+    try:
+        pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    except Exception:
+        pool = ThreadPoolExecutor(max_workers=CPU_WORKERS)
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def cpu_pool():
+    pool = _cpu_pool()
+    if getattr(pool, "_broken", False):      # a crashed worker breaks a ProcessPoolExecutor for good
+        _cpu_pool.clear()
+        pool = _cpu_pool()
+    return pool
+
+def iter_batch_narratives(uploads, role, vac_row, vacancy_txt, lang, sector_for_model, openai_key, cover_letter_text=""):
+    """Yield (input_position, result, error) as each CV finishes, in completion order.
+
+    Extraction + features run in worker processes; as soon as a CV is prepared its narrative is
+    requested on a thread pool (LLM calls share the process-wide rate limiter in talentlens.llm).
+    """
+    jobs = [(getattr(up, "name", f"cv_{i}"), upload_bytes(up)) for i, up in enumerate(uploads)]
+    ocr, blend = ocr_options(), st.session_state.get("blend", 0.4)
+    get_sector_weights(sector_for_model)      # initialise session weights before worker threads read them
+    ctx = get_script_run_ctx()
+    cpu = cpu_pool()
+    with ThreadPoolExecutor(
+            max_workers=BATCH_LLM_WORKERS,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as llm:
+        position = {cpu.submit(prepare_cv, name, data, role, vac_row, vacancy_txt, cover_letter_text, ocr): i
+                    for i, (name, data) in enumerate(jobs)}
+        stage = dict.fromkeys(position, "cpu")
+        pending = set(position)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = position[fut]
+                    try:
+                        res = fut.result()
+                    except Exception as e:
+                        yield i, None, e
+                        continue
+                    if stage[fut] == "cpu":
+                        index_candidate_cv(res["cv_text"], res["filename"], role, sector_for_model, res["features"])
+                        nxt = llm.submit(narrate_prepared_cv, res, role, vac_row, lang, sector_for_model, openai_key, blend)
+                        position[nxt], stage[nxt] = i, "llm"
+                        pending.add(nxt)
+                    else:
+                        yield i, res, None
+        finally:
+            for fut in pending:
+                fut.cancel()        # the run was stopped: drop queued CVs from the shared pool
+
+# --- Offline narrative jobs for large campaigns (talentlens/batch.py) ---
+def submit_narrative_job(uploads, role, vac_row, vacancy_txt, lang, sector_for_model, openai_key,
+                         cover_letter_text="", on_progress=None):
+    """Prepare every CV in worker processes, write one narrative request per CV to a JSONL job file and
+    submit it to the batch endpoint. Returns (job, [(filename, error)]) for CVs that could not be prepared.
+
+    Job requests always use single-pass prompts; map-reduce would need LLM calls before the job is written.
+    """
+    client = get_openai_client(openai_key)
+    if client is None:
+        raise RuntimeError("An OpenAI API key is needed to submit a batch job.")
+    jobs = [(getattr(up, "name", f"cv_{i}"), upload_bytes(up)) for i, up in enumerate(uploads)]
+    ocr, blend = ocr_options(), st.session_state.get("blend", 0.4)
+    items, failed = [], []
+    cpu = cpu_pool()
+    futures = [cpu.submit(prepare_cv, name, data, role, vac_row, vacancy_txt, cover_letter_text, ocr)
+               for name, data in jobs]
+    for i, fut in enumerate(futures):
+        try:
+            prep = fut.result()
+        except Exception as e:
+            failed.append((jobs[i][0], e))
+            continue
+        index_candidate_cv(prep["cv_text"], prep["filename"], role, sector_for_model, prep["features"])
+        row = score_prepared_cv(prep, role, sector_for_model, blend)
+        messages = llm_messages(None, lang, role, row["pred_success_adj"], prep["features"], vac_row,
+                                corpus_text=prep["corpus_text"], narrative_mode="Single pass")
+        items.append(BatchItem(f"{i:05d}-{row['content_hash'][:12]}", row["filename"], row["content_hash"],
+                               messages, row))
+        if on_progress is not None:
+            on_progress(i + 1, len(jobs))
+    if not items:
+        raise RuntimeError("None of the CVs could be prepared.")
+    job = BatchJob.create(items, llm_model(), temperature=0.4, max_tokens=700,
+                          label=f"{role or '-'} · {len(items)} CVs")
+    job.submit(client)
+    return job, failed
+
 # --- Custom Factors ---
 def get_sector_weights(sector: str):
     defaults = {"ExperienceYears":0.6,"SkillMatch":1.4,"CultureFit":1.2,"MotivationScore":1.0,"SentimentScore":0.8,"EmotionPos":0.6,"EmotionNeg":0.4}
@@ -3049,11 +2994,7 @@ with st.sidebar:
     st.session_state["ocr_pages"] = st.slider("OCR pages (first N)", 1, 15, st.session_state.get("ocr_pages", 5), 1)
     st.session_state["poppler_dir"] = st.text_input("Poppler bin path (optional)", value=st.session_state.get("poppler_dir", os.getenv("POPPLER_PATH","")))
     tess_cmd = st.text_input("Tesseract exe path (optional)", value=os.getenv("TESSERACT_CMD",""))
-    try:
-        if tess_cmd:
-            pytesseract.pytesseract.tesseract_cmd = tess_cmd
-    except Exception:
-        pass
+    st.session_state["tesseract_cmd"] = tess_cmd          # applied by talentlens.extract via OcrOptions
     st.caption(f"OCR available: {'Yes' if OCR_AVAILABLE else 'No'}")
 
     st.session_state["ocr_lang_label"] = st.selectbox(
@@ -3087,24 +3028,20 @@ with st.sidebar:
         try: return file.read().decode("utf-8", errors="ignore")
         except Exception: return ""
 
-    def _classify_vacancy_text(vtext: str):
-        if not vtext: return None, None, 0.0
-        all_vacs = []
-        for sec, vacs in SECTORS.items():
-            for v in vacs:
-                sig = " ".join([v["JobTitle"], " ".join(v.get("RequiredSkills", [])), " ".join(v.get("ValueWords", []))])
-                all_vacs.append({"Sector": sec, "JobTitle": v["JobTitle"], "Text": sig})
-        df_all = pd.DataFrame(all_vacs)
-        tfidf = TfidfVectorizer(stop_words="english")
-        X = tfidf.fit_transform(df_all["Text"])
-        qv = tfidf.transform([vtext])
-        sims = cosine_similarity(qv, X).ravel()
-        best_idx = int(np.argmax(sims))
-        return df_all.iloc[best_idx]["Sector"], df_all.iloc[best_idx]["JobTitle"], float(sims[best_idx])
+    @st.cache_resource(max_entries=4)
+    def get_vacancy_matcher(version: int):
+        # TF-IDF over one catalog version, fitted once and shared by every session on that version
+        return VacancyMatcher.from_store(catalog, version)
+
+    def _classify_vacancy_text(vtext: str, top_k: int = 3):
+        """Top-k catalog matches (sector, job_title, score) for a vacancy text, best first."""
+        if not vtext: return []
+        return get_vacancy_matcher(current_catalog_version()).match(vtext, top_k)
 
     _vac_text = _extract_vacancy_text(vac_file) if vac_file is not None else (vac_text_paste.strip() if vac_text_paste else "")
     if _vac_text:
-        best_sector, best_role, score = _classify_vacancy_text(_vac_text)
+        _vac_matches = _classify_vacancy_text(_vac_text)
+        best_sector, best_role, score = _vac_matches[0] if _vac_matches else (None, None, 0.0)
         if best_sector and best_role:
             changed = (
                 st.session_state.get("sector", default_sector()) != best_sector or
@@ -3112,13 +3049,15 @@ with st.sidebar:
             )
             st.session_state["auto_vac_text"] = _vac_text
             st.session_state["auto_vac_score"] = score
+            st.session_state["auto_vac_matches"] = [m._asdict() for m in _vac_matches]
             if changed:
                 st.session_state["sector"] = best_sector
                 st.session_state["vacancy_select"] = best_role
                 st.toast(f"Vacancy matched → Sector: {best_sector} · Role: {best_role}", icon="✅")
                 st.rerun()
             else:
-                st.caption(f"Detected sector: {best_sector} · role: {best_role} · similarity {score:.3f}")
+                st.caption(f"Detected sector: {best_sector} · role: {best_role} · similarity {score:.3f}"
+                           + "".join(f" · alt: {m.job_title} ({m.sector}) {m.score:.3f}" for m in _vac_matches[1:] if m.score > 0))
         else:
             st.warning("Could not confidently classify the vacancy. You can still select sector/role manually.")
     else:
@@ -3126,16 +3065,16 @@ with st.sidebar:
     # --------------------------------------------------------------------
 
     # ---------- 2) SELECTORS (widget keys are canonical; no manual post-assignments) ----------
-    sector_opts = list(SECTORS.keys())
+    sector_opts = catalog.sectors(current_catalog_version())
     sector_default = st.session_state.get("sector", default_sector())
     st.selectbox(
         t("select_sector", lang),
         sector_opts,
-        index=sector_opts.index(sector_default) if sector_default in sector_opts else sector_opts.index(default_sector()),
+        index=sector_opts.index(sector_default) if sector_default in sector_opts else (sector_opts.index(default_sector()) if default_sector() in sector_opts else 0),
         key="sector"   # widget manages st.session_state["sector"]
     )
 
-    vac_options_for_sidebar = [v["JobTitle"] for v in SECTORS[st.session_state["sector"]]]
+    vac_options_for_sidebar = catalog.job_titles(st.session_state["sector"], current_catalog_version())
     vac_default = st.session_state.get("vacancy_select", (vac_options_for_sidebar[0] if vac_options_for_sidebar else None))
     st.selectbox(
         t("select_vac", lang),
@@ -3144,72 +3083,50 @@ with st.sidebar:
         key="vacancy_select"   # widget manages st.session_state["vacancy_select"]
     )
 
-    # Optional vacancy CSV to swap catalog entries per sector
+    # Optional vacancy CSV to swap catalog entries per sector — imported once as its own catalog version
     vac_upload = st.file_uploader(t("or_upload_vac", lang), type=["csv"])
+    _upload_version = import_vacancy_csv(vac_upload, st.session_state["sector"]) if vac_upload is not None else 0
+    if _upload_version != st.session_state.get("catalog_version", 0):
+        st.session_state["catalog_version"] = _upload_version
+        st.rerun()
 
 def get_current_sector(): return st.session_state.get("sector", default_sector())
 
 # --- Synthetic dataset & model ---
 @st.cache_data
 def make_data(n=1000, seed=13):
-    rng = np.random.default_rng(seed)
-    edu = rng.choice(["MBO","HBO","WO"], size=n, p=[0.35,0.45,0.20])
-    yrs = rng.integers(0, 16, size=n)
-    mot = np.clip(rng.normal(0.68,0.15,size=n),0,1)
-    skill = np.clip(rng.normal(0.72,0.12,size=n),0.2,1)
-    fit = np.clip(rng.normal(0.66,0.18,size=n),0,1)
-    sent = np.clip(rng.normal(0.65,0.2,size=n),0,1)
-    emo_pos = np.clip(sent + rng.normal(0,0.1,size=n), 0, 1)
-    emo_neg = np.clip(1 - sent + rng.normal(0,0.1,size=n), 0, 1)
-    gender = rng.choice(["F","M","X"], size=n, p=[0.48,0.48,0.04])
-    sector = rng.choice(list(SECTORS.keys()), size=n)
-    logit = -1.1 + 0.06*yrs + 0.9*mot + 1.2*skill + 0.9*fit + 0.4*sent + np.where(edu=="WO",0.25,np.where(edu=="HBO",0.15,0)) + rng.normal(0,0.55,size=n)
-    prob = 1/(1+np.exp(-logit))
-    hired = (prob>0.6).astype(int)
-    ret = (1/(1+np.exp(-0.5 + 0.04*yrs + 1.0*fit + 0.6*mot + rng.normal(0,0.5,size=n)))>0.55).astype(int)
-    df = pd.DataFrame({
-        "Sector":sector,"EducationLevel":edu,"ExperienceYears":yrs,"MotivationScore":mot,"SkillMatch":skill,"CultureFit":fit,
-        "SentimentScore":sent,"EmotionPos":emo_pos,"EmotionNeg":emo_neg,"Gender":gender,"Hired":hired,"Retained12m":ret
-    })
-    return df
+    # Chunked, compact-dtype generator (see talentlens/synthetic.py); small n runs inline
+    return generate_dataset(n, seed=seed, sectors=catalog.sectors(), n_jobs=1 if n <= DEFAULT_CHUNK_SIZE else -1)
 
 df = make_data()
 
 @st.cache_resource
-def train_model(df: pd.DataFrame):
-    base = df.drop(columns=[c for c in ["Retained12m","Gender"] if c in df.columns])
-    work = pd.get_dummies(base, columns=[c for c in ["EducationLevel","Sector"] if c in base.columns], drop_first=True)
-    X, y = work.drop(columns=["Hired"]), work["Hired"]
-    Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
-    model = GradientBoostingClassifier(random_state=42).fit(Xtr, ytr)
-    prob = model.predict_proba(Xte)[:,1]; pred = (prob>0.5).astype(int)
-    metrics = {"f1": float(f1_score(yte, pred)), "auc": float(roc_auc_score(yte, prob))}
-    return model, X.columns.tolist(), metrics
+def train_model(n: int = 1000, seed: int = 13):
+    # Keyed on (n, seed) instead of hashing the whole DataFrame on every rerun
+    return fit_model(make_data(n, seed))
 
-model, feature_cols, metrics = train_model(df)
+@st.cache_resource
+def get_model_registry():
+    # Process-wide: every session reads the live version; retrains swap it atomically
+    registry = ModelRegistry()
+    registry.register(*train_model(), source="make_data(n=1000, seed=13)", data=make_data())
+    return registry
 
+# Snapshot once per script run: this session keeps its version until the next rerun
+model_registry = get_model_registry()
+live_model = model_registry.current()
+model, feature_cols, metrics = live_model.model, live_model.feature_cols, live_model.metrics
+model_version = live_model.version
 
 
-# --- Vacancy CSV (optional, per selected sector) ---
-def get_vac_df(vac_upload_file, sector=None):
-    default_df = pd.DataFrame(SECTORS.get(sector or default_sector(), []))
-    if vac_upload_file is None: return default_df.copy()
-    try:
-        dfv = pd.read_csv(vac_upload_file)
-        def split_or(v): return [x.strip() for x in v.split(",") if x.strip()] if isinstance(v,str) else []
-        cols = {c.lower(): c for c in dfv.columns}
-        mapping = {"jobtitle":"JobTitle","requiredskills":"RequiredSkills","valuewords":"ValueWords","expmin":"ExpMin","expmax":"ExpMax"}
-        for low, proper in mapping.items():
-            if low in cols: dfv.rename(columns={cols[low]: proper}, inplace=True)
-        dfv["RequiredSkills"] = dfv["RequiredSkills"].apply(split_or)
-        dfv["ValueWords"] = dfv["ValueWords"].apply(split_or)
-        return dfv
-    except Exception:
-        st.warning("Could not read vacancy CSV; using sector defaults.")
-        return default_df.copy()
+
+# --- Vacancies of the selected sector (one indexed query per sector and catalog version) ---
+def get_vac_df(sector=None, version=None):
+    return pd.DataFrame(catalog.vacancies(sector or default_sector(), version or current_catalog_version()),
+                        columns=["JobTitle", "RequiredSkills", "ValueWords", "ExpMin", "ExpMax"])
 
 current_sector = get_current_sector()
-vac_df = get_vac_df(vac_upload, current_sector)
+vac_df = get_vac_df(current_sector)
 
 # ---------------- TABS ----------------
 tabs = [
@@ -3225,9 +3142,6 @@ tabs = [
 ]
 section = st.tabs(tabs)
 
-current_sector = get_current_sector()
-vac_df = get_vac_df(vac_upload, current_sector)
-
 # ===== DASHBOARD =====
 with section[0]:
     st.title(t("title_dashboard", lang))
@@ -3283,9 +3197,11 @@ with section[0]:
     st.markdown("</div>", unsafe_allow_html=True)
 
     with st.expander("Model metrics"):
-        m1,m2 = st.columns(2)
+        m1,m2,m3 = st.columns(3)
         m1.metric("F1", f"{metrics['f1']:.3f}")
         m2.metric("ROC AUC", f"{metrics['auc']:.3f}")
+        m3.metric("Model version", model_version)
+        st.caption(f"Trained {live_model.trained_at} · {live_model.source}")
 
     # Candidate card (after Chat analysis)
     if 'last_features' in st.session_state:
@@ -3294,6 +3210,8 @@ with section[0]:
         p_adj = adjust_with_custom_factors(p, lf, _w, _blend)
 
         st.markdown(f"### Candidate: **{st.session_state.get('last_candidate_name','Candidate')}**  ·  Role: **{st.session_state.get('last_role','-')}**  ·  File: _{st.session_state.get('last_cv_filename','')}_")
+        scored_by = st.session_state.get('last_model_version', model_version)
+        st.caption(f"Scored by model {scored_by}" + ("" if scored_by == model_version else f" · live model is now {model_version} (re-run the analysis to rescore)"))
 
         k1,k2,k3,k4,k5 = st.columns(5)
         k1.metric("Predicted Success", f"{p_adj*100:.1f}%")
@@ -3326,9 +3244,10 @@ with section[0]:
 with section[1]:
     st.title(t("title_chat", lang))
 
-    # Conversation store
+    # Conversation store (restored from disk on a fresh session)
+    thread_store = get_thread_store()
     if "threads" not in st.session_state:
-        st.session_state.threads = {}
+        st.session_state.threads = thread_store.load_threads()
     if "current_thread" not in st.session_state:
         st.session_state.current_thread = None
 
@@ -3358,10 +3277,10 @@ with section[1]:
             cl_combined = basic_clean(cl_text_area)
 
         vacancy_txt = st.session_state.get("auto_vac_text", "")
-        vacancy_section = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
+        vacancy_block = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
 
         current_corpus = basic_clean((
-            vacancy_section +
+            vacancy_block +
             (cv_combined or "") +
             (("\n\n### COVER LETTER\n" + cl_combined) if cl_combined else "")
         ).strip())
@@ -3394,6 +3313,7 @@ with section[1]:
                 "vacancy_text": ""
             }
             st.session_state.current_thread = tid
+            thread_store.save_thread(tid, st.session_state.threads[tid])
 
         threads = st.session_state.threads
         active_ids = [tid for tid, meta in threads.items() if not meta.get("archived")]
@@ -3415,6 +3335,8 @@ with section[1]:
         )
         st.session_state.current_thread = current_choice
         current_meta = threads[current_choice]
+        _idx_bytes = thread_store.index_size(current_choice)
+        st.caption(f"Stored retrieval index: {_idx_bytes/1024:.1f} KB" if _idx_bytes else "No stored retrieval index yet.")
 
         # New conversation form
         with st.form("new_thread_form", clear_on_submit=True):
@@ -3435,31 +3357,42 @@ with section[1]:
             }
             st.session_state.current_thread = tid
             current_meta = threads[tid]
+            thread_store.save_thread(tid, current_meta)
 
         # Buttons
         cA, cB, cC = st.columns(3)
         with cA:
             if st.button("Attach current files to thread"):
                 current_meta["corpus"] = current_corpus
-                current_meta["index"] = build_index(current_corpus) if current_corpus else None
+                # Incremental: only sections (files) not yet in the thread index are vectorised
+                _idx = current_meta.get("index") or thread_store.load_index(current_choice) or IncrementalIndex()
+                _delta = _idx.sync_corpus(current_corpus)
+                current_meta["index"] = _idx if len(_idx) else None
+                st.caption(f"Index: +{_delta['added_chunks']} chunks, {_delta['removed_sections']} sections removed.")
                 current_meta["role"] = role
                 current_meta["vac_row"] = (vac_df[vac_df["JobTitle"] == role].iloc[0].to_dict()
                                            if (role and not vac_df.empty) else {})
                 current_meta["display_name"] = cv_display or (cv_names[0] if cv_names else "")
                 current_meta["vacancy_text"] = vacancy_txt
+                thread_store.save_thread(current_choice, current_meta)
+                thread_store.save_index(current_choice, current_meta["index"])
+                index_corpus_cvs(current_corpus, cv_names, role, current_sector)
                 st.success("Files (incl. vacancy context) attached.")
         with cB:
             if not current_meta.get("archived"):
                 if st.button("Archive"):
                     current_meta["archived"] = True
+                    thread_store.save_thread(current_choice, current_meta)
                     st.success("Conversation archived.")
             else:
                 if st.button("Unarchive"):
                     current_meta["archived"] = False
+                    thread_store.save_thread(current_choice, current_meta)
                     st.success("Conversation unarchived.")
         with cC:
             if st.button("Delete"):
                 threads.pop(current_choice, None)
+                thread_store.delete(current_choice)
                 remaining = [tid for tid, meta in threads.items() if not meta.get("archived")]
                 st.session_state.current_thread = remaining[0] if remaining else None
                 st.info("Conversation deleted.")
@@ -3483,7 +3416,10 @@ with section[1]:
             vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
                                                       if (chosen_role and not vac_df.empty) else {})
             corpus_text = current_meta.get("corpus", current_corpus)
-            idx = current_meta.get("index") or (build_index(corpus_text) if corpus_text else None)
+            idx = current_meta.get("index") or thread_store.load_index(current_choice)
+            if idx is None and corpus_text:
+                idx = build_index(corpus_text)
+                thread_store.save_index(current_choice, idx)
             current_meta["index"] = idx
 
             # Feature engineering
@@ -3497,21 +3433,29 @@ with section[1]:
             adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
             acc = acceptance_probability(adj_prob, feat)
 
-            top_chunks = retrieve(prompt, idx, top_k=8) if (prompt and idx) else []
+            # Best evidence first, overlaps merged, weak matches dropped, within the Q&A token budget
+            packed = pack_context(idx, prompt, budget=int(st.session_state.get("qa_token_budget", QA_TOKEN_BUDGET)),
+                                  min_score=float(st.session_state.get("min_snippet_score", MIN_SNIPPET_SCORE)))
+            top_chunks = packed.snippets
             client = get_openai_client(openai_key)
-            answer = gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
-                                          question=prompt, corpus_text=corpus_text, retrieved=top_chunks)
-
-            reply = (f"{answer}\n\n---\n**{t('pred_prob', lang)}:** {adj_prob:.0%} "
-                     f"(model: {base_prob:.0%}) · **Acceptance (est.)**: {acc:.0%}\n"
-                     f"- {t('motivation', lang)}: {feat['MotivationScore']:.0%}\n"
-                     f"- {t('skillmatch', lang)}: {feat['SkillMatch']:.0%}\n"
-                     f"- {t('culturefit', lang)}: {feat['CultureFit']:.0%}\n"
-                     f"- {t('sentiment', lang)}: {feat['SentimentScore']:.0%}\n"
-                     f"- {t('exp_years', lang)}: {feat['ExperienceYears']}\n")
+            score_block = (f"**{t('pred_prob', lang)}:** {adj_prob:.0%} "
+                           f"(model {model_version}: {base_prob:.0%}) · **Acceptance (est.)**: {acc:.0%}\n"
+                           f"- {t('motivation', lang)}: {feat['MotivationScore']:.0%}\n"
+                           f"- {t('skillmatch', lang)}: {feat['SkillMatch']:.0%}\n"
+                           f"- {t('culturefit', lang)}: {feat['CultureFit']:.0%}\n"
+                           f"- {t('sentiment', lang)}: {feat['SentimentScore']:.0%}\n"
+                           f"- {t('exp_years', lang)}: {feat['ExperienceYears']}\n")
 
             with st.chat_message("assistant"):
-                st.markdown(reply)
+                # Tokens render as they arrive; write_stream hands back the assembled answer
+                answer = st.write_stream(gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
+                                                              question=prompt, corpus_text=corpus_text,
+                                                              retrieved=top_chunks, stream=True))
+                answer = answer if isinstance(answer, str) else "".join(map(str, answer))
+                st.markdown("---\n" + score_block)
+                st.caption(f"Context: {packed.tokens} tokens from {len(top_chunks)} snippet(s) · "
+                           f"{packed.dropped} of {packed.candidates} retrieved chunks left out")
+            reply = f"{answer}\n\n---\n{score_block}"
             current_meta["messages"].append(("assistant", reply))
 
             # ---- SYNC NARRATIVE TO ASSESSMENT ----
@@ -3519,12 +3463,14 @@ with section[1]:
             narrative_clean = re.sub(r"(\n\s*){2,}", "\n\n", answer.strip())
             st.session_state.setdefault("ai_narratives", {})[candidate_id] = narrative_clean
             current_meta["narrative"] = narrative_clean
+            thread_store.save_thread(current_choice, current_meta)
             st.info(f"✅ Narrative synced to Assessment for {candidate_id}.")
 
             # Update dashboard
             st.session_state['last_candidate_name'] = corpus_text.splitlines()[0].strip()[:60] if corpus_text else "Candidate"
             st.session_state['last_features'] = feat
             st.session_state['last_probability'] = base_prob
+            st.session_state['last_model_version'] = model_version
             st.session_state['last_role'] = chosen_role
             st.session_state['last_sector'] = current_sector
             st.session_state['last_cv_filename'] = current_meta.get("display_name", "")
@@ -3542,16 +3488,18 @@ with section[1]:
             _blend = st.session_state.get('blend', 0.4)
             adj_prob = adjust_with_custom_factors(base_prob, feat, _w, _blend)
             client = get_openai_client(openai_key)
-            narrative = gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
-                                             question=None, corpus_text=corpus_text, retrieved=None)
             with st.chat_message("assistant"):
-                st.markdown(narrative)
+                narrative = st.write_stream(gpt_narrative_and_qa(client, lang, chosen_role, adj_prob, feat, vac_row,
+                                                                 question=None, corpus_text=corpus_text,
+                                                                 retrieved=None, stream=True))
+                narrative = narrative if isinstance(narrative, str) else "".join(map(str, narrative))
             current_meta.setdefault("messages", []).append(("assistant", narrative))
             # ---- SYNC ----
             candidate_id = current_meta.get("display_name") or (cv_names[0] if cv_names else "Candidate")
             narrative_clean = re.sub(r"(\n\s*){2,}", "\n\n", narrative.strip())
             st.session_state.setdefault("ai_narratives", {})[candidate_id] = narrative_clean
             current_meta["narrative"] = narrative_clean
+            thread_store.save_thread(current_choice, current_meta)
             st.success(f"✅ Narrative stored and synced for {candidate_id}.")
 
         # ----- BATCH NARRATIVES -----
@@ -3568,26 +3516,119 @@ with section[1]:
                 vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
                                                           if (chosen_role and not vac_df.empty) else {})
                 cover_text_for_all = basic_clean(cl_text_area) if cl_text_area else ""
-                for up in cv_files:
+                # Results stream in as they finish; the stored list (and CSV) keeps upload order
+                slots = [None] * len(cv_files)
+                batch_progress = st.progress(0.0, text=f"0 / {len(cv_files)} CVs")
+                live_box, finished = st.empty(), []
+                for n_done, (i, res, err) in enumerate(iter_batch_narratives(
+                        cv_files, chosen_role, vac_row, vacancy_txt, lang, current_sector, openai_key,
+                        cover_text_for_all), start=1):
+                    batch_progress.progress(n_done / len(cv_files), text=f"{n_done} / {len(cv_files)} CVs")
+                    if err is not None:
+                        st.error(f"Error processing {getattr(cv_files[i], 'name', 'file')}: {err}")
+                        continue
+                    slots[i] = res
+                    finished.append(res)
+                    with live_box.container():
+                        for _r in finished:
+                            with st.expander(f"📄 {_r['filename']} · Success {_r['pred_success_adj']*100:.1f}%"):
+                                st.markdown(_r["narrative"])
+                results = [r for r in slots if r is not None]
+                batch_progress.empty()
+                live_box.empty()
+
+                # One vectorised shap_values call for the whole batch; values are stored per result
+                if results:
                     try:
-                        res = generate_narrative_for_single_cv(upload_file=up, role=chosen_role,
-                            vac_row=vac_row, vacancy_txt=vacancy_txt, lang=lang,
-                            sector_for_model=current_sector, openai_key=openai_key,
-                            cover_letter_text=cover_text_for_all)
-                        results.append(res)
-                        with st.expander(f"📄 {res['filename']} · Success {res['pred_success_adj']*100:.1f}%"):
-                            st.markdown(res["narrative"])
+                        X_batch = pd.concat([feature_frame(r["features"], feature_cols, current_sector) for r in results],
+                                            ignore_index=True)
+                        sv_batch, base_batch = explain_matrix(live_model, X_batch)
+                        for r, vals, data_row in zip(results, sv_batch, X_batch.to_numpy()):
+                            r["shap"] = {"values": vals.tolist(), "base": base_batch,
+                                         "data": data_row.tolist(), "features": list(feature_cols)}
                     except Exception as e:
-                        st.error(f"Error processing {getattr(up, 'name', 'file')}: {e}")
-
-                if results:
-                    df_batch = pd.DataFrame(results)
-                    st.download_button("Download batch narratives as CSV",
-                                       data=df_batch.to_csv(index=False).encode("utf-8"),
-                                       file_name="batch_narratives.csv",
-                                       mime="text/csv")
+                        st.caption(f"Batch SHAP unavailable: {e}")
+                    st.session_state["batch_results"] = results
                     st.success(f"Generated {len(results)} narratives.")
 
+        with st.expander("🗂️ Offline batch job (large campaigns)"):
+            st.caption("Writes one narrative request per uploaded CV to a JSONL job file and submits it to the batch "
+                       "endpoint (results within 24h). Finished jobs are merged into the results below by filename "
+                       "and CV content hash.")
+            if st.button("Submit offline batch job", key="batch_job_submit"):
+                if not cv_files:
+                    st.warning("Please upload one or more CV files first.")
+                else:
+                    chosen_role = current_meta.get("role") or role
+                    vac_row = current_meta.get("vac_row") or (vac_df[vac_df["JobTitle"] == chosen_role].iloc[0].to_dict()
+                                                              if (chosen_role and not vac_df.empty) else {})
+                    job_progress = st.progress(0.0, text="Preparing CVs…")
+                    try:
+                        job, failed = submit_narrative_job(
+                            cv_files, chosen_role, vac_row, st.session_state.get("auto_vac_text", ""), lang,
+                            current_sector, openai_key, basic_clean(cl_text_area) if cl_text_area else "",
+                            on_progress=lambda n, total: job_progress.progress(n / total, text=f"{n} / {total} CVs prepared"))
+                        st.success(f"Submitted job {job.id} ({len(job.manifest['items'])} CVs).")
+                        for name, err in failed:
+                            st.error(f"Error processing {name}: {err}")
+                    except Exception as e:
+                        st.error(f"Batch job not submitted: {e}")
+                    job_progress.empty()
+            for job in list_jobs()[:10]:
+                counts = job.manifest["request_counts"]
+                jc1, jc2 = st.columns([3, 1])
+                jc1.markdown(f"**{job.id}** · {job.manifest.get('label', '')} · `{job.status}` · "
+                             f"{counts['completed']}/{counts['total']} done")
+                if jc2.button("Refresh / merge", key=f"batch_job_refresh_{job.id}"):
+                    try:
+                        client = get_openai_client(openai_key)
+                        if client is not None:
+                            job.refresh(client)
+                        rows = job.fetch(client) if client is not None else job.results()
+                        if rows:
+                            st.session_state["batch_results"] = merge_results(
+                                st.session_state.get("batch_results", []), rows)
+                            st.success(f"Merged {len(rows)} narratives from {job.id}.")
+                        else:
+                            st.info(f"Job {job.id} is {job.status}.")
+                    except Exception as e:
+                        st.error(f"Could not refresh {job.id}: {e}")
+
+        batch_results = st.session_state.get("batch_results", [])
+        if batch_results:
+            for res in batch_results:
+                with st.expander(f"📄 {res['filename']} · Success {res['pred_success_adj']*100:.1f}% · model {res['model_version']}"):
+                    st.markdown(res["narrative"])
+                    if res.get("shap"):
+                        _sh = res["shap"]
+                        st.plotly_chart(waterfall_figure(_sh["values"], _sh["base"], _sh["data"], _sh["features"]),
+                                        use_container_width=True)
+
+            # Export: one row per CV, SHAP values flattened into shap_<feature> columns
+            export_rows = []
+            for res in batch_results:
+                row_out = {k: v for k, v in res.items() if k not in ("features", "shap")}
+                if res.get("shap"):
+                    row_out["shap_base"] = res["shap"]["base"]
+                    row_out.update({f"shap_{f}": v for f, v in zip(res["shap"]["features"], res["shap"]["values"])})
+                export_rows.append(row_out)
+            df_batch = pd.DataFrame(export_rows)
+            d1, d2 = st.columns(2)
+            with d1:
+                st.download_button("Download batch narratives as CSV",
+                                   data=df_batch.to_csv(index=False).encode("utf-8"),
+                                   file_name="batch_narratives.csv",
+                                   mime="text/csv")
+            with d2:
+                try:
+                    _pq = io.BytesIO()
+                    df_batch.to_parquet(_pq, index=False)
+                    st.download_button("Download as Parquet", data=_pq.getvalue(),
+                                       file_name="batch_narratives.parquet",
+                                       mime="application/octet-stream")
+                except Exception:
+                    st.caption("Parquet export needs pyarrow.")
+
         # ----- WHAT-IF + SHAP EXPLAINABILITY -----
         st.markdown("---")
         cols = st.columns([1, 1])
@@ -3612,27 +3653,10 @@ with section[1]:
             st.subheader(t("shap_title", lang))
             try:
                 if 'last_features' in st.session_state:
-                    row = pd.DataFrame([st.session_state['last_features']])
-                    for c in feature_cols:
-                        if c.startswith("Sector_"):
-                            row[c] = 0
-                    sec_col = f"Sector_{current_sector}"
-                    if sec_col in feature_cols:
-                        row[sec_col] = 1
-                    for c in feature_cols:
-                        if c not in row.columns:
-                            row[c] = 0
-                    row = row[feature_cols]
-                    explainer = shap.TreeExplainer(model)
-                    sv = explainer.shap_values(row)
-                    fig = plt.figure()
-                    shap.waterfall_plot(
-                        shap.Explanation(values=sv[0], base_values=explainer.expected_value,
-                                         data=row.iloc[0].values, feature_names=row.columns.tolist()),
-                        show=False
-                    )
-                    st.pyplot(fig, clear_figure=True)
-                    plt.close(fig)
+                    row = feature_frame(st.session_state['last_features'], feature_cols, current_sector)
+                    # Cached per (model version, feature vector): What-if slider reruns reuse the figure
+                    _sv, _base, fig = explain_and_plot(live_model, row)
+                    st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.caption("Upload a CV to view per-candidate SHAP.")
             except Exception:
@@ -3656,6 +3680,43 @@ with section[2]:
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.dataframe(df.sample(25), use_container_width=True)
+
+    # ---- Global SHAP (precomputed when the model version was registered) ----
+    shap_summary = load_shap_summary(live_model)
+    st.markdown(f"#### Global explainability · model {model_version}")
+    if shap_summary is None:
+        st.caption(f"SHAP summary for {model_version} is still being computed — refresh in a moment.")
+    else:
+        st.plotly_chart(beeswarm_figure(shap_summary), use_container_width=True)
+        dep_feature = st.selectbox("Dependence plot feature", list(shap_summary["features"]), key="shap_dep_feature")
+        st.plotly_chart(dependence_figure(shap_summary, dep_feature), use_container_width=True)
+
+    # ---- Candidate search across every processed CV (batch runs + attached thread files) ----
+    st.markdown("#### Candidate search")
+    cand_index = get_candidate_index()
+    if cand_index is None:
+        st.caption("Candidate search needs SQLite with the FTS5 extension.")
+    else:
+        facets = cand_index.facets()
+        cand_q = st.text_input("Search all processed CVs", key="cand_search_q",
+                               placeholder="e.g. Airflow Dutch master")
+        cs1, cs2, cs3, cs4 = st.columns([2, 2, 2, 1])
+        with cs1: f_sector = st.multiselect("Sector", facets["sector"], key="cand_search_sector")
+        with cs2: f_role = st.multiselect("Role", facets["role"], key="cand_search_role")
+        with cs3: f_band = st.multiselect("Experience (years)", facets["experience_band"], key="cand_search_band")
+        with cs4: f_all = st.checkbox("All terms", value=True, key="cand_search_all")
+        if cand_q.strip():
+            _t0 = pd.Timestamp.now()
+            hits = cand_index.search(cand_q, sector=f_sector, role=f_role, experience_band=f_band,
+                                     match_all=f_all, limit=25)
+            _ms = (pd.Timestamp.now() - _t0).total_seconds() * 1000
+            st.caption(f"{len(hits)} match(es) among {len(cand_index)} indexed CVs · {_ms:.0f} ms")
+            for h in hits:
+                st.markdown(f"**{h.filename}** · {h.sector or '-'} · {h.role or '-'} · "
+                            f"{h.experience_years} yrs · score {h.score:.2f}  \n> {h.snippet}")
+        else:
+            st.caption(f"{len(cand_index)} CVs indexed. CVs are added when batch narratives run or files are attached to a thread.")
+
     if 'last_features' in st.session_state:
         st.markdown(f"#### Candidate Insights: **{st.session_state.get('last_candidate_name','Candidate')}**  ·  Role: **{st.session_state.get('last_role','-')}**")
         _pd = pd.DataFrame([st.session_state['last_features']])
@@ -3668,7 +3729,6 @@ with section[3]:
     import io
     import plotly.graph_objects as go
     import numpy as np
-    from openai import OpenAI
 
     # ---------- THEME ----------
     PRIMARY_BG, ACCENT, TEXT = "#0B1A33", "#FFD700", "#FFFFFF"
@@ -3739,67 +3799,33 @@ with section[3]:
         role = st.session_state.get("vacancy_select", "Data Analyst")
         openai_key = st.session_state.get("openai_key", os.getenv("OPENAI_API_KEY", ""))
 
-        # ---------- AI QUESTION GENERATOR ----------
-        def generate_ai_questions(vac_text, role_name, lang="en", api_key=None):
-            """Semantic recruiter-grade AI question generator."""
+        # ---------- AI QUESTION BANK (talentlens/questions.py) ----------
+        bank = question_bank()
+
+        def generate_ai_questions(vac_text, role_name, lang="en", api_key=None, fresh=False):
+            """Semantic recruiter-grade AI question generator; successful sets are stored in the bank."""
             try:
-                if not api_key:
-                    raise ValueError("No OpenAI key.")
-                client = OpenAI(api_key=api_key)
-                prompt = f"""
-                You are a professional recruiter. Generate 6–8 open-ended, high-quality assessment questions covering:
-                1. Motivation / ambition
-                2. Technical / role-fit skills
-                3. Experience relevance
-                4. Behavioral & social dynamics
-                5. Cultural alignment
-                6. Growth / potential
-                7. A reflective 'what-if' scenario
-                Role: {role_name}
-                Language: {"Dutch" if lang == "nl" else "English"}
-                VACANCY:
-                {vac_text[:2500]}
-                """
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert HR recruiter creating contextual interview questions.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.6,
-                    max_tokens=600,
-                )
-                txt = res.choices[0].message.content
-                questions = [
-                    q.strip("1234567890. ").strip()
-                    for q in txt.split("\n")
-                    if len(q.strip()) > 10
-                ]
-                return questions[:8]
+                client = get_openai_client(api_key)
+                if client is None:
+                    raise ValueError("No LLM client (API key).")
+                questions = generate_questions(client, vac_text, role_name, lang, fresh=fresh, model=llm_model())
+                bank.put(role_name, vac_text, lang, questions)
+                return questions
             except Exception:
-                return [
-                    f"What motivated you to apply for the {role_name} position?",
-                    "Which skills make you a strong fit for this role?",
-                    "Describe a past experience that shows your competence.",
-                    "How do you collaborate with others at work?",
-                    "What about our company culture appeals to you?",
-                    "Where do you see your growth potential?",
-                    "Imagine getting this job — what would you change or optimize first?",
-                ]
-
-        if st.button("🔄 Generate AI Questions"):
-            st.session_state["assessment_questions"] = generate_ai_questions(
-                vacancy_txt, role, lang, openai_key
-            )
-            st.success("✅ AI recruiter-grade questions generated.")
-
-        qs = st.session_state.get(
-            "assessment_questions",
-            generate_ai_questions(vacancy_txt, role, lang, openai_key),
-        )
+                return default_questions(role_name)
+
+        # Reuse the stored set for this (role, vacancy, language); the LLM is only called when none
+        # exists yet or on explicit regeneration — never as a side effect of a rerun.
+        regenerate = st.button("🔄 Regenerate AI Questions" if bank.get(role, vacancy_txt, lang) else "🔄 Generate AI Questions")
+        qs = None if regenerate else bank.get(role, vacancy_txt, lang)
+        if qs is None:
+            qs = generate_ai_questions(vacancy_txt, role, lang, openai_key, fresh=regenerate)
+            if regenerate:
+                st.success("✅ AI recruiter-grade questions generated.")
+        st.session_state["assessment_questions"] = qs
+        _bank_entry = bank.entry(role, vacancy_txt, lang)
+        st.caption(f"Question bank: stored set from {_bank_entry['created_at']} for {role} ({lang})." if _bank_entry
+                   else "Question bank: default questions (no API key or generation failed).")
 
         # ---------- ASSESSMENT FORM ----------
         st.markdown(f"### {L['form_title'][lang]} — *{candidate_name}*")
@@ -4130,35 +4156,15 @@ with section[5]:
         # --- SHAP Explanation for this Candidate ---
         st.markdown("### 🔍 Explainability — SHAP Feature Contribution")
         try:
-            row = pd.DataFrame([feat])
-            for c in feature_cols:
-                if c.startswith("Sector_"):
-                    row[c] = 0
-            sec_col = f"Sector_{sector}"
-            if sec_col in feature_cols:
-                row[sec_col] = 1
-            for c in feature_cols:
-                if c not in row.columns:
-                    row[c] = 0
-            row = row[feature_cols]
-
-            explainer = shap.TreeExplainer(model)
-            sv = explainer.shap_values(row)
-            base_val = explainer.expected_value
-            fig = plt.figure()
-            shap.waterfall_plot(
-                shap.Explanation(values=sv[0], base_values=base_val,
-                                 data=row.iloc[0].values, feature_names=row.columns.tolist()),
-                show=False
-            )
-            st.pyplot(fig, clear_figure=True)
-            plt.close(fig)
+            row = feature_frame(feat, feature_cols, sector)
+            sv, base_val, fig = explain_and_plot(live_model, row)
+            st.plotly_chart(fig, use_container_width=True)
         except Exception as e:
             st.error(f"Unable to compute SHAP explanation: {e}")
 
         # --- Top Positive / Negative Contributions ---
         try:
-            shap_vals = pd.Series(sv[0], index=row.columns)
+            shap_vals = pd.Series(sv, index=row.columns)
             shap_sorted = shap_vals.abs().sort_values(ascending=False).head(8)
             st.markdown("### 📊 Top Feature Influences")
             c1, c2 = st.columns(2)
@@ -4171,6 +4177,14 @@ with section[5]:
         except Exception:
             pass
 
+        # --- Sector SHAP profile (precomputed per model version) ---
+        shap_summary = load_shap_summary(live_model)
+        if shap_summary is not None:
+            st.markdown("### 🧭 Sector Explainability — what drives the model in this sector")
+            st.plotly_chart(sector_importance_figure(shap_summary, sector), use_container_width=True)
+        else:
+            st.caption(f"Sector SHAP summary for {model_version} is still being computed.")
+
         # --- Fairness Check ---
         st.markdown("### ⚖️ Fairness / Bias Context")
         df_sector = df[df["Sector"] == sector]
@@ -4201,15 +4215,11 @@ with section[5]:
             Feature summary: {json.dumps(feat, indent=2)}
             """
             try:
-                exp = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
+                exp = complete(client, [
                         {"role": "system", "content": "You are an expert in AI fairness and HR explainability."},
                         {"role": "user", "content": explain_prompt}
-                    ],
-                    temperature=0.5, max_tokens=500
-                )
-                st.markdown(exp.choices[0].message.content)
+                    ], model=llm_model(), temperature=0.5, max_tokens=500, site="bias")
+                st.markdown(exp)
             except Exception:
                 st.caption("AI-based bias explanation unavailable (check API key).")
         else:
@@ -4228,6 +4238,108 @@ with section[6]:
     st.write("Model training set (sample):")
     st.dataframe(df.sample(20), use_container_width=True)
 
+    # ---------- MODEL RETRAINING (background worker, atomic hot-swap) ----------
+    st.markdown("---")
+    st.subheader("🔁 Model retraining")
+    st.caption(f"Live model: **{model_version}** · F1 {metrics['f1']:.3f} · AUC {metrics['auc']:.3f} · trained {live_model.trained_at}")
+    rt1, rt2 = st.columns(2)
+    with rt1:
+        rt_rows = st.number_input("Synthetic rows", 1000, 5_000_000, 5000, 1000, key="retrain_rows")
+    with rt2:
+        rt_seed = st.number_input("Seed", 0, 1_000_000, 17, 1, key="retrain_seed")
+    rt_csv = st.file_uploader("Or retrain on a labelled candidate CSV (same columns as the training set)", type=["csv"], key="retrain_csv")
+    if st.button("Retrain in background", key="retrain_btn", disabled=model_registry.is_training()):
+        if rt_csv is not None:
+            _rt_bytes = rt_csv.getvalue()
+            model_registry.retrain_async(lambda: pd.read_csv(io.BytesIO(_rt_bytes)), source=f"upload {rt_csv.name}")
+        else:
+            _rt_n, _rt_seed, _rt_sectors = int(rt_rows), int(rt_seed), catalog.sectors()
+            model_registry.retrain_async(lambda: generate_dataset(_rt_n, seed=_rt_seed, sectors=_rt_sectors),
+                                         source=f"synthetic n={_rt_n}, seed={_rt_seed}")
+        st.toast("Retraining started — the app stays usable meanwhile.", icon="🔁")
+    rt_status = model_registry.status()
+    if rt_status["state"] != "idle":
+        st.info(f"Retraining: **{rt_status['state']}** — {rt_status['message']}")
+    st.dataframe(pd.DataFrame([{"version": mv.version, "live": mv.version == model_registry.current().version,
+                                "f1": mv.metrics["f1"], "auc": mv.metrics["auc"],
+                                "trained_at": mv.trained_at, "source": mv.source} for mv in model_registry.versions()]),
+                 use_container_width=True)
+
+    # ---------- PROMPT CONTEXT BUDGETS ----------
+    st.markdown("---")
+    st.subheader("🧾 Prompt context")
+    pc1, pc2, pc3 = st.columns(3)
+    with pc1:
+        st.number_input("Q&A context budget (tokens)", 500, 32000, QA_TOKEN_BUDGET, 500, key="qa_token_budget")
+    with pc2:
+        st.number_input("Narrative context budget (tokens)", 2000, 120000, NARRATIVE_TOKEN_BUDGET, 1000,
+                        key="narrative_token_budget")
+    with pc3:
+        st.slider("Minimum snippet similarity", 0.0, 0.5, MIN_SNIPPET_SCORE, 0.01, key="min_snippet_score")
+    _limiter = rate_limiter()
+    rl1, rl2 = st.columns(2)
+    with rl1:
+        _rpm = st.number_input("LLM requests / minute (process-wide)", 1, 10000, _limiter.rpm, 10, key="llm_rpm")
+    with rl2:
+        _tpm = st.number_input("LLM tokens / minute (process-wide)", 1000, 10_000_000, _limiter.tpm, 1000, key="llm_tpm")
+    if (int(_rpm), int(_tpm)) != (_limiter.rpm, _limiter.tpm):
+        _limiter.configure(int(_rpm), int(_tpm))
+    _llm_stats = response_cache().stats()
+    lc1, lc2 = st.columns([3, 1])
+    with lc1:
+        st.caption(f"LLM response cache: {_llm_stats['entries']} responses · {_llm_stats['bytes']/1e6:.1f} MB · "
+                   f"{_llm_stats['hits']} hits / {_llm_stats['misses']} misses since start")
+    with lc2:
+        if st.button("Clear LLM cache", key="llm_cache_clear"):
+            response_cache().clear()
+            st.toast("LLM response cache cleared.")
+    st.selectbox("Narrative generation", NARRATIVE_MODES, key="narrative_mode",
+                 help="Map-reduce summarises each CV / letter once (cached) and writes the narrative from the "
+                      "summaries; Auto uses it for multi-file or long corpora.")
+
+    # ---------- LLM BACKEND ----------
+    st.markdown("---")
+    st.subheader("🔌 LLM backend")
+    _be_default = default_backend()
+    be1, be2, be3 = st.columns([1, 2, 1])
+    with be1:
+        _be_name = st.selectbox("Backend", list(BACKENDS), index=list(BACKENDS).index(_be_default.name),
+                                key="llm_backend_name")
+    _be_preset = _be_default if _be_name == _be_default.name else BACKENDS[_be_name]
+    with be2:
+        _be_url = st.text_input("Base URL (empty = OpenAI default)", _be_preset.base_url, key=f"llm_base_url_{_be_name}")
+    with be3:
+        _be_model = st.text_input("Model", _be_preset.model, key=f"llm_model_{_be_name}")
+    st.session_state["llm_backend"] = _be_preset._replace(base_url=_be_url.strip(),
+                                                          model=_be_model.strip() or _be_preset.model)
+    if _be_name == "Local stand-in":
+        st.caption("Start the stand-in with `python -m talentlens.standin_server --port 8765` (flags simulate latency, "
+                   "token rate and failures); benchmark with `python -m talentlens.bench_llm`.")
+
+    # ---------- LLM USAGE LEDGER ----------
+    st.markdown("---")
+    st.subheader("📒 LLM usage")
+    _scope = st.radio("Scope", ["This session", "All sessions (process)"], horizontal=True, key="ledger_scope")
+    _session = None if _scope.startswith("All") else getattr(get_script_run_ctx(), "session_id", "")
+    _usage_rows = ledger().summary(_session)
+    if _usage_rows:
+        _usage_df = pd.DataFrame(_usage_rows)
+        lg1, lg2, lg3, lg4 = st.columns(4)
+        lg1.metric("Calls", int(_usage_df["calls"].sum()))
+        lg2.metric("Tokens (prompt / completion)",
+                   f"{int(_usage_df['prompt_tokens'].sum()):,} / {int(_usage_df['completion_tokens'].sum()):,}")
+        lg3.metric("Estimated cost", f"${_usage_df['cost_usd'].sum():.4f}")
+        lg4.metric("Cache hits", int(_usage_df["cache_hits"].sum()))
+        _prompt_total = int(_usage_df["prompt_tokens"].sum())
+        if _prompt_total:
+            st.caption(f"Provider prompt cache: {int(_usage_df['cached_tokens'].sum()):,} of {_prompt_total:,} prompt "
+                       f"tokens ({_usage_df['cached_tokens'].sum() / _prompt_total:.0%}) served from the shared prefix.")
+        st.dataframe(_usage_df, use_container_width=True)
+        st.download_button("Download LLM call ledger (CSV)", data=ledger().to_csv(_session).encode("utf-8"),
+                           file_name="llm_ledger.csv", mime="text/csv", key="ledger_csv")
+    else:
+        st.caption("No LLM calls recorded yet.")
+
     st.caption("ℹ️ For weight tuning, go to the ⚙️ Custom Factors tab.")
 
     st.markdown("---")
@@ -4256,8 +4368,7 @@ with section[6]:
         st.caption("✍️ " + t("copy_hint", lang))
         
 # ===== 🌐 LIVE VACANCIES PORTAL (FINAL — FULL AI INTEGRATION + TOOLTIP HOVER GLOW) =====
-import io, base64, requests, xml.etree.ElementTree as ET
-from PIL import Image
+import io, base64, requests
 import pandas as pd
 import streamlit as st
 
@@ -4309,8 +4420,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # -# ===== 🌐 LIVE VACANCIES PORTAL (FINAL SHOWCASE VERSION) =====
-import io, base64, requests, xml.etree.ElementTree as ET
-from PIL import Image
+import io, base64, requests
 import pandas as pd
 import streamlit as st
 
@@ -4410,58 +4520,18 @@ def logo_display(url, width=100, caption="", info=None):
 
 # ---------- 🌍 Multi-Source Vacancy Connector ----------
 def fetch_live_vacancies(source, company, api_key=None):
-    try:
-        source = source.lower()
-        if source == "recruitee":
-            r = requests.get(f"https://{company}.recruitee.com/api/offers/")
-            return pd.DataFrame(r.json().get("offers", []))
-        elif source == "lever":
-            r = requests.get(f"https://api.lever.co/v0/postings/{company}")
-            return pd.DataFrame(r.json())
-        elif source == "greenhouse":
-            r = requests.get(f"https://boards-api.greenhouse.io/v1/boards/{company}/jobs")
-            return pd.DataFrame(r.json().get("jobs", []))
-        elif source == "personio":
-            r = requests.get(f"https://{company}.jobs.personio.de/xml")
-            root = ET.fromstring(r.text)
-            data = []
-            for job in root.findall(".//job"):
-                data.append({
-                    "title": job.findtext("name"),
-                    "location": job.findtext("office"),
-                    "url": job.findtext("url"),
-                    "description": job.findtext("description", "")
-                })
-            return pd.DataFrame(data)
-        elif source == "adzuna":
-            if not api_key or ":" not in api_key:
-                st.warning("Adzuna requires app_id:app_key format.")
-                return pd.DataFrame()
-            app_id, app_key = api_key.split(":")
-            r = requests.get(
-                f"https://api.adzuna.com/v1/api/jobs/nl/search/1?"
-                f"app_id={app_id}&app_key={app_key}&results_per_page=25"
-            )
-            jobs = r.json().get("results", [])
-            return pd.DataFrame([{
-                "title": j["title"],
-                "location": j["location"]["display_name"],
-                "url": j["redirect_url"],
-                "description": j.get("description", "")
-            } for j in jobs])
-        elif source in ["linkedin", "indeed"]:
-            st.warning(f"{source.title()} API is restricted — manual or partner integration needed.")
-        elif source == "monsterboard":
-            return pd.DataFrame([{
-                "title": "Audit Consultant (demo)",
-                "location": "Eindhoven",
-                "url": "https://www.monsterboard.nl/vacatures/",
-                "description": "Demo placeholder — replace with licensed API."
-            }])
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error fetching from {source}: {e}")
-        return pd.DataFrame()
+    # One source / company or lists of either; every pair is fetched concurrently over pooled sessions
+    # (talentlens/vacancies.py), so one slow or failing board only costs its own row in the status report
+    sources = [source] if isinstance(source, str) else list(source)
+    companies = [company] if isinstance(company, str) else list(company or [])
+    df, results = fetch_vacancies(expand_pairs(sources, companies), api_key)
+    for r in results:
+        where = f"{r.source} · {r.company}" if r.company else r.source
+        if r.status == "restricted":
+            st.warning(r.error)
+        elif r.status in ("error", "timeout"):
+            st.error(f"Error fetching from {where}: {r.error}")
+    return df
 
 # ---------- 🧠 AI Narrative Wrapper + Predictive Integration ----------
 def generate_narrative(text, fit_score):
@@ -4547,20 +4617,20 @@ with section[7]:
 
     # --- Centered Input Section ---
     st.markdown('<div class="source-box">', unsafe_allow_html=True)
-    src = st.selectbox("Select Source", [
+    src = st.multiselect("Select Sources", [
         "Recruitee", "Lever", "Greenhouse", "Personio",
         "Adzuna", "Monsterboard", "LinkedIn", "Indeed"
-    ])
-    company = st.text_input("Enter company domain (e.g. 'openai', 'crowe-foederer')")
+    ], default=["Recruitee"])
+    company = st.text_input("Enter company domains, comma-separated (e.g. 'openai, crowe-foederer')")
     api_key_input = st.text_input("API key (only for Adzuna: app_id:app_key)", type="password")
     if st.button("🔄 Fetch Live Vacancies"):
-        df_live = fetch_live_vacancies(src, company, api_key_input)
+        df_live = fetch_live_vacancies(src, company.split(","), api_key_input)
         if df_live.empty:
             st.warning("No vacancies found or connection unavailable.")
         else:
-            st.success(f"✅ {len(df_live)} vacancies fetched from {src}")
+            st.success(f"✅ {len(df_live)} vacancies fetched from {', '.join(df_live['source'].unique())}")
             st.dataframe(
-                df_live[[c for c in ["title", "location", "url"] if c in df_live.columns]].head(50),
+                df_live[["title", "location", "url", "source", "company"]].head(50),
                 use_container_width=True
             )
             selected = st.selectbox("Select vacancy to attach", df_live["title"].tolist())
@@ -4904,35 +4974,15 @@ with section[5]:
         # --- SHAP Explanation for this Candidate ---
         st.markdown("### 🔍 Explainability — SHAP Feature Contribution")
         try:
-            row = pd.DataFrame([feat])
-            for c in feature_cols:
-                if c.startswith("Sector_"):
-                    row[c] = 0
-            sec_col = f"Sector_{sector}"
-            if sec_col in feature_cols:
-                row[sec_col] = 1
-            for c in feature_cols:
-                if c not in row.columns:
-                    row[c] = 0
-            row = row[feature_cols]
-
-            explainer = shap.TreeExplainer(model)
-            sv = explainer.shap_values(row)
-            base_val = explainer.expected_value
-            fig = plt.figure()
-            shap.waterfall_plot(
-                shap.Explanation(values=sv[0], base_values=base_val,
-                                 data=row.iloc[0].values, feature_names=row.columns.tolist()),
-                show=False
-            )
-            st.pyplot(fig, clear_figure=True)
-            plt.close(fig)
+            row = feature_frame(feat, feature_cols, sector)
+            sv, base_val, fig = explain_and_plot(live_model, row)
+            st.plotly_chart(fig, use_container_width=True)
         except Exception as e:
             st.error(f"Unable to compute SHAP explanation: {e}")
 
         # --- Top Positive / Negative Contributions ---
         try:
-            shap_vals = pd.Series(sv[0], index=row.columns)
+            shap_vals = pd.Series(sv, index=row.columns)
             shap_sorted = shap_vals.abs().sort_values(ascending=False).head(8)
             st.markdown("### 📊 Top Feature Influences")
             c1, c2 = st.columns(2)
@@ -4945,6 +4995,14 @@ with section[5]:
         except Exception:
             pass
 
+        # --- Sector SHAP profile (precomputed per model version) ---
+        shap_summary = load_shap_summary(live_model)
+        if shap_summary is not None:
+            st.markdown("### 🧭 Sector Explainability — what drives the model in this sector")
+            st.plotly_chart(sector_importance_figure(shap_summary, sector), use_container_width=True)
+        else:
+            st.caption(f"Sector SHAP summary for {model_version} is still being computed.")
+
         # --- Fairness Check ---
         st.markdown("### ⚖️ Fairness / Bias Context")
         df_sector = df[df["Sector"] == sector]
@@ -4975,15 +5033,11 @@ with section[5]:
             Feature summary: {json.dumps(feat, indent=2)}
             """
             try:
-                exp = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
+                exp = complete(client, [
                         {"role": "system", "content": "You are an expert in AI fairness and HR explainability."},
                         {"role": "user", "content": explain_prompt}
-                    ],
-                    temperature=0.5, max_tokens=500
-                )
-                st.markdown(exp.choices[0].message.content)
+                    ], model=llm_model(), temperature=0.5, max_tokens=500, site="bias")
+                st.markdown(exp)
             except Exception:
                 st.caption("AI-based bias explanation unavailable (check API key).")
         else:
@@ -5002,6 +5056,108 @@ with section[6]:
     st.write("Model training set (sample):")
     st.dataframe(df.sample(20), use_container_width=True)
 
+    # ---------- MODEL RETRAINING (background worker, atomic hot-swap) ----------
+    st.markdown("---")
+    st.subheader("🔁 Model retraining")
+    st.caption(f"Live model: **{model_version}** · F1 {metrics['f1']:.3f} · AUC {metrics['auc']:.3f} · trained {live_model.trained_at}")
+    rt1, rt2 = st.columns(2)
+    with rt1:
+        rt_rows = st.number_input("Synthetic rows", 1000, 5_000_000, 5000, 1000, key="retrain_rows")
+    with rt2:
+        rt_seed = st.number_input("Seed", 0, 1_000_000, 17, 1, key="retrain_seed")
+    rt_csv = st.file_uploader("Or retrain on a labelled candidate CSV (same columns as the training set)", type=["csv"], key="retrain_csv")
+    if st.button("Retrain in background", key="retrain_btn", disabled=model_registry.is_training()):
+        if rt_csv is not None:
+            _rt_bytes = rt_csv.getvalue()
+            model_registry.retrain_async(lambda: pd.read_csv(io.BytesIO(_rt_bytes)), source=f"upload {rt_csv.name}")
+        else:
+            _rt_n, _rt_seed, _rt_sectors = int(rt_rows), int(rt_seed), catalog.sectors()
+            model_registry.retrain_async(lambda: generate_dataset(_rt_n, seed=_rt_seed, sectors=_rt_sectors),
+                                         source=f"synthetic n={_rt_n}, seed={_rt_seed}")
+        st.toast("Retraining started — the app stays usable meanwhile.", icon="🔁")
+    rt_status = model_registry.status()
+    if rt_status["state"] != "idle":
+        st.info(f"Retraining: **{rt_status['state']}** — {rt_status['message']}")
+    st.dataframe(pd.DataFrame([{"version": mv.version, "live": mv.version == model_registry.current().version,
+                                "f1": mv.metrics["f1"], "auc": mv.metrics["auc"],
+                                "trained_at": mv.trained_at, "source": mv.source} for mv in model_registry.versions()]),
+                 use_container_width=True)
+
+    # ---------- PROMPT CONTEXT BUDGETS ----------
+    st.markdown("---")
+    st.subheader("🧾 Prompt context")
+    pc1, pc2, pc3 = st.columns(3)
+    with pc1:
+        st.number_input("Q&A context budget (tokens)", 500, 32000, QA_TOKEN_BUDGET, 500, key="qa_token_budget")
+    with pc2:
+        st.number_input("Narrative context budget (tokens)", 2000, 120000, NARRATIVE_TOKEN_BUDGET, 1000,
+                        key="narrative_token_budget")
+    with pc3:
+        st.slider("Minimum snippet similarity", 0.0, 0.5, MIN_SNIPPET_SCORE, 0.01, key="min_snippet_score")
+    _limiter = rate_limiter()
+    rl1, rl2 = st.columns(2)
+    with rl1:
+        _rpm = st.number_input("LLM requests / minute (process-wide)", 1, 10000, _limiter.rpm, 10, key="llm_rpm")
+    with rl2:
+        _tpm = st.number_input("LLM tokens / minute (process-wide)", 1000, 10_000_000, _limiter.tpm, 1000, key="llm_tpm")
+    if (int(_rpm), int(_tpm)) != (_limiter.rpm, _limiter.tpm):
+        _limiter.configure(int(_rpm), int(_tpm))
+    _llm_stats = response_cache().stats()
+    lc1, lc2 = st.columns([3, 1])
+    with lc1:
+        st.caption(f"LLM response cache: {_llm_stats['entries']} responses · {_llm_stats['bytes']/1e6:.1f} MB · "
+                   f"{_llm_stats['hits']} hits / {_llm_stats['misses']} misses since start")
+    with lc2:
+        if st.button("Clear LLM cache", key="llm_cache_clear"):
+            response_cache().clear()
+            st.toast("LLM response cache cleared.")
+    st.selectbox("Narrative generation", NARRATIVE_MODES, key="narrative_mode",
+                 help="Map-reduce summarises each CV / letter once (cached) and writes the narrative from the "
+                      "summaries; Auto uses it for multi-file or long corpora.")
+
+    # ---------- LLM BACKEND ----------
+    st.markdown("---")
+    st.subheader("🔌 LLM backend")
+    _be_default = default_backend()
+    be1, be2, be3 = st.columns([1, 2, 1])
+    with be1:
+        _be_name = st.selectbox("Backend", list(BACKENDS), index=list(BACKENDS).index(_be_default.name),
+                                key="llm_backend_name")
+    _be_preset = _be_default if _be_name == _be_default.name else BACKENDS[_be_name]
+    with be2:
+        _be_url = st.text_input("Base URL (empty = OpenAI default)", _be_preset.base_url, key=f"llm_base_url_{_be_name}")
+    with be3:
+        _be_model = st.text_input("Model", _be_preset.model, key=f"llm_model_{_be_name}")
+    st.session_state["llm_backend"] = _be_preset._replace(base_url=_be_url.strip(),
+                                                          model=_be_model.strip() or _be_preset.model)
+    if _be_name == "Local stand-in":
+        st.caption("Start the stand-in with `python -m talentlens.standin_server --port 8765` (flags simulate latency, "
+                   "token rate and failures); benchmark with `python -m talentlens.bench_llm`.")
+
+    # ---------- LLM USAGE LEDGER ----------
+    st.markdown("---")
+    st.subheader("📒 LLM usage")
+    _scope = st.radio("Scope", ["This session", "All sessions (process)"], horizontal=True, key="ledger_scope")
+    _session = None if _scope.startswith("All") else getattr(get_script_run_ctx(), "session_id", "")
+    _usage_rows = ledger().summary(_session)
+    if _usage_rows:
+        _usage_df = pd.DataFrame(_usage_rows)
+        lg1, lg2, lg3, lg4 = st.columns(4)
+        lg1.metric("Calls", int(_usage_df["calls"].sum()))
+        lg2.metric("Tokens (prompt / completion)",
+                   f"{int(_usage_df['prompt_tokens'].sum()):,} / {int(_usage_df['completion_tokens'].sum()):,}")
+        lg3.metric("Estimated cost", f"${_usage_df['cost_usd'].sum():.4f}")
+        lg4.metric("Cache hits", int(_usage_df["cache_hits"].sum()))
+        _prompt_total = int(_usage_df["prompt_tokens"].sum())
+        if _prompt_total:
+            st.caption(f"Provider prompt cache: {int(_usage_df['cached_tokens'].sum()):,} of {_prompt_total:,} prompt "
+                       f"tokens ({_usage_df['cached_tokens'].sum() / _prompt_total:.0%}) served from the shared prefix.")
+        st.dataframe(_usage_df, use_container_width=True)
+        st.download_button("Download LLM call ledger (CSV)", data=ledger().to_csv(_session).encode("utf-8"),
+                           file_name="llm_ledger.csv", mime="text/csv", key="ledger_csv")
+    else:
+        st.caption("No LLM calls recorded yet.")
+
     st.caption("ℹ️ For weight tuning, go to the ⚙️ Custom Factors tab.")
 
     st.markdown("---")
@@ -5030,8 +5186,7 @@ with section[6]:
         st.caption("✍️ " + t("copy_hint", lang))
         
 # ===== 🌐 LIVE VACANCIES PORTAL (FINAL — FULL AI INTEGRATION + TOOLTIP HOVER GLOW) =====
-import io, base64, requests, xml.etree.ElementTree as ET
-from PIL import Image
+import io, base64, requests
 import pandas as pd
 import streamlit as st
 
@@ -5083,8 +5238,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # -# ===== 🌐 LIVE VACANCIES PORTAL (FINAL SHOWCASE VERSION) =====
-import io, base64, requests, xml.etree.ElementTree as ET
-from PIL import Image
+import io, base64, requests
 import pandas as pd
 import streamlit as st
 
@@ -5184,58 +5338,18 @@ def logo_display(url, width=100, caption="", info=None):
 
 # ---------- 🌍 Multi-Source Vacancy Connector ----------
 def fetch_live_vacancies(source, company, api_key=None):
-    try:
-        source = source.lower()
-        if source == "recruitee":
-            r = requests.get(f"https://{company}.recruitee.com/api/offers/")
-            return pd.DataFrame(r.json().get("offers", []))
-        elif source == "lever":
-            r = requests.get(f"https://api.lever.co/v0/postings/{company}")
-            return pd.DataFrame(r.json())
-        elif source == "greenhouse":
-            r = requests.get(f"https://boards-api.greenhouse.io/v1/boards/{company}/jobs")
-            return pd.DataFrame(r.json().get("jobs", []))
-        elif source == "personio":
-            r = requests.get(f"https://{company}.jobs.personio.de/xml")
-            root = ET.fromstring(r.text)
-            data = []
-            for job in root.findall(".//job"):
-                data.append({
-                    "title": job.findtext("name"),
-                    "location": job.findtext("office"),
-                    "url": job.findtext("url"),
-                    "description": job.findtext("description", "")
-                })
-            return pd.DataFrame(data)
-        elif source == "adzuna":
-            if not api_key or ":" not in api_key:
-                st.warning("Adzuna requires app_id:app_key format.")
-                return pd.DataFrame()
-            app_id, app_key = api_key.split(":")
-            r = requests.get(
-                f"https://api.adzuna.com/v1/api/jobs/nl/search/1?"
-                f"app_id={app_id}&app_key={app_key}&results_per_page=25"
-            )
-            jobs = r.json().get("results", [])
-            return pd.DataFrame([{
-                "title": j["title"],
-                "location": j["location"]["display_name"],
-                "url": j["redirect_url"],
-                "description": j.get("description", "")
-            } for j in jobs])
-        elif source in ["linkedin", "indeed"]:
-            st.warning(f"{source.title()} API is restricted — manual or partner integration needed.")
-        elif source == "monsterboard":
-            return pd.DataFrame([{
-                "title": "Audit Consultant (demo)",
-                "location": "Eindhoven",
-                "url": "https://www.monsterboard.nl/vacatures/",
-                "description": "Demo placeholder — replace with licensed API."
-            }])
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error fetching from {source}: {e}")
-        return pd.DataFrame()
+    # One source / company or lists of either; every pair is fetched concurrently over pooled sessions
+    # (talentlens/vacancies.py), so one slow or failing board only costs its own row in the status report
+    sources = [source] if isinstance(source, str) else list(source)
+    companies = [company] if isinstance(company, str) else list(company or [])
+    df, results = fetch_vacancies(expand_pairs(sources, companies), api_key)
+    for r in results:
+        where = f"{r.source} · {r.company}" if r.company else r.source
+        if r.status == "restricted":
+            st.warning(r.error)
+        elif r.status in ("error", "timeout"):
+            st.error(f"Error fetching from {where}: {r.error}")
+    return df
 
 # ---------- 🧠 AI Narrative Wrapper + Predictive Integration ----------
 def generate_narrative(text, fit_score):
@@ -5321,20 +5435,20 @@ with section[7]:
 
     # --- Centered Input Section ---
     st.markdown('<div class="source-box">', unsafe_allow_html=True)
-    src = st.selectbox("Select Source", [
+    src = st.multiselect("Select Sources", [
         "Recruitee", "Lever", "Greenhouse", "Personio",
         "Adzuna", "Monsterboard", "LinkedIn", "Indeed"
-    ])
-    company = st.text_input("Enter company domain (e.g. 'openai', 'crowe-foederer')")
+    ], default=["Recruitee"])
+    company = st.text_input("Enter company domains, comma-separated (e.g. 'openai, crowe-foederer')")
     api_key_input = st.text_input("API key (only for Adzuna: app_id:app_key)", type="password")
     if st.button("🔄 Fetch Live Vacancies"):
-        df_live = fetch_live_vacancies(src, company, api_key_input)
+        df_live = fetch_live_vacancies(src, company.split(","), api_key_input)
         if df_live.empty:
             st.warning("No vacancies found or connection unavailable.")
         else:
-            st.success(f"✅ {len(df_live)} vacancies fetched from {src}")
+            st.success(f"✅ {len(df_live)} vacancies fetched from {', '.join(df_live['source'].unique())}")
             st.dataframe(
-                df_live[[c for c in ["title", "location", "url"] if c in df_live.columns]].head(50),
+                df_live[["title", "location", "url", "source", "company"]].head(50),
                 use_container_width=True
             )
             selected = st.selectbox("Select vacancy to attach", df_live["title"].tolist())
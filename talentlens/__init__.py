@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# CynthAI© TalentLens — shared engine modules used by Update_recruit.py, benchmarks and CLI jobs.
+# Nothing in this package imports Streamlit, so every module can run outside the app.
+
+import os
+from pathlib import Path
+
+# Local working directory for persisted artifacts (indexes, caches, job files)
+DATA_DIR = Path(os.getenv("TALENTLENS_DATA_DIR", ".talentlens"))
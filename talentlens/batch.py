@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# Offline narrative jobs for large campaigns: requests are written to a JSONL job file, submitted
+# to an OpenAI-compatible batch endpoint (files + batches API), polled, and merged back into the
+# batch results by filename and CV content hash. Job state lives under DATA_DIR/batches/<job_id>/.
+
+import argparse
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+
+from . import DATA_DIR
+from .client import call_with_retries
+from .ledger import ledger
+from .llm import cache_key, prompt_tokens, response_cache
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchItem(NamedTuple):
+    custom_id: str
+    filename: str
+    content_hash: str
+    messages: list
+    meta: dict            # everything of the result row except the narrative (metrics, features, ...)
+
+
+def _jsonable(o):
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+def _write_json(path: Path, obj):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, default=_jsonable)
+    os.replace(tmp, path)
+
+
+class BatchJob:
+    """One offline job: requests.jsonl (what is sent), manifest.json (state), results.jsonl (what came back)."""
+
+    def __init__(self, job_dir):
+        self.dir = Path(job_dir)
+        with open(self.dir / "manifest.json", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, items, model: str, temperature: float = 0.4, max_tokens: int = 700, label: str = "",
+               root=None) -> "BatchJob":
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        job_dir = Path(root or DATA_DIR / "batches") / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        with open(job_dir / "requests.jsonl", "w", encoding="utf-8") as f:
+            for it in items:
+                body = {"model": model, "messages": it.messages, "temperature": temperature, "max_tokens": max_tokens}
+                f.write(json.dumps({"custom_id": it.custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                                    "body": body}, ensure_ascii=False) + "\n")
+        manifest = {
+            "job_id": job_id, "label": label, "status": "created", "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "model": model, "temperature": temperature, "max_tokens": max_tokens,
+            "batch_id": None, "input_file_id": None, "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": len(items), "completed": 0, "failed": 0},
+            "items": {it.custom_id: {"filename": it.filename, "content_hash": it.content_hash, "meta": it.meta}
+                      for it in items},
+        }
+        _write_json(job_dir / "manifest.json", manifest)
+        return cls(job_dir)
+
+    @property
+    def id(self) -> str:
+        return self.manifest["job_id"]
+
+    @property
+    def status(self) -> str:
+        return self.manifest["status"]
+
+    def _save(self):
+        _write_json(self.dir / "manifest.json", self.manifest)
+
+    def submit(self, client):
+        """Upload the job file and create the batch."""
+        data = (self.dir / "requests.jsonl").read_bytes()      # bytes, so a retried upload sends the whole file
+        uploaded = call_with_retries(client, lambda: client.files.create(file=("requests.jsonl", data),
+                                                                         purpose="batch"))
+        batch = call_with_retries(client, lambda: client.batches.create(
+            input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window=COMPLETION_WINDOW,
+            metadata={"job_id": self.id, "label": self.manifest.get("label", "")[:200]}))
+        self.manifest.update(input_file_id=uploaded.id, batch_id=batch.id, status=batch.status)
+        self._save()
+        return batch.id
+
+    def refresh(self, client) -> str:
+        if not self.manifest.get("batch_id") or self.status in TERMINAL_STATES:
+            return self.status
+        batch = call_with_retries(client, lambda: client.batches.retrieve(self.manifest["batch_id"]))
+        counts = getattr(batch, "request_counts", None)
+        if counts is not None:
+            self.manifest["request_counts"] = {"total": counts.total, "completed": counts.completed,
+                                               "failed": counts.failed}
+        self.manifest.update(status=batch.status, output_file_id=getattr(batch, "output_file_id", None),
+                             error_file_id=getattr(batch, "error_file_id", None))
+        self._save()
+        return batch.status
+
+    def wait(self, client, interval: float = 10.0, timeout: float = None, on_update=None) -> str:
+        """Poll until the batch reaches a terminal state (or `timeout` seconds pass)."""
+        start = time.monotonic()
+        while self.refresh(client) not in TERMINAL_STATES:
+            if on_update is not None:
+                on_update(self)
+            if timeout is not None and time.monotonic() - start >= timeout:
+                break
+            time.sleep(interval)
+        return self.status
+
+    def _download(self, client, file_id) -> list:
+        if not file_id:
+            return []
+        content = call_with_retries(client, lambda: client.files.content(file_id))
+        text = content.text if hasattr(content, "text") else content.read().decode("utf-8")
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def fetch(self, client) -> list:
+        """Download output/error files once the batch is finished; returns merged result rows.
+
+        Expired or cancelled batches keep the requests that did complete, so their partial output is
+        fetched too. Successful answers are also written to the LLM response cache, so reopening a
+        candidate's narrative interactively is served without a new request.
+        """
+        if self.status not in TERMINAL_STATES:
+            return []
+        if not (self.dir / "results.jsonl").exists():
+            lines = self._download(client, self.manifest.get("output_file_id"))
+            lines += self._download(client, self.manifest.get("error_file_id"))
+            with open(self.dir / "requests.jsonl", encoding="utf-8") as f:
+                bodies = {r["custom_id"]: r["body"] for r in map(json.loads, f)}
+            cache = response_cache()
+            with open(self.dir / "results.jsonl", "w", encoding="utf-8") as f:
+                for line in lines:
+                    cid = line.get("custom_id")
+                    resp = (line.get("response") or {})
+                    body = resp.get("body") or {}
+                    text, error = "", line.get("error")
+                    if resp.get("status_code") == 200 and body.get("choices"):
+                        text = body["choices"][0]["message"].get("content") or ""
+                    elif error is None:
+                        error = body.get("error") or f"HTTP {resp.get('status_code')}"
+                    if cid in bodies:
+                        b, usage = bodies[cid], body.get("usage") or {}
+                        ledger().record("batch.job", b["model"], "off", "ok" if text else "error",
+                                        prompt_tokens(b["messages"], b["model"]), usage.get("prompt_tokens"),
+                                        usage.get("completion_tokens") or 0, batch=True,
+                                        cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens"))
+                        if text:
+                            cache.put(cache_key(b["model"], b["messages"], b["temperature"], b["max_tokens"]),
+                                      b["model"], text)
+                    f.write(json.dumps({"custom_id": cid, "text": text, "error": error}, ensure_ascii=False) + "\n")
+        return self.results()
+
+    def results(self) -> list:
+        """Result rows (manifest meta + narrative + filename + content_hash), in job order."""
+        try:
+            with open(self.dir / "results.jsonl", encoding="utf-8") as f:
+                got = {r["custom_id"]: r for r in map(json.loads, f)}
+        except FileNotFoundError:
+            return []
+        rows = []
+        for cid, item in self.manifest["items"].items():
+            r = got.get(cid)
+            if r is None:
+                continue
+            rows.append(dict(item["meta"], filename=item["filename"], content_hash=item["content_hash"],
+                             narrative=(r["text"] or "").strip(), batch_error=r["error"]))
+        return rows
+
+
+def list_jobs(root=None) -> list:
+    """All jobs on disk, newest first."""
+    root = Path(root or DATA_DIR / "batches")
+    jobs = []
+    for d in sorted(root.glob("*/manifest.json"), reverse=True):
+        try:
+            jobs.append(BatchJob(d.parent))
+        except Exception:
+            continue
+    return jobs
+
+
+def merge_results(existing: list, rows: list) -> list:
+    """Replace rows of `existing` with the same (filename, content_hash), append the rest."""
+    fresh = {(r["filename"], r.get("content_hash")): r for r in rows}
+    merged = [fresh.pop((r.get("filename"), r.get("content_hash")), r) for r in existing]
+    return merged + list(fresh.values())
+
+
+def main(argv=None):
+    """Poll submitted jobs from a terminal: python -m talentlens.batch [job_id ...] --wait"""
+    from .client import openai_client
+    ap = argparse.ArgumentParser(description="Status / results of offline narrative jobs")
+    ap.add_argument("job_ids", nargs="*", help="default: every unfinished job")
+    ap.add_argument("--wait", action="store_true", help="poll until the jobs finish, then download results")
+    ap.add_argument("--interval", type=float, default=30.0)
+    args = ap.parse_args(argv)
+    client = openai_client(os.getenv("OPENAI_API_KEY", ""))
+    if client is None:
+        raise SystemExit("OPENAI_API_KEY (and the openai package) are required.")
+    jobs = [j for j in list_jobs() if (j.id in args.job_ids if args.job_ids else j.status not in TERMINAL_STATES)]
+    for job in jobs:
+        status = job.wait(client, args.interval) if args.wait else job.refresh(client)
+        rows = job.fetch(client)
+        counts = job.manifest["request_counts"]
+        print(f"{job.id}\t{status}\t{counts['completed']}/{counts['total']}\t{len(rows)} results")
+
+
+if __name__ == "__main__":
+    main()
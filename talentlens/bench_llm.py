@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# LLM path benchmark — latency, time to first token, throughput and failures of complete() /
+# stream_complete() at a given concurrency, and the cost of a response-cache hit. Runs offline
+# against the bundled stand-in server:
+#
+#   python -m talentlens.bench_llm --serve --requests 200 --concurrency 16 --failure-rate 0.05
+#   python -m talentlens.bench_llm --backend OpenAI --requests 20      (needs OPENAI_API_KEY)
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .client import BACKENDS, openai_client
+from .llm import ResponseCache, complete, rate_limiter, stream_complete, use_response_cache
+
+
+def _messages(i: int, run: str):
+    return [{"role": "system", "content": "You are a bilingual recruitment copilot."},
+            {"role": "user", "content": json.dumps({"task": "narrative", "run": run, "candidate": i})}]
+
+
+def _one(client, model, messages, stream: bool, use_cache: bool, max_tokens: int):
+    t0 = time.perf_counter()
+    first = None
+    try:
+        if stream:
+            for delta in stream_complete(client, messages, model=model, max_tokens=max_tokens, use_cache=use_cache):
+                if first is None and delta:
+                    first = time.perf_counter() - t0
+        else:
+            complete(client, messages, model=model, max_tokens=max_tokens, use_cache=use_cache)
+        return time.perf_counter() - t0, first, None
+    except Exception as e:
+        return time.perf_counter() - t0, first, type(e).__name__
+
+
+def _report(label: str, rows, wall: float):
+    lat = np.array([r[0] for r in rows if r[2] is None]) * 1000
+    ttft = np.array([r[1] for r in rows if r[1] is not None]) * 1000
+    errors = {}
+    for r in rows:
+        if r[2] is not None:
+            errors[r[2]] = errors.get(r[2], 0) + 1
+    line = f"{label:<18} ok {len(lat):>5}/{len(rows):<5} {len(rows)/wall:7.1f} req/s"
+    if len(lat):
+        line += f"   latency p50 {np.median(lat):7.1f} ms  p95 {np.percentile(lat, 95):7.1f} ms"
+    if len(ttft):
+        line += f"   TTFT p50 {np.median(ttft):7.1f} ms"
+    print(line + (f"   errors {errors}" if errors else ""))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the TalentLens LLM call path.")
+    ap.add_argument("--backend", default="Local stand-in", choices=list(BACKENDS))
+    ap.add_argument("--model", default=None)
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--max-tokens", type=int, default=200)
+    ap.add_argument("--serve", action="store_true", help="start the stand-in server in-process")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--tokens-per-second", type=float, default=80.0)
+    ap.add_argument("--failure-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0)
+    ap.add_argument("--cache-dir", default=None, help="response cache directory (default: a fresh temp dir)")
+    args = ap.parse_args(argv)
+
+    backend = BACKENDS[args.backend]
+    if args.serve:
+        from .standin_server import Simulation, serve
+        serve(port=args.port, sim=Simulation(latency_ms=args.latency_ms, tokens_per_second=args.tokens_per_second,
+                                             failure_rate=args.failure_rate, rate_limit_rate=args.rate_limit_rate))
+        backend = backend._replace(base_url=f"http://127.0.0.1:{args.port}/v1")
+    model = args.model or backend.model
+    client = openai_client(os.getenv("OPENAI_API_KEY", ""), backend)
+    if client is None:
+        raise SystemExit("No client: install the openai package (and set OPENAI_API_KEY for keyed backends).")
+    rate_limiter().configure(10**6, 10**9)          # measure the backend, not the app's own limiter
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="talentlens-bench-")
+    use_response_cache(ResponseCache(os.path.join(cache_dir, "llm_cache.db")))   # keep the app's cache clean
+    run = uuid.uuid4().hex[:8]
+    print(f"{backend.name} · {model} · {args.requests} requests · concurrency {args.concurrency}")
+
+    for label, stream, use_cache in (("complete", False, True), ("stream", True, False),
+                                     ("cache hits", False, True)):
+        offset = args.requests if stream else 0       # the streamed pass uses its own prompts
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            rows = list(pool.map(lambda i: _one(client, model, _messages(i + offset, run), stream, use_cache,
+                                                args.max_tokens), range(args.requests)))
+        _report(label, rows, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+# Vacancy catalog — a versioned SQLite store (one row per vacancy, skills / value words parsed once at
+# import and kept as JSON lists, indexed on sector and job title) plus the TF-IDF matcher, fitted once
+# per catalog version and shared by all sessions. Selectors query one sector at a time, so catalogs of
+# tens of thousands of vacancies stay interactive. Import from the command line:
+#
+#   python -m talentlens.catalog import vacancies.csv --sector IT --activate
+#   python -m talentlens.catalog versions
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from . import DATA_DIR
+from .retrieval import top_k_indices
+
+IMPORT_BATCH = 5_000
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+CSV_COLUMNS = {"sector": "Sector", "jobtitle": "JobTitle", "requiredskills": "RequiredSkills",
+               "valuewords": "ValueWords", "expmin": "ExpMin", "expmax": "ExpMax"}
+
+
+class VacancyMatch(NamedTuple):
+    sector: str
+    job_title: str
+    score: float
+
+
+def vacancy_signature(vacancy: dict) -> str:
+    """Text a catalog vacancy is matched on: title, required skills and value words."""
+    return " ".join([vacancy.get("JobTitle", ""), " ".join(vacancy.get("RequiredSkills", []) or []),
+                     " ".join(vacancy.get("ValueWords", []) or [])])
+
+
+def catalog_version(sectors: dict) -> str:
+    """Content fingerprint of a {sector: [vacancy, ...]} catalog."""
+    raw = json.dumps(sectors, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def split_list(value) -> list:
+    """'Python, SQL,  ETL' → ['Python', 'SQL', 'ETL']; lists pass through."""
+    if isinstance(value, (list, tuple)):
+        return [str(x).strip() for x in value if str(x).strip()]
+    return [x.strip() for x in value.split(",") if x.strip()] if isinstance(value, str) else []
+
+
+def _int_or_none(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_csv(raw: bytes) -> str:
+    """UTF-8 (with or without BOM), else Windows-1252 — the usual encoding of Excel CSV exports."""
+    for encoding in CSV_ENCODINGS:
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Vacancy CSV is not encoded as {' or '.join(CSV_ENCODINGS)}; re-save it as UTF-8.")
+
+
+class CatalogVersion(NamedTuple):
+    version: int
+    parent: int               # version the import was layered on (0 for a full catalog)
+    source: str
+    source_key: str           # content hash of the imported file / records, so re-imports are free
+    n_rows: int
+    imported_at: str
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    parent INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    source_key TEXT NOT NULL UNIQUE,
+    n_rows INTEGER,
+    imported_at TEXT
+);
+CREATE TABLE IF NOT EXISTS vacancies (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL,
+    sector TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    required_skills TEXT,
+    value_words TEXT,
+    exp_min INTEGER,
+    exp_max INTEGER,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_vacancies_sector ON vacancies(version, sector, job_title);
+CREATE INDEX IF NOT EXISTS ix_vacancies_title ON vacancies(version, job_title);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class CatalogStore:
+    """Process-wide vacancy catalog; every import is a new immutable version, one of which is active."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DATA_DIR / "catalog.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(_SCHEMA)
+        self._memo = {}                                   # versions are immutable, so lookups are memoised
+
+    # --- versions ---
+    def active_version(self) -> int:
+        with self._lock:
+            row = self._con.execute("SELECT value FROM meta WHERE key = 'active'").fetchone()
+        return int(row[0]) if row else 0
+
+    def activate(self, version: int):
+        with self._lock, self._con:
+            if not self._con.execute("SELECT 1 FROM versions WHERE version = ?", (version,)).fetchone():
+                raise KeyError(f"Unknown catalog version {version}")
+            self._con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('active', ?)", (str(version),))
+
+    def versions(self) -> list:
+        with self._lock:
+            rows = self._con.execute("SELECT version, parent, source, source_key, n_rows, imported_at "
+                                     "FROM versions ORDER BY version DESC").fetchall()
+        return [CatalogVersion(*r) for r in rows]
+
+    def _version_for_key(self, source_key: str):
+        row = self._con.execute("SELECT version FROM versions WHERE source_key = ?", (source_key,)).fetchone()
+        return row[0] if row else None
+
+    # --- import ---
+    def import_records(self, records, source: str, source_key: str, base: int = 0, activate: bool = False) -> int:
+        """Store `records` (dicts with Sector/JobTitle/RequiredSkills/ValueWords/ExpMin/ExpMax) as a new version.
+
+        With `base`, the new version is that version with every sector present in `records` replaced —
+        the catalog an uploaded per-sector CSV describes. Importing the same `source_key` again returns
+        the existing version without touching the database."""
+        with self._lock:
+            existing = self._version_for_key(source_key)
+        if existing is not None:
+            if activate:
+                self.activate(existing)
+            return existing
+        with self._lock, self._con:
+            cur = self._con.execute(
+                "INSERT INTO versions (parent, source, source_key, n_rows, imported_at) VALUES (?, ?, ?, 0, ?)",
+                (base, source, source_key, time.strftime("%Y-%m-%d %H:%M:%S")))
+            version = cur.lastrowid
+            sectors, batch = set(), []
+            for rec in records:
+                sector, title = str(rec.get("Sector") or "").strip(), str(rec.get("JobTitle") or "").strip()
+                if not sector or not title:
+                    continue
+                skills, values = split_list(rec.get("RequiredSkills")), split_list(rec.get("ValueWords"))
+                sectors.add(sector)
+                batch.append((version, sector, title, json.dumps(skills, ensure_ascii=False),
+                              json.dumps(values, ensure_ascii=False), _int_or_none(rec.get("ExpMin")),
+                              _int_or_none(rec.get("ExpMax")),
+                              vacancy_signature({"JobTitle": title, "RequiredSkills": skills, "ValueWords": values})))
+                if len(batch) >= IMPORT_BATCH:
+                    self._insert(batch)
+                    batch = []
+            self._insert(batch)
+            if base:
+                replaced = f" AND sector NOT IN ({','.join('?' * len(sectors))})" if sectors else ""
+                self._con.execute(
+                    "INSERT INTO vacancies (version, sector, job_title, required_skills, value_words, exp_min, "
+                    "exp_max, signature) SELECT ?, sector, job_title, required_skills, value_words, exp_min, "
+                    f"exp_max, signature FROM vacancies WHERE version = ?{replaced} ORDER BY id",
+                    (version, base, *sorted(sectors)))
+            n = self._con.execute("SELECT COUNT(*) FROM vacancies WHERE version = ?", (version,)).fetchone()[0]
+            self._con.execute("UPDATE versions SET n_rows = ? WHERE version = ?", (n, version))
+            if activate:
+                self._con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('active', ?)", (str(version),))
+        return version
+
+    def _insert(self, batch):
+        if batch:
+            self._con.executemany(
+                "INSERT INTO vacancies (version, sector, job_title, required_skills, value_words, exp_min, exp_max, "
+                "signature) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+
+    def import_sectors(self, sectors: dict, source: str = "built-in catalog", activate: bool = True) -> int:
+        """Import a {sector: [vacancy, ...]} catalog as a full version (no-op if that exact catalog is stored)."""
+        records = ({**v, "Sector": sec} for sec, vacs in sectors.items() for v in vacs)
+        return self.import_records(records, source, "sectors:" + catalog_version(sectors), activate=activate)
+
+    def import_csv(self, data, source: str = "upload", sector: str = "", base: int = None,
+                   activate: bool = False) -> int:
+        """Import a vacancy CSV (bytes, text or a path). Headers are matched case-insensitively; rows without
+        a Sector column go to `sector`. By default the CSV is layered on the active version."""
+        if isinstance(data, Path) or (isinstance(data, str) and "\n" not in data and len(data) < 1024
+                                      and Path(data).is_file()):
+            data = Path(data).read_bytes()
+        raw = data if isinstance(data, bytes) else str(data).encode("utf-8")
+        base = self.active_version() if base is None else base
+        key = "csv:" + hashlib.sha1(raw + f"|{sector}|{base}".encode("utf-8")).hexdigest()
+        reader = csv.DictReader(io.StringIO(decode_csv(raw)))
+        fields = {f: CSV_COLUMNS.get(f.strip().lower().replace("_", "").replace(" ", ""), f)
+                  for f in reader.fieldnames or []}
+        if "JobTitle" not in fields.values():
+            raise ValueError("Vacancy CSV needs a JobTitle column.")
+        records = ({"Sector": sector, **{fields[k]: v for k, v in row.items() if k in fields}} for row in reader)
+        return self.import_records(records, source, key, base=base, activate=activate)
+
+    # --- queries ---
+    def _cached(self, key, query, args=()):
+        if key not in self._memo:
+            with self._lock:
+                self._memo[key] = self._con.execute(query, args).fetchall()
+        return self._memo[key]
+
+    def _resolve(self, version):
+        return version or self.active_version()
+
+    def sectors(self, version: int = None) -> list:
+        v = self._resolve(version)
+        return [r[0] for r in self._cached(("sectors", v), "SELECT sector FROM vacancies WHERE version = ? "
+                                                           "GROUP BY sector ORDER BY MIN(id)", (v,))]
+
+    def job_titles(self, sector: str, version: int = None) -> list:
+        v = self._resolve(version)
+        return [r[0] for r in self._cached(("titles", v, sector), "SELECT job_title FROM vacancies "
+                                                                  "WHERE version = ? AND sector = ? ORDER BY id",
+                                           (v, sector))]
+
+    def vacancies(self, sector: str, version: int = None) -> list:
+        """Vacancies of one sector as dicts (JobTitle, RequiredSkills, ValueWords, ExpMin, ExpMax), catalog order."""
+        v = self._resolve(version)
+        rows = self._cached(("vacancies", v, sector), "SELECT job_title, required_skills, value_words, exp_min, "
+                                                      "exp_max FROM vacancies WHERE version = ? AND sector = ? "
+                                                      "ORDER BY id", (v, sector))
+        return [{"JobTitle": t, "RequiredSkills": json.loads(rs or "[]"), "ValueWords": json.loads(vw or "[]"),
+                 "ExpMin": lo, "ExpMax": hi} for t, rs, vw, lo, hi in rows]
+
+    def signatures(self, version: int = None):
+        """(sectors, titles, signatures) columns of a whole version, for fitting a VacancyMatcher."""
+        v = self._resolve(version)
+        with self._lock:
+            rows = self._con.execute("SELECT sector, job_title, signature FROM vacancies WHERE version = ? "
+                                     "ORDER BY id", (v,)).fetchall()
+        return tuple(zip(*rows)) if rows else ([], [], [])
+
+    def __len__(self):
+        v = self.active_version()
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM vacancies WHERE version = ?", (v,)).fetchone()[0]
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def catalog_store() -> CatalogStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = CatalogStore()
+        return _STORE
+
+
+class VacancyMatcher:
+    """TF-IDF rows (L2-normalised) for every catalog vacancy; cosine similarity is a sparse dot product."""
+
+    def __init__(self, sectors, titles, signatures):
+        self.sectors = np.asarray(sectors, dtype=object)
+        self.titles = np.asarray(titles, dtype=object)
+        self.vectorizer = TfidfVectorizer(stop_words="english", dtype=np.float32)
+        self.matrix = self.vectorizer.fit_transform(signatures).tocsr() if len(signatures) else None
+        self.match = lru_cache(maxsize=64)(self._match)      # the sidebar classifies the same text repeatedly
+
+    @classmethod
+    def from_sectors(cls, sectors: dict) -> "VacancyMatcher":
+        rows = [(sec, v["JobTitle"], vacancy_signature(v)) for sec, vacs in sectors.items() for v in vacs]
+        return cls(*zip(*rows)) if rows else cls([], [], [])
+
+    @classmethod
+    def from_store(cls, store: CatalogStore, version: int = None) -> "VacancyMatcher":
+        return cls(*store.signatures(version))
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _match(self, text: str, top_k: int = 3, min_score: float = 0.0):
+        """Best catalog vacancies for `text` as VacancyMatch tuples, highest cosine similarity first."""
+        if not text or self.matrix is None:
+            return []
+        qv = self.vectorizer.transform([text])
+        if qv.nnz == 0:
+            return []
+        scores = (self.matrix @ qv.T).toarray().ravel()
+        idx = top_k_indices(scores, top_k, min_score)
+        return [VacancyMatch(self.sectors[i], self.titles[i], float(scores[i])) for i in idx]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Manage the TalentLens vacancy catalog.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="import a vacancy CSV as a new catalog version")
+    imp.add_argument("csv")
+    imp.add_argument("--sector", default="", help="sector for rows without a Sector column")
+    imp.add_argument("--full", action="store_true", help="replace the whole catalog instead of layering on the active one")
+    imp.add_argument("--activate", action="store_true")
+    act = sub.add_parser("activate", help="make a stored version the active catalog")
+    act.add_argument("version", type=int)
+    sub.add_parser("versions", help="list stored versions")
+    args = ap.parse_args(argv)
+
+    store = catalog_store()
+    if args.cmd == "import":
+        version = store.import_csv(args.csv, source=Path(args.csv).name, sector=args.sector,
+                                   base=0 if args.full else None, activate=args.activate)
+        print(f"version {version}: {len(store.signatures(version)[0])} vacancies")
+    elif args.cmd == "activate":
+        store.activate(args.version)
+    active = store.active_version()
+    for v in store.versions():
+        print(f"{'*' if v.version == active else ' '} {v.version:>4}  {v.imported_at}  {v.n_rows:>7} rows  "
+              f"parent {v.parent or '-':<4} {v.source}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# Process-wide OpenAI clients: one per (backend, API key), sharing a keep-alive HTTP pool with explicit
+# connect/read timeouts. A Backend names an OpenAI-compatible endpoint (base URL + model), so the app
+# can run against OpenAI, the bundled stand-in server (talentlens/standin_server.py) or any other.
+# Calls go through `call_with_retries()` (bounded, jittered backoff) and a per-client circuit
+# breaker, so a slow or failing API is answered by the offline fallback quickly.
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from typing import NamedTuple
+
+try:
+    from openai import OpenAI
+    import openai
+    OPENAI_AVAILABLE = True
+except Exception:
+    OpenAI = None
+    OPENAI_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except Exception:
+    HTTPX_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("TALENTLENS_LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("TALENTLENS_LLM_READ_TIMEOUT", "45"))
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5                 # seconds; attempt n waits uniform(0, base * 2**n), capped
+BACKOFF_MAX = 8.0
+BREAKER_FAILURES = 3               # consecutive transient failures that open the circuit
+BREAKER_COOLDOWN = 30.0            # seconds before a single trial request is let through
+POOL_MAX_CONNECTIONS = 32
+POOL_KEEPALIVE = 16
+DEFAULT_MODEL = "gpt-4o-mini"
+STANDIN_URL = os.getenv("TALENTLENS_STANDIN_URL", "http://127.0.0.1:8765/v1")
+
+
+class Backend(NamedTuple):
+    name: str
+    base_url: str = ""              # "" → SDK default (api.openai.com, or OPENAI_BASE_URL)
+    model: str = DEFAULT_MODEL
+    needs_key: bool = True
+
+
+BACKENDS = {
+    "OpenAI": Backend("OpenAI"),
+    "Local stand-in": Backend("Local stand-in", STANDIN_URL, "stand-in", needs_key=False),
+    "Custom (OpenAI-compatible)": Backend("Custom (OpenAI-compatible)", os.getenv("TALENTLENS_LLM_BASE_URL", ""),
+                                          os.getenv("TALENTLENS_LLM_MODEL", DEFAULT_MODEL)),
+}
+
+
+def default_backend() -> Backend:
+    """Backend named by TALENTLENS_LLM_BACKEND (default OpenAI), with TALENTLENS_LLM_MODEL overriding its model."""
+    backend = BACKENDS.get(os.getenv("TALENTLENS_LLM_BACKEND", "OpenAI"), BACKENDS["OpenAI"])
+    return backend._replace(model=os.getenv("TALENTLENS_LLM_MODEL", backend.model))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """closed → open after `failures` consecutive transient errors → half-open after `cooldown`."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures, self.cooldown = failures, cooldown
+        self._lock = threading.Lock()
+        self._count = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        """True if a request may go out; in half-open state only one trial request at a time."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._count, self._opened_at, self._trial = 0, None, False
+
+    def release_trial(self):
+        """End a half-open trial without a verdict (interrupted, or a non-transient error), so another
+        probe may go out; the consecutive-failure count is left as it is."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            self._trial = False
+            if self._count >= self.failures or self._opened_at is not None:
+                if self._opened_at is None:
+                    log.warning("LLM circuit opened after %d consecutive failures", self._count)
+                self._opened_at = time.monotonic()
+
+
+def is_transient(exc: Exception) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx are worth a retry; auth or request errors are not."""
+    if OPENAI_AVAILABLE and isinstance(exc, openai.APIConnectionError):
+        return True
+    if HTTPX_AVAILABLE and isinstance(exc, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+_BREAKERS = {}                     # id(client) → CircuitBreaker, for pooled clients
+_DEFAULT_BREAKER = CircuitBreaker()
+
+
+def breaker_for(client) -> CircuitBreaker:
+    return _BREAKERS.get(id(client), _DEFAULT_BREAKER)
+
+
+def call_with_retries(client, fn, retries: int = MAX_RETRIES):
+    """Run `fn()` under the client's circuit breaker, retrying transient errors with full-jitter backoff."""
+    breaker = breaker_for(client)
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError("LLM API unavailable (circuit open); using offline fallback.")
+        try:
+            out = fn()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.release_trial()       # a rejected request says nothing about an outage either way
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+            continue
+        except BaseException:
+            breaker.release_trial()
+            raise
+        breaker.record_success()
+        return out
+
+
+def llm_available(client) -> bool:
+    """False when there is no client or its circuit is open — callers go straight to their fallback."""
+    return client is not None and breaker_for(client).state != "open"
+
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _http_client():
+    if not HTTPX_AVAILABLE:
+        return None
+    return httpx.Client(
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_KEEPALIVE,
+                            keepalive_expiry=60.0))
+
+
+def openai_client(api_key: str, backend: Backend = None):
+    """Shared OpenAI client for (`backend`, `api_key`); None without the SDK, or without a key when the
+    backend needs one. SDK retries are disabled; retrying and circuit breaking happen in `call_with_retries()`."""
+    backend = backend or default_backend()
+    if not api_key and not backend.needs_key:
+        api_key = "stand-in"
+    if not api_key or not OPENAI_AVAILABLE:
+        return None
+    slot = hashlib.sha256(f"{backend.base_url}|{api_key}".encode("utf-8")).hexdigest()
+    client = _CLIENTS.get(slot)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(slot)
+            if client is None:
+                try:
+                    kwargs = {"api_key": api_key, "max_retries": 0, "timeout": READ_TIMEOUT}
+                    if backend.base_url:
+                        kwargs["base_url"] = backend.base_url
+                    http = _http_client()
+                    if http is not None:
+                        kwargs["http_client"] = http
+                    client = OpenAI(**kwargs)
+                except Exception:
+                    return None
+                _CLIENTS[slot] = client
+                _BREAKERS[id(client)] = CircuitBreaker()
+    return client
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Token-budgeted prompt context: count tokens with tiktoken (≈ len/4 when unavailable), merge
+# overlapping retrieved chunks, drop weak matches and fill a token budget best-evidence-first.
+
+import json
+import threading
+from typing import NamedTuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_MODEL = "gpt-4o-mini"
+QA_TOKEN_BUDGET = 3000
+NARRATIVE_TOKEN_BUDGET = 30000
+MIN_SNIPPET_SCORE = 0.05
+CHARS_PER_TOKEN = 4
+
+_ENCODINGS = {}
+_ENC_LOCK = threading.Lock()
+
+
+def _encoding(model: str = DEFAULT_MODEL):
+    """tiktoken encoding for `model`, or None if tiktoken (or its BPE file) can't be loaded; tried once."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    if model not in _ENCODINGS:
+        with _ENC_LOCK:
+            if model not in _ENCODINGS:
+                try:
+                    try:
+                        enc = tiktoken.encoding_for_model(model)
+                    except KeyError:
+                        enc = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    enc = None
+                _ENCODINGS[model] = enc
+    return _ENCODINGS[model]
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, budget: int, model: str = DEFAULT_MODEL) -> str:
+    """Longest prefix of `text` that fits in `budget` tokens."""
+    if not text or budget <= 0:
+        return ""
+    enc = _encoding(model)
+    if enc is None:
+        return text[:budget * CHARS_PER_TOKEN]
+    ids = enc.encode(text, disallowed_special=())
+    return text if len(ids) <= budget else enc.decode(ids[:budget])
+
+
+class PackedContext(NamedTuple):
+    snippets: list        # [(text, score)], best evidence first
+    tokens: int
+    candidates: int       # retrieved chunks considered
+    dropped: int          # below min_score or over budget
+
+
+def pack_spans(buffer: str, hits, budget: int = QA_TOKEN_BUDGET, min_score: float = MIN_SNIPPET_SCORE,
+               model: str = DEFAULT_MODEL) -> PackedContext:
+    """Pack (start, end, score) hits over `buffer` into at most `budget` tokens.
+
+    Hits are taken in score order. One that overlaps selected spans is coalesced with all of them into
+    a single span (only the new text costs tokens), so shared chunk overlaps are never sent twice.
+    """
+    hits = sorted(hits, key=lambda h: -h[2])
+    chosen, used, dropped = [], 0, 0           # chosen: [start, end, best score, tokens], disjoint
+    for start, end, score in hits:
+        if min_score is not None and score < min_score:
+            dropped += 1
+            continue
+        overlapping = [c for c in chosen if start < c[1] and end > c[0]]
+        new_start = min([start] + [c[0] for c in overlapping])
+        new_end = max([end] + [c[1] for c in overlapping])
+        cost = count_tokens(buffer[new_start:new_end], model)
+        freed = sum(c[3] for c in overlapping)
+        if used - freed + cost > budget:
+            dropped += 1
+            continue
+        used += cost - freed
+        if overlapping:
+            keep = overlapping[0]                  # the best-scored of them keeps its place in the order
+            keep[:] = [new_start, new_end, keep[2], cost]
+            chosen = [c for c in chosen if c is keep or c not in overlapping]
+        else:
+            chosen.append([start, end, score, cost])
+    snippets = [(buffer[a:b].strip(), float(s)) for a, b, s, _c in chosen]
+    return PackedContext(snippets, used, len(hits), dropped)
+
+
+def pack_context(index, question: str, budget: int = QA_TOKEN_BUDGET, min_score: float = MIN_SNIPPET_SCORE,
+                 top_k: int = 24, model: str = DEFAULT_MODEL) -> PackedContext:
+    """Retrieve up to `top_k` chunks from an IncrementalIndex and pack them into `budget` tokens."""
+    if not question or not index:
+        return PackedContext([], 0, 0, 0)
+    hits = index.search_spans(question, top_k=top_k)
+    return pack_spans(index.buffer, hits, budget, min_score, model)
+
+
+def _dumps(obj, sort_keys: bool) -> str:
+    return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def prefixed_messages(system: str, shared: dict, specific: dict) -> list:
+    """Chat messages laid out for provider-side prompt caching: system, then the block shared by many
+    requests (vacancy, instructions), then the request-specific block last. The shared part is serialised
+    with sorted keys, so requests that share it have a byte-identical prefix."""
+    return [{"role": "system", "content": system},
+            {"role": "user", "content": _dumps(shared, True)},
+            {"role": "user", "content": _dumps(specific, False)}]
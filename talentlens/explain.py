@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# SHAP helpers — one TreeExplainer per registered model (keyed by its uid), shared by every session in the process.
+
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import shap
+    SHAP_AVAILABLE = True
+except Exception:
+    SHAP_AVAILABLE = False
+
+from . import DATA_DIR
+
+
+class ExplainerEntry(NamedTuple):
+    explainer: object
+    expected_value: float
+
+
+_EXPLAINERS = {}
+_LOCK = threading.Lock()
+
+
+def _positive_class(values):
+    """Normalise SHAP output to the positive class (list-per-class or 3-D arrays → 2-D)."""
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim == 3:
+        values = values[:, :, -1]
+    return values
+
+
+def get_explainer(uid: str, model) -> ExplainerEntry:
+    """Return the cached explainer for the model registered as `uid`, building it on first use."""
+    entry = _EXPLAINERS.get(uid)
+    if entry is not None:
+        return entry
+    if not SHAP_AVAILABLE:
+        raise RuntimeError("shap is not installed.")
+    with _LOCK:
+        entry = _EXPLAINERS.get(uid)
+        if entry is None:
+            explainer = shap.TreeExplainer(model)
+            expected = float(np.ravel(explainer.expected_value)[-1])
+            entry = _EXPLAINERS[uid] = ExplainerEntry(explainer, expected)
+    return entry
+
+
+def drop_explainer(uid: str):
+    with _LOCK:
+        _EXPLAINERS.pop(uid, None)
+
+
+def feature_frame(feat: dict, feature_cols: list, sector: str = None) -> pd.DataFrame:
+    """One model-ready row: sector one-hot set, missing columns zero-filled, columns in model order."""
+    row = {c: 0 for c in feature_cols}
+    for k, v in (feat or {}).items():
+        if k in row:
+            row[k] = v
+    if sector:
+        for c in feature_cols:
+            if c.startswith("Sector_"): row[c] = 0
+        sec_col = f"Sector_{sector}"
+        if sec_col in row: row[sec_col] = 1
+    return pd.DataFrame([row], columns=feature_cols)
+
+
+def explain_matrix(mv, X: pd.DataFrame):
+    """SHAP values for every row of X in one call; returns (values[n, features], expected_value)."""
+    entry = get_explainer(mv.uid, mv.model)
+    return _positive_class(entry.explainer.shap_values(X)), entry.expected_value
+
+
+def explain_row(mv, row: pd.DataFrame):
+    """SHAP values for a single-row frame; returns (values[features], expected_value)."""
+    values, expected = explain_matrix(mv, row)
+    return values[0], expected
+
+
+# ---------- Global / per-sector summaries (precomputed once per model + training data) ----------
+_SUMMARIES = {}
+
+
+def model_fingerprint(model, data: pd.DataFrame = None) -> str:
+    """Deterministic hash of a fitted model and the frame it was trained on; stable across restarts."""
+    h = hashlib.sha1(pickle.dumps(model, protocol=4))
+    if data is not None:
+        h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        h.update("|".join(map(str, data.columns)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def summary_key(mv) -> str:
+    return mv.fingerprint[:20]
+
+
+def summary_dir() -> Path:
+    return DATA_DIR / "shap"
+
+
+def summary_path(mv) -> Path:
+    return summary_dir() / f"{summary_key(mv)}.npz"
+
+
+def prune_shap_summaries(keep) -> int:
+    """Delete stored summaries of every version not in `keep`; returns how many files went."""
+    wanted = {summary_key(mv) for mv in keep}
+    removed = 0
+    for key in [k for k in _SUMMARIES if k not in wanted]:
+        _SUMMARIES.pop(key, None)
+    for path in summary_dir().glob("*.npz") if summary_dir().is_dir() else ():
+        if path.name.split(".", 1)[0] not in wanted:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass            # another process may still be reading it; the next prune retries
+    return removed
+
+
+def compute_shap_summary(mv, X: pd.DataFrame, sectors) -> dict:
+    """Mean |SHAP| (global + per sector) and a sample of raw values for beeswarm/dependence plots."""
+    values, expected = explain_matrix(mv, X)
+    sectors = np.asarray(sectors).astype(str)
+    names = np.unique(sectors)
+    codes = np.searchsorted(names, sectors)
+    abs_vals = np.abs(values)
+    sector_mean = np.vstack([abs_vals[codes == i].mean(axis=0) for i in range(len(names))])
+    return {
+        "features": np.asarray(X.columns, dtype=str),
+        "expected_value": np.float32(expected),
+        "global_mean_abs": abs_vals.mean(axis=0).astype(np.float32),
+        "sectors": names,
+        "sector_mean_abs": sector_mean.astype(np.float32),
+        "sample_values": values.astype(np.float32),
+        "sample_data": X.to_numpy(dtype=np.float32),
+        "sample_sector": codes.astype(np.int16),
+    }
+
+
+def save_shap_summary(mv, summary: dict) -> Path:
+    path = summary_path(mv)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.stem + ".tmp.npz")
+    np.savez_compressed(tmp, **summary)
+    os.replace(tmp, path)
+    _SUMMARIES[summary_key(mv)] = summary
+    return path
+
+
+def load_shap_summary(mv):
+    """Return the summary for `mv` from memory or disk, or None while it is still being computed."""
+    key = summary_key(mv)
+    if key in _SUMMARIES:
+        return _SUMMARIES[key]
+    path = summary_path(mv)
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        summary = {k: npz[k] for k in npz.files}
+    _SUMMARIES[key] = summary
+    return summary
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Text extraction for CVs, letters and vacancies (PDF via pdfminer → pypdf → OCR, DOCX, plain text).
+# Everything works on raw bytes plus explicit OCR options, so it can run in worker processes.
+
+import io
+from typing import NamedTuple
+
+try:
+    from pdfminer.high_level import extract_text as pdf_extract_text
+except Exception:
+    pdf_extract_text = None
+
+try:
+    import docx
+except Exception:
+    docx = None
+
+# OCR deps (optional)
+try:
+    from pdf2image import convert_from_bytes
+    import pytesseract
+    from PIL import ImageOps
+    OCR_AVAILABLE = True
+except Exception:
+    OCR_AVAILABLE = False
+
+# Extra PDF fallback
+try:
+    import pypdf
+    PYPDF_OK = True
+except Exception:
+    PYPDF_OK = False
+
+
+class OcrOptions(NamedTuple):
+    enabled: bool = False
+    ui_lang: str = "en"
+    lang_label: str = "Auto (based on UI language)"
+    max_pages: int = 5
+    poppler_bin: str = ""
+    dpi: int = 300
+    psm_label: str = "3 - Fully auto"
+    tesseract_cmd: str = ""
+
+
+def tess_lang_code(ui_lang: str, override_label: str) -> str:
+    if override_label.startswith("English"): return "eng"
+    if override_label.startswith("Dutch"): return "nld"
+    return "nld" if str(ui_lang).lower().startswith("nl") else "eng"
+
+
+def tess_psm_value(psm_label: str) -> int:
+    try:
+        return int(psm_label.split(" - ", 1)[0].strip())
+    except Exception:
+        return 3
+
+
+def preprocess_for_ocr(img):
+    try:
+        gray = img.convert("L")
+        gray = ImageOps.autocontrast(gray)
+        return gray.point(lambda p: 255 if p > 180 else 0)
+    except Exception:
+        return img
+
+
+def ocr_pdf_bytes(pdf_bytes: bytes, opts: OcrOptions = OcrOptions()) -> str:
+    if not OCR_AVAILABLE or not pdf_bytes:
+        return ""
+    try:
+        if opts.tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = opts.tesseract_cmd
+        kwargs = dict(fmt="png", first_page=1, last_page=opts.max_pages, dpi=int(opts.dpi))
+        if opts.poppler_bin:
+            kwargs["poppler_path"] = opts.poppler_bin
+        images = convert_from_bytes(pdf_bytes, **kwargs)
+        tess_lang = tess_lang_code(opts.ui_lang, opts.lang_label)
+        config = f"--psm {tess_psm_value(opts.psm_label)}"
+        texts = []
+        for img in images:
+            base = preprocess_for_ocr(img)
+            cand_texts = []
+            for rot in (0, 90, 270):
+                try:
+                    img_rot = base if rot == 0 else base.rotate(rot, expand=True)
+                    cand_texts.append(pytesseract.image_to_string(img_rot, lang=tess_lang, config=config))
+                except Exception:
+                    cand_texts.append("")
+            texts.append(max(cand_texts, key=lambda s: len(s or "")))
+        return "\n".join(texts)
+    except Exception:
+        return ""
+
+
+def docx_text(data: bytes) -> str:
+    if docx is None or not data: return ""
+    try: return "\n".join(p.text for p in docx.Document(io.BytesIO(data)).paragraphs)
+    except Exception: return ""
+
+
+def pdf_text(data: bytes, opts: OcrOptions = OcrOptions()) -> str:
+    """pdfminer first, pypdf when that yields (almost) nothing, OCR when enabled or still empty."""
+    if not data: return ""
+    text = ""
+
+    # A) pdfminer
+    if pdf_extract_text is not None:
+        try: text = pdf_extract_text(io.BytesIO(data)) or ""
+        except Exception: text = ""
+
+    # B) PyPDF fallback
+    if (not text or len(text.strip()) < 60) and PYPDF_OK:
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(data))
+            if getattr(reader, "is_encrypted", False):
+                try: reader.decrypt("")
+                except Exception: pass
+            parts = []
+            for page in reader.pages[:15]:
+                try: parts.append(page.extract_text() or "")
+                except Exception: parts.append("")
+            alt = "\n".join(parts).strip()
+            if len(alt) > len(text): text = alt
+        except Exception:
+            pass
+
+    # C) OCR fallback
+    if (opts.enabled or len(text.strip()) < 60) and OCR_AVAILABLE:
+        ocr_text = ocr_pdf_bytes(data, opts)
+        if len((ocr_text or "").strip()) > len(text.strip()):
+            text = ocr_text
+
+    return text or ""
+
+
+def file_text(name: str, data: bytes, opts: OcrOptions = OcrOptions()) -> str:
+    """Text of one uploaded file, dispatched on its extension."""
+    name = (name or "").lower()
+    if name.endswith(".pdf"): return pdf_text(data, opts)
+    if name.endswith(".docx"): return docx_text(data)
+    try: return (data or b"").decode("utf-8", errors="ignore")
+    except Exception: return ""
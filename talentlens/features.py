@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# NLP feature engineering for the success model: experience, skills, sentiment, emotions, culture fit
+# and education from CV text. Pure functions of their inputs, so batches can run in a process pool.
+
+import datetime
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Optional deps
+try:
+    from transformers import pipeline
+    TRANSFORMERS_AVAILABLE = True
+except Exception:
+    TRANSFORMERS_AVAILABLE = False
+
+from .extract import OcrOptions, file_text
+
+
+@lru_cache(maxsize=1)
+def _sentiment_pipeline():
+    # Loaded once per process instead of on every call
+    return pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
+
+
+def basic_clean(text: str): return re.sub(r"\s+", " ", text or "").strip()
+
+
+def detect_years_experience(text: str) -> int:
+    """Estimate realistic years of experience with contextual filtering."""
+    if not text:
+        return 0
+
+    t = text.lower()
+    yrs = 0
+
+    # --- Context-based pattern (stronger weight when 'experience' nearby) ---
+    context_matches = re.findall(
+        r"(?:over|about|around|approximately|up to)?\s*(\d{1,2})\s*(?:\+?\s*)?(?:years?|yrs?)\s*(?:of\s+)?(?:work|experience|career)?",
+        t,
+    )
+    if context_matches:
+        yrs = max(int(x) for x in context_matches if x.isdigit())
+
+    # --- If no explicit phrase found, try a 'since YEAR' or range heuristic ---
+    if yrs == 0:
+        # e.g., "since 2014", "2015–2022"
+        years = re.findall(r"(19|20)\d{2}", t)
+        if len(years) >= 2:
+            yrs = max(0, min(int(max(years)) - int(min(years)), 40))
+        elif years:
+            yrs = max(0, min(datetime.datetime.now().year - int(years[0]), 40))
+        else:
+            yrs = 0
+
+    # --- Sanity limits ---
+    if yrs < 0:
+        yrs = 0
+    yrs = int(np.clip(yrs, 0, 20))  # limit to 20 years max realistic value
+    return yrs
+
+
+SKILL_VOCAB = {
+"Data Analyst":["Python","SQL","PowerBI","Tableau","Statistics","ETL","Pandas","Numpy","Visualization","Dashboards"],
+"Data Engineer":["Python","SQL","ETL","Airflow","Cloud","Pandas","Spark"],
+"Software Developer":["Python","JavaScript","Git","APIs","Testing","CI/CD"],
+"HR Consultant":["Recruitment","Policy","HRIS","Stakeholder","Coaching","Onboarding","Compensation","Benefits","Compliance","Communication"],
+"Recruiter":["Sourcing","Screening","Interviewing","ATS","EmployerBranding","LinkedIn"],
+"Marketing Manager":["Campaigns","Brand","SEO","SEM","Content","Copywriting","Analytics","Social","Leadership","Strategy"],
+"Content Marketer":["Copywriting","SEO","Analytics","Social","CMS","Content"],
+"Logistics Planner":["Planning","WMS","Excel","Communication","Problem-solving"],
+"Supply Chain Analyst":["SQL","Forecasting","PowerBI","ERP","Inventory"],
+"Financial Controller":["Accounting","Excel","Reporting","IFRS","Analysis"],
+"Business Analyst":["Modelling","SQL","PowerBI","Stakeholder","Budgeting"],
+"Account Manager":["Prospecting","Negotiation","CRM","Forecasting","Presentation"],
+"Mechanical Engineer":["CAD","FEA","Materials","Testing","Manufacturing"],
+"Legal Counsel":["Contract","Compliance","GDPR","Negotiation","Advisory"],
+"Healthcare Administrator":["EMR","Scheduling","Compliance","Communication","Billing"]}
+
+
+def detect_skills(text: str, role: str) -> float:
+    vocab = SKILL_VOCAB.get(role, [])
+    if not text or not vocab: return 0.0
+    found = sum(1 for kw in vocab if re.search(r"\b"+re.escape(kw)+r"\b", text, re.I))
+    return found / len(vocab)
+
+
+EMOTION_LEX = {
+"joy":["happy","delight","enjoy","excited","proud","satisfied","enthusiastic","passion"],
+"trust":["trust","reliable","integrity","dependable","responsible","commitment"],
+"anticipation":["eager","looking forward","anticipate","expect","curious","aspire","ambition"],
+"surprise":["surprise","unexpected","discovery","novel","breakthrough"],
+"sadness":["sad","regret","unhappy","disappointed","loss","depress"],
+"anger":["angry","frustrated","upset","annoyed","irritated"],
+"fear":["afraid","fear","concern","worried","anxious","risk"],
+"disgust":["disgust","gross","repulsed","unethical","unfair"]}
+
+
+def emotion_vector(text: str) -> dict:
+    t = (text or "").lower(); vec = {}
+    for emo, kws in EMOTION_LEX.items():
+        hits = sum(len(re.findall(r"\b"+re.escape(kw)+r"\b", t)) for kw in kws)
+        vec[emo] = min(hits/10.0, 1.0)
+    return vec
+
+
+def sentiment_score(text: str) -> float:
+    if text is None or len(text)<20: return 0.5
+    if TRANSFORMERS_AVAILABLE:
+        try:
+            pipe = _sentiment_pipeline()
+            res = pipe(text[:1500])[0]; label = res.get("label","NEU").upper(); score = res.get("score",0.5)
+            if label.startswith("POS"): return float(np.clip(0.6+0.4*score,0,1))
+            if label.startswith("NEG"): return float(np.clip(0.4-0.4*score,0,1))
+            return 0.5
+        except Exception:
+            pass
+    pos = len(re.findall(r"\b(excellent|achieved|improved|growth|success|impact|passion|motiv)\w*\b", text.lower()))
+    neg = len(re.findall(r"\b(problem|issue|failure|struggle|weak)\w*\b", text.lower()))
+    return float(np.clip(0.5+0.03*(pos-neg),0,1))
+
+
+def culture_fit_score(text: str, value_words: list) -> float:
+    if not text or not value_words: return 0.5
+    hits = sum(1 for w in value_words if re.search(r"\b"+re.escape(w)+r"\b", text, re.I))
+    return hits/max(len(value_words),1)
+
+
+def education_level_from_text(text: str) -> str:
+    t = (text or "").lower()
+    if re.search(r"\bwo\b|\bmaster\b|\bmsc\b|\buniversity\b|\buniversiteit\b", t): return "WO"
+    if re.search(r"\bhbo\b|\bbachelor\b", t): return "HBO"
+    if re.search(r"\bmbo\b", t): return "MBO"
+    return "HBO"
+
+
+def build_feature_row(role: str, combined_text: str, vacancy_row: dict, sector: str=None):
+    yrs = detect_years_experience(combined_text)
+    mot = sentiment_score(combined_text)
+    skill = detect_skills(combined_text, role)
+    fit = culture_fit_score(combined_text, vacancy_row.get("ValueWords", []))
+    emo = emotion_vector(combined_text)
+    emo_pos = (emo.get("joy",0)+emo.get("trust",0)+emo.get("anticipation",0)+emo.get("surprise",0))/4.0
+    emo_neg = (emo.get("sadness",0)+emo.get("anger",0)+emo.get("fear",0)+emo.get("disgust",0))/4.0
+    edu = education_level_from_text(combined_text)
+    return {
+        "ExperienceYears":yrs,"MotivationScore":mot,"SkillMatch":skill,"CultureFit":fit,"SentimentScore":mot,
+        "EmotionPos":float(emo_pos),"EmotionNeg":float(emo_neg),
+        "EducationLevel_HBO":1 if edu=="HBO" else 0,"EducationLevel_WO":1 if edu=="WO" else 0
+    }
+
+
+def cv_corpus(fname: str, cv_text: str, vacancy_txt: str = "", cover_letter_text: str = "") -> str:
+    """Per-CV corpus: matched vacancy + this CV + optional cover letter, whitespace-normalised."""
+    vacancy_section = f"\n\n### VACANCY MATCHED CONTEXT\n{vacancy_txt}\n" if vacancy_txt else ""
+    cl_section = f"\n\n### COVER LETTER\n{cover_letter_text}\n" if cover_letter_text else ""
+    return basic_clean((vacancy_section + f"\n\n### FILE: {fname}\n{cv_text}" + cl_section).strip())
+
+
+def prepare_cv(fname: str, data: bytes, role: str, vacancy_row: dict, vacancy_txt: str = "",
+               cover_letter_text: str = "", ocr: OcrOptions = OcrOptions()) -> dict:
+    """CPU stage of a batch narrative: extract one CV, build its corpus and feature row."""
+    cv_text = file_text(fname, data, ocr)
+    corpus_text = cv_corpus(fname, cv_text, vacancy_txt, cover_letter_text)
+    return {"filename": fname, "cv_text": cv_text, "corpus_text": corpus_text,
+            "features": build_feature_row(role, corpus_text, vacancy_row or {})}
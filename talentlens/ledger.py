@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# LLM usage ledger — one row per LLM call (call site, tokens, latency, cache hit/miss, estimated cost),
+# kept in memory for the whole process and filterable per session, so the calls that dominate
+# spend and wait time can be found and exported.
+
+import csv
+import io
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+MAX_ENTRIES = 50_000
+
+# USD per 1M tokens: (input, output). Unknown models are costed at 0. Prompt tokens served from the
+# provider's prompt cache are billed at CACHED_INPUT_FACTOR of the input price.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+BATCH_DISCOUNT = 0.5
+CACHED_INPUT_FACTOR = 0.5
+
+
+class LedgerEntry(NamedTuple):
+    ts: float
+    session: str
+    site: str                 # narrative / qa / questions / bias / narrative.map / batch.job ...
+    model: str
+    cache: str                # hit / miss / off
+    status: str               # ok, or the exception type
+    prompt_tokens_est: int    # tiktoken pre-count
+    prompt_tokens: int        # API usage (pre-count when the API reports none)
+    cached_tokens: int        # part of prompt_tokens served from the provider's prompt cache
+    completion_tokens: int
+    latency_ms: float
+    ttft_ms: float            # streaming only; 0 otherwise
+    cost_usd: float
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, batch: bool = False,
+                  cached_tokens: int = 0) -> float:
+    price_in, price_out = next((p for m, p in sorted(PRICES.items(), key=lambda kv: -len(kv[0]))
+                                if model == m or model.startswith(m + "-")), (0.0, 0.0))
+    cached = min(cached_tokens, prompt_tokens)
+    cost = ((prompt_tokens - cached) * price_in + cached * price_in * CACHED_INPUT_FACTOR
+            + completion_tokens * price_out) / 1e6
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+def _no_session() -> str:
+    return ""
+
+
+class Ledger:
+    """Thread-safe ring buffer of LedgerEntry rows for the process."""
+
+    def __init__(self, maxlen: int = MAX_ENTRIES):
+        self._rows = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.session_resolver = _no_session
+
+    def record(self, site: str, model: str, cache: str, status: str, prompt_tokens_est: int,
+               prompt_tokens: int = None, completion_tokens: int = 0, latency_ms: float = 0.0,
+               ttft_ms: float = 0.0, batch: bool = False, session: str = None,
+               cached_tokens: int = 0) -> LedgerEntry:
+        prompt_tokens = prompt_tokens_est if prompt_tokens is None else prompt_tokens
+        cached_tokens = int(cached_tokens or 0)
+        cost = 0.0 if cache == "hit" else estimate_cost(model, prompt_tokens, completion_tokens, batch, cached_tokens)
+        if session is None:
+            try:
+                session = self.session_resolver() or ""
+            except Exception:
+                session = ""
+        entry = LedgerEntry(time.time(), session, site or "other", model, cache, status, int(prompt_tokens_est),
+                            int(prompt_tokens), cached_tokens, int(completion_tokens), round(latency_ms, 1),
+                            round(ttft_ms, 1), cost)
+        with self._lock:
+            self._rows.append(entry)
+        return entry
+
+    def entries(self, session: str = None) -> list:
+        with self._lock:
+            rows = list(self._rows)
+        return rows if session is None else [r for r in rows if r.session == session]
+
+    def summary(self, session: str = None) -> list:
+        """Per call site: calls, cache hits, errors, tokens, cost and latency percentiles (slowest/costliest first)."""
+        groups = {}
+        for r in self.entries(session):
+            groups.setdefault(r.site, []).append(r)
+        out = []
+        for site, rows in groups.items():
+            lat = sorted(r.latency_ms for r in rows if r.cache != "hit" and r.status == "ok")
+            out.append({
+                "site": site, "calls": len(rows), "cache_hits": sum(r.cache == "hit" for r in rows),
+                "errors": sum(r.status != "ok" for r in rows),
+                "prompt_tokens": sum(r.prompt_tokens for r in rows),
+                "cached_tokens": sum(r.cached_tokens for r in rows),
+                "completion_tokens": sum(r.completion_tokens for r in rows),
+                "cost_usd": round(sum(r.cost_usd for r in rows), 6),
+                "latency_p50_ms": lat[len(lat) // 2] if lat else 0.0,
+                "latency_p95_ms": lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else 0.0,
+                "wait_total_s": round(sum(r.latency_ms for r in rows) / 1000, 2),
+            })
+        return sorted(out, key=lambda d: (-d["cost_usd"], -d["wait_total_s"]))
+
+    def to_csv(self, session: str = None) -> str:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(LedgerEntry._fields)
+        writer.writerows(self.entries(session))
+        return buf.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+_LEDGER = Ledger()
+
+
+def ledger() -> Ledger:
+    return _LEDGER
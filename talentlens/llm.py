@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# Central LLM entry point. Every chat completion goes through `complete()`, which serves identical
+# requests (model, messages, temperature, max_tokens) from a host-wide SQLite cache with TTL.
+# Each call is recorded in the usage ledger (talentlens/ledger.py) under its call site.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from . import DATA_DIR
+from .client import call_with_retries
+from .context import count_tokens
+from .ledger import ledger
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+REQUESTS_PER_MINUTE = int(os.getenv("TALENTLENS_LLM_RPM", "500"))
+TOKENS_PER_MINUTE = int(os.getenv("TALENTLENS_LLM_TPM", "200000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_hit REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_responses_expires ON responses(expires_at);
+CREATE INDEX IF NOT EXISTS ix_responses_last_hit ON responses(last_hit);
+"""
+
+
+def cache_key(model: str, messages, temperature: float, max_tokens: int) -> str:
+    raw = json.dumps({"model": model, "messages": messages, "temperature": float(temperature),
+                      "max_tokens": int(max_tokens)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite response cache shared by every session (and process) on the host."""
+
+    def __init__(self, path=None, ttl: float = CACHE_TTL_SECONDS, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = Path(path or DATA_DIR / "llm_cache.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(_SCHEMA)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock, self._con:
+            row = self._con.execute("SELECT content, created_at FROM responses WHERE key = ? AND expires_at > ?",
+                                    (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._con.execute("UPDATE responses SET last_hit = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+        log.info("LLM cache hit %s (age %.0fs)", key[:12], now - row[1])
+        return row[0]
+
+    def put(self, key: str, model: str, content: str):
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, expires_at, last_hit, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)", (key, model, content, size, now, now + self.ttl, now))
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired rows, then least recently used rows until the cache fits `max_bytes`."""
+        self._con.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = self._con.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed, doomed = 0, []
+        for key, size in self._con.execute("SELECT key, size FROM responses ORDER BY last_hit"):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._con.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, size = self._con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": n, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM responses")
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def response_cache() -> ResponseCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache()
+    return _CACHE
+
+
+def use_response_cache(cache: ResponseCache):
+    """Replace the host-wide cache, e.g. with a throwaway one for benchmarks."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = cache
+
+
+# ---------- Rate limiting: token buckets for requests and tokens per minute ----------
+class RateLimiter:
+    """Two token buckets (requests/min, tokens/min) shared by every thread in the process."""
+
+    def __init__(self, requests_per_minute: int = REQUESTS_PER_MINUTE, tokens_per_minute: int = TOKENS_PER_MINUTE):
+        self._lock = threading.Lock()
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(self, requests_per_minute: int, tokens_per_minute: int):
+        with self._lock:
+            self.rpm, self.tpm = max(1, int(requests_per_minute)), max(1, int(tokens_per_minute))
+            self._requests, self._tokens = float(self.rpm), float(self.tpm)
+            self._stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._stamp
+        self._stamp = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request and `tokens` tokens are available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                need = min(float(tokens), self.tpm)
+                self._refill(time.monotonic())
+                if self._requests >= 1 and self._tokens >= need:
+                    self._requests -= 1
+                    self._tokens -= need
+                    return waited
+                wait = max((1 - self._requests) * 60.0 / self.rpm, (need - self._tokens) * 60.0 / self.tpm)
+            wait = min(max(wait, 0.01), 1.0)
+            time.sleep(wait)
+            waited += wait
+
+
+_LIMITER = RateLimiter()
+
+
+def rate_limiter() -> RateLimiter:
+    return _LIMITER
+
+
+def prompt_tokens(messages, model: str = DEFAULT_MODEL) -> int:
+    return sum(count_tokens(str(m.get("content", "")), model) for m in messages)
+
+
+def estimate_tokens(messages, max_tokens: int, model: str = DEFAULT_MODEL) -> int:
+    """Prompt tokens plus the completion allowance — what a request can cost against the TPM limit."""
+    return prompt_tokens(messages, model) + int(max_tokens)
+
+
+def _usage(usage):
+    """(prompt_tokens, completion_tokens, cached_tokens) reported by the API, or (None, None, 0)."""
+    if usage is None:
+        return None, None, 0
+    cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None) or 0
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None), cached
+
+
+def _elapsed_ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000
+
+
+def complete(client, messages, model: str = DEFAULT_MODEL, temperature: float = 0.4,
+             max_tokens: int = 700, use_cache: bool = True, site: str = "") -> str:
+    """Chat completion text for `messages`; served from the response cache when an identical request was made."""
+    t0 = time.perf_counter()
+    key = cache_key(model, messages, temperature, max_tokens)
+    est = prompt_tokens(messages, model)
+    cache = response_cache() if use_cache else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            ledger().record(site, model, "hit", "ok", est, 0, 0, _elapsed_ms(t0))
+            return hit
+    if client is None:
+        raise RuntimeError("No LLM client configured.")
+    state = "miss" if cache is not None else "off"
+    rate_limiter().acquire(est + int(max_tokens))
+    try:
+        out = call_with_retries(client, lambda: client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens))
+    except Exception as e:
+        ledger().record(site, model, state, type(e).__name__, est, latency_ms=_elapsed_ms(t0))
+        raise
+    content = out.choices[0].message.content or ""
+    p_tok, c_tok, cached = _usage(getattr(out, "usage", None))
+    ledger().record(site, model, state, "ok", est, p_tok, c_tok if c_tok is not None else count_tokens(content, model),
+                    _elapsed_ms(t0), cached_tokens=cached)
+    if cache is not None and content:
+        cache.put(key, model, content)
+    return content
+
+
+def stream_complete(client, messages, model: str = DEFAULT_MODEL, temperature: float = 0.4,
+                    max_tokens: int = 700, use_cache: bool = True, site: str = ""):
+    """Like complete(), but yields text deltas as they arrive; the assembled text is cached once finished.
+
+    A cache hit yields the whole stored answer at once.
+    """
+    t0 = time.perf_counter()
+    key = cache_key(model, messages, temperature, max_tokens)
+    est = prompt_tokens(messages, model)
+    cache = response_cache() if use_cache else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            ledger().record(site, model, "hit", "ok", est, 0, 0, _elapsed_ms(t0), _elapsed_ms(t0))
+            yield hit
+            return
+    if client is None:
+        raise RuntimeError("No LLM client configured.")
+    state = "miss" if cache is not None else "off"
+    rate_limiter().acquire(est + int(max_tokens))
+    parts, usage, first, status = [], None, 0.0, "ok"
+    try:
+        stream = call_with_retries(client, lambda: client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True,
+            stream_options={"include_usage": True}))
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                first = first or _elapsed_ms(t0)
+                parts.append(delta)
+                yield delta
+    except GeneratorExit:
+        status = "aborted"
+        raise
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        content = "".join(parts)
+        p_tok, c_tok, cached = _usage(usage)
+        ledger().record(site, model, state, status, est, p_tok,
+                        c_tok if c_tok is not None else count_tokens(content, model), _elapsed_ms(t0), first,
+                        cached_tokens=cached)
+    if cache is not None and content:
+        cache.put(key, model, content)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Map-reduce narratives: every CV / cover letter section is summarised once (cached by content hash,
+# independent of the vacancy), and the final narrative is written from those summaries.
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import DATA_DIR
+from .context import DEFAULT_MODEL, NARRATIVE_TOKEN_BUDGET, count_tokens, prefixed_messages, truncate_tokens
+from .llm import complete
+from .retrieval import split_sections
+
+SUMMARY_PROMPT_VERSION = 1
+SECTION_TOKEN_BUDGET = 12000       # per-section input cap for the map step
+MAP_REDUCE_MIN_TOKENS = 8000       # "auto" switches to map-reduce above this corpus size
+NARRATIVE_MODES = ("Auto", "Single pass", "Map-reduce")
+
+MAP_SYSTEM = (
+    "You summarise one recruitment document (a CV or a cover letter) for a recruiter. "
+    "Be factual and specific; do not judge fit for any vacancy. "
+    "If 'lang' == 'nl' respond in Dutch; otherwise English."
+)
+SYSTEM = (
+    "You are a bilingual recruitment copilot. "
+    "Use only the provided CONTEXT to write your answer. "
+    "If the context is insufficient, say so. Keep tone professional, fair, and specific. "
+    "If 'lang' == 'nl' respond in Dutch; otherwise English."
+)
+NARRATIVE_INSTRUCTIONS = ("Write a 6–10 bullet executive narrative of the candidate based on CONTEXT. "
+                          "Cover: core profile, key achievements, relevant skills vs. vacancy, culture/value alignment, "
+                          "risks/gaps, and recommendation. Ground claims with 'In the CV...' or 'In the letter...' "
+                          "when appropriate.")
+QA_INSTRUCTIONS = ("Answer strictly from the retrieved snippets below. "
+                   "If uncertain, say you can't find it. Use concise bullets when helpful.")
+MAP_INSTRUCTIONS = ("In at most 200 words cover: current/last role, career history with dates, key achievements, "
+                    "skills and tools, education, languages, motivation and values signals, and notable gaps.")
+
+
+def _is_vacancy(section: str) -> bool:
+    return section.startswith("### VACANCY MATCHED CONTEXT")
+
+
+def section_label(section: str, width: int = 60) -> str:
+    head = section[4:] if section.startswith("### ") else section
+    return head[:width].strip()
+
+
+def candidate_sections(corpus_text: str):
+    """CV / cover-letter sections of a corpus; the vacancy goes to the reduce step, not the map step."""
+    return [s for s in split_sections(corpus_text) if not _is_vacancy(s)]
+
+
+def vacancy_section(corpus_text: str) -> str:
+    return next((s for s in split_sections(corpus_text) if _is_vacancy(s)), "")
+
+
+def use_map_reduce(corpus_text: str, mode: str = "Auto", model: str = DEFAULT_MODEL) -> bool:
+    if mode == "Map-reduce":
+        return True
+    if mode == "Single pass":
+        return False
+    return len(candidate_sections(corpus_text)) > 1 or count_tokens(corpus_text, model) > MAP_REDUCE_MIN_TOKENS
+
+
+def summary_key(section: str, lang: str, model: str = DEFAULT_MODEL) -> str:
+    raw = f"{SUMMARY_PROMPT_VERSION}|{model}|{lang}|{section}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """One small JSON file per section summary, sharded by key prefix."""
+
+    def __init__(self, root=None):
+        self.root = Path(root or DATA_DIR / "summaries")
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["summary"]
+        except Exception:
+            return None
+
+    def put(self, key: str, summary: str, source: str = ""):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "source": source,
+                       "created_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def summarise_section(client, section: str, lang: str, model: str = DEFAULT_MODEL) -> str:
+    user = {"lang": lang, "task": "summarise_document", "instructions": MAP_INSTRUCTIONS,
+            "DOCUMENT": truncate_tokens(section, SECTION_TOKEN_BUDGET, model)}
+    messages = [{"role": "system", "content": MAP_SYSTEM}, {"role": "user", "content": json.dumps(user)}]
+    return complete(client, messages, model=model, temperature=0.2, max_tokens=400, site="narrative.map").strip()
+
+
+def map_sections(client, corpus_text: str, lang: str, model: str = DEFAULT_MODEL,
+                 store: SummaryStore = None, max_workers: int = 4):
+    """Summaries for every candidate section, in corpus order: [{"source", "summary", "cached"}].
+
+    Cached summaries are reused as-is; the rest are requested concurrently. A section whose
+    summary request fails falls back to its (truncated) raw text and is not cached.
+    """
+    store = store or SummaryStore()
+    sections = candidate_sections(corpus_text)
+    keys = [summary_key(s, lang, model) for s in sections]
+    cached = [store.get(k) for k in keys]
+    todo = [i for i, c in enumerate(cached) if c is None]
+
+    def _run(i):
+        try:
+            summary = summarise_section(client, sections[i], lang, model)
+            store.put(keys[i], summary, section_label(sections[i]))
+            return summary
+        except Exception:
+            return truncate_tokens(sections[i], 1500, model)
+
+    fresh = {}
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+            fresh = dict(zip(todo, pool.map(_run, todo)))
+    return [{"source": section_label(s), "summary": cached[i] if cached[i] is not None else fresh[i],
+             "cached": cached[i] is not None} for i, s in enumerate(sections)]
+
+
+def build_messages(client, lang, role, prob, feat_dict, vacancy_row, question=None, corpus_text=None,
+                   retrieved=None, narrative_mode: str = "Auto", model: str = DEFAULT_MODEL,
+                   token_budget: int = NARRATIVE_TOKEN_BUDGET, store: SummaryStore = None) -> list:
+    """Chat messages for a narrative (no question) or a grounded Q&A answer; the map step may call the LLM.
+
+    Layout: system → shared block (same for every CV of a vacancy) → candidate block. Keeping the shared
+    part first and byte-identical lets the provider serve it from its prompt cache in batches.
+    """
+    corpus_text = corpus_text or ""
+    if not (question or "").strip():
+        map_reduce = use_map_reduce(corpus_text, narrative_mode, model)
+        shared = {
+            "lang": lang, "task": "narrative", "role": role, "vacancy": vacancy_row,
+            "instructions": NARRATIVE_INSTRUCTIONS + (" CONTEXT holds one summary per source document."
+                                                      if map_reduce else ""),
+            "VACANCY_CONTEXT": truncate_tokens(vacancy_section(corpus_text), 2000, model),
+        }
+        if map_reduce:
+            # One cached summary per CV / letter (vacancy-independent), then the narrative from those
+            context = [{"source": s["source"], "summary": s["summary"]}
+                       for s in map_sections(client, corpus_text, lang, model=model, store=store)]
+        else:
+            context = truncate_tokens("\n\n".join(candidate_sections(corpus_text)), int(token_budget), model)
+        specific = {"probability": prob, "features": feat_dict, "CONTEXT": context}
+    else:
+        shared = {"lang": lang, "task": "qa", "role": role, "instructions": QA_INSTRUCTIONS}
+        specific = {
+            "RETRIEVED_SNIPPETS": "\n\n---\n\n".join(c for c, _s in (retrieved or [])),   # fitted by pack_context
+            "question": question,
+        }
+    return prefixed_messages(SYSTEM, shared, specific)
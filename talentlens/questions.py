@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Interview-question bank — questions are generated once per (role, vacancy text, language),
+# persisted to disk and reused for every candidate and session until explicitly regenerated.
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from . import DATA_DIR
+from .llm import DEFAULT_MODEL, complete
+
+QUESTION_SYSTEM = "You are an expert HR recruiter creating contextual interview questions."
+
+
+def default_questions(role_name: str):
+    return [
+        f"What motivated you to apply for the {role_name} position?",
+        "Which skills make you a strong fit for this role?",
+        "Describe a past experience that shows your competence.",
+        "How do you collaborate with others at work?",
+        "What about our company culture appeals to you?",
+        "Where do you see your growth potential?",
+        "Imagine getting this job — what would you change or optimize first?",
+    ]
+
+
+def generate_questions(client, vac_text: str, role_name: str, lang: str = "en", fresh: bool = False,
+                       model: str = DEFAULT_MODEL):
+    """6–8 recruiter-grade questions from the LLM; `fresh` bypasses the response cache. Raises on failure."""
+    prompt = f"""
+    You are a professional recruiter. Generate 6–8 open-ended, high-quality assessment questions covering:
+    1. Motivation / ambition
+    2. Technical / role-fit skills
+    3. Experience relevance
+    4. Behavioral & social dynamics
+    5. Cultural alignment
+    6. Growth / potential
+    7. A reflective 'what-if' scenario
+    Role: {role_name}
+    Language: {"Dutch" if lang == "nl" else "English"}
+    VACANCY:
+    {(vac_text or "")[:2500]}
+    """
+    txt = complete(client, [{"role": "system", "content": QUESTION_SYSTEM}, {"role": "user", "content": prompt}],
+                   model=model, temperature=0.6, max_tokens=600, use_cache=not fresh,
+                   site="questions")
+    questions = [q.strip("1234567890. ").strip() for q in txt.split("\n") if len(q.strip()) > 10]
+    if not questions:
+        raise ValueError("No questions in the model output.")
+    return questions[:8]
+
+
+def vacancy_hash(vac_text: str) -> str:
+    return hashlib.sha1(re.sub(r"\s+", " ", vac_text or "").strip().encode("utf-8")).hexdigest()[:16]
+
+
+def bank_key(role: str, vac_text: str, lang: str) -> str:
+    return f"{lang}|{role}|{vacancy_hash(vac_text)}"
+
+
+class QuestionBank:
+    """Question sets in one JSON file, loaded once and rewritten atomically on every change."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DATA_DIR / "question_bank.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except Exception:
+            self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, role: str, vac_text: str, lang: str):
+        entry = self._entries.get(bank_key(role, vac_text, lang))
+        return list(entry["questions"]) if entry else None
+
+    def entry(self, role: str, vac_text: str, lang: str):
+        return self._entries.get(bank_key(role, vac_text, lang))
+
+    def put(self, role: str, vac_text: str, lang: str, questions):
+        with self._lock:
+            self._entries[bank_key(role, vac_text, lang)] = {
+                "role": role, "lang": lang, "vacancy_hash": vacancy_hash(vac_text),
+                "questions": list(questions), "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+
+_BANK = None
+_BANK_LOCK = threading.Lock()
+
+
+def question_bank() -> QuestionBank:
+    global _BANK
+    if _BANK is None:
+        with _BANK_LOCK:
+            if _BANK is None:
+                _BANK = QuestionBank()
+    return _BANK
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Model registry — one live model version per process, retrained in a background worker
+# and swapped in atomically (a single reference assignment under a lock) only when it passes.
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import f1_score, roc_auc_score
+
+from .explain import (SHAP_AVAILABLE, get_explainer, drop_explainer, model_fingerprint,
+                      compute_shap_summary, save_shap_summary, load_shap_summary, prune_shap_summaries)
+
+
+class ModelVersion(NamedTuple):
+    version: str
+    model: object
+    feature_cols: list
+    metrics: dict
+    explainer: object
+    trained_at: str
+    source: str
+    uid: str               # unique per registration; version labels restart when the registry is rebuilt
+    fingerprint: str       # model + training data hash; the same model after a restart gets the same one
+
+
+def design_matrix(df: pd.DataFrame):
+    """Model inputs (one-hot education/sector) and the Hired target from a candidate frame."""
+    base = df.drop(columns=[c for c in ["Retained12m", "Gender"] if c in df.columns])
+    work = pd.get_dummies(base, columns=[c for c in ["EducationLevel", "Sector"] if c in base.columns], drop_first=True)
+    return work.drop(columns=["Hired"]), work["Hired"]
+
+
+def fit_model(df: pd.DataFrame, random_state: int = 42):
+    """Train the success model on a candidate frame; returns (model, feature_cols, metrics)."""
+    X, y = design_matrix(df)
+    Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.25, random_state=random_state, stratify=y)
+    model = GradientBoostingClassifier(random_state=random_state).fit(Xtr, ytr)
+    prob = model.predict_proba(Xte)[:, 1]; pred = (prob > 0.5).astype(int)
+    metrics = {"f1": float(f1_score(yte, pred)), "auc": float(roc_auc_score(yte, prob))}
+    return model, X.columns.tolist(), metrics
+
+
+def stratified_sample(df: pd.DataFrame, per_sector: int = 250, seed: int = 0) -> pd.DataFrame:
+    """Up to `per_sector` rows per sector, drawn without shuffling the whole frame."""
+    n_sectors = max(df["Sector"].nunique(), 1)
+    pool = df.sample(n=min(len(df), per_sector * n_sectors * 4), random_state=seed)
+    return pool.groupby("Sector", observed=True).head(per_sector).reset_index(drop=True)
+
+
+def passes_gate(candidate: dict, current: dict, tolerance: float = 0.01) -> bool:
+    """A candidate may not lose more than `tolerance` AUC or F1 against the live model."""
+    if not current:
+        return True
+    return (candidate.get("auc", 0.0) >= current.get("auc", 0.0) - tolerance and
+            candidate.get("f1", 0.0) >= current.get("f1", 0.0) - tolerance)
+
+
+class ModelRegistry:
+    """Holds the live ModelVersion plus a few recent ones, and runs retraining off the script thread."""
+
+    def __init__(self, tolerance: float = 0.01, keep: int = 5):
+        self.tolerance = tolerance
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._current = None
+        self._versions = {}
+        self._counter = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="talentlens-retrain")
+        self._future = None
+        self._status = {"state": "idle", "message": "", "candidate_metrics": None}
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="talentlens-shap-summary")
+
+    # ---------- versions ----------
+    def _make_version(self, model, feature_cols, metrics, source, data: pd.DataFrame = None):
+        with self._lock:
+            self._counter += 1
+            version = f"v{self._counter}"
+        uid = uuid.uuid4().hex
+        # Warm the process-wide explainer cache before the version can go live
+        explainer = get_explainer(uid, model).explainer if SHAP_AVAILABLE else None
+        return ModelVersion(version, model, list(feature_cols), dict(metrics), explainer,
+                            time.strftime("%Y-%m-%d %H:%M:%S"), source, uid, model_fingerprint(model, data))
+
+    def _swap(self, mv: ModelVersion):
+        with self._lock:
+            self._versions[mv.version] = mv
+            for old in list(self._versions)[:-self.keep]:
+                if old != mv.version:
+                    drop_explainer(self._versions.pop(old).uid)
+            self._current = mv
+            kept = list(self._versions.values())
+        prune_shap_summaries(kept)
+
+    def register(self, model, feature_cols, metrics, source: str = "", data: pd.DataFrame = None) -> ModelVersion:
+        """Register a model unconditionally (initial model or manual promotion)."""
+        mv = self._make_version(model, feature_cols, metrics, source, data)
+        self._swap(mv)
+        self._queue_summary(mv, data)
+        return mv
+
+    # ---------- one-time SHAP summary job per registered version ----------
+    def _queue_summary(self, mv: ModelVersion, data: pd.DataFrame):
+        if data is None or not SHAP_AVAILABLE or "Sector" not in data.columns:
+            return None
+        if load_shap_summary(mv) is not None:       # same model and data as before a restart
+            return None
+        return self._summary_executor.submit(self._summarise, mv, data)
+
+    @staticmethod
+    def _summarise(mv: ModelVersion, data: pd.DataFrame):
+        sample = stratified_sample(data)
+        X, _ = design_matrix(sample)
+        X = X.reindex(columns=mv.feature_cols, fill_value=0).astype("float32")
+        return save_shap_summary(mv, compute_shap_summary(mv, X, sample["Sector"].astype(str).to_numpy()))
+
+    def current(self) -> ModelVersion:
+        return self._current
+
+    def get(self, version: str):
+        with self._lock:
+            return self._versions.get(version)
+
+    def versions(self):
+        with self._lock:
+            return list(self._versions.values())
+
+    # ---------- background retraining ----------
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _set_status(self, **kw):
+        with self._lock:
+            self._status.update(kw)
+
+    def is_training(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def retrain_async(self, load_data, source: str = ""):
+        """Queue a retrain; `load_data()` runs in the worker and must return a candidate frame."""
+        if self.is_training():
+            return self._future
+        self._set_status(state="training", message=f"Training on {source or 'new data'} …", candidate_metrics=None)
+        self._future = self._executor.submit(self._retrain, load_data, source)
+        return self._future
+
+    def _retrain(self, load_data, source):
+        try:
+            df = load_data()
+            model, feature_cols, metrics = fit_model(df)
+            live = self.current()
+            if not passes_gate(metrics, live.metrics if live else {}, self.tolerance):
+                self._set_status(state="rejected", candidate_metrics=metrics,
+                                 message=(f"Candidate AUC {metrics['auc']:.3f} / F1 {metrics['f1']:.3f} "
+                                          f"did not pass against {live.version}; live model kept."))
+                return None
+            mv = self._make_version(model, feature_cols, metrics, source, df)
+            self._swap(mv)
+            self._queue_summary(mv, df)
+            self._set_status(state="accepted", candidate_metrics=metrics,
+                             message=f"{mv.version} is live (AUC {metrics['auc']:.3f} / F1 {metrics['f1']:.3f}).")
+            return mv
+        except Exception as e:
+            self._set_status(state="failed", message=f"Retraining failed: {e}")
+            return None
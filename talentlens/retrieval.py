@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+# Retrieval helpers for the Conversational Recruiter: chunking, incremental TF-IDF index, top-k lookup,
+# and a local on-disk store so thread indexes survive reloads and server restarts.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+
+# --- Chunking: (start, end) offsets into one corpus buffer, snapped to sentence/paragraph breaks ---
+_BREAK_RE = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+def _snap_end(text: str, lo: int, hi: int) -> int:
+    """Last paragraph/sentence break in text[lo:hi]; else last space; else `hi` (hard cut)."""
+    last = None
+    for m in _BREAK_RE.finditer(text, lo, hi):
+        last = m.end()
+    if last:
+        return last
+    sp = text.rfind(" ", lo, hi)
+    return sp + 1 if sp > lo else hi
+
+
+def _snap_start(text: str, lo: int, hi: int) -> int:
+    """First sentence start in text[lo:hi] (whole-sentence overlap); else first word start; else `hi`."""
+    m = _BREAK_RE.search(text, lo, hi)
+    if m and m.end() < hi:
+        return m.end()
+    sp = text.find(" ", lo, hi)
+    return sp + 1 if sp != -1 else hi
+
+
+def chunk_spans(text: str, size: int = 1000, overlap: int = 150, base: int = 0) -> np.ndarray:
+    """Chunk boundaries as an (n, 2) int64 array of [start, end) offsets (shifted by `base`)."""
+    n = len(text or "")
+    if not n:
+        return np.zeros((0, 2), dtype=np.int64)
+    spans, start = [], 0
+    while start < n:
+        hard = min(n, start + size)
+        end = n if hard == n else _snap_end(text, start + size // 2, hard)
+        spans.append((start, end))
+        if end >= n:
+            break
+        start = max(start + 1, _snap_start(text, max(start + 1, end - overlap), end))
+    return np.asarray(spans, dtype=np.int64) + base
+
+
+def _chunk_text(text: str, size: int = 1000, overlap: int = 150):
+    return [text[a:b] for a, b in chunk_spans(text, size, overlap)]
+
+
+# Sections of a thread corpus (vacancy, each uploaded file, cover letter) are the unit of
+# incremental indexing: a section whose text is already indexed is never re-vectorised.
+_SECTION_RE = re.compile(r"(?=### (?:FILE: |VACANCY MATCHED CONTEXT|COVER LETTER))")
+N_FEATURES = 2 ** 18
+
+
+def split_sections(corpus_text: str):
+    return [s.strip() for s in _SECTION_RE.split(corpus_text or "") if s.strip()]
+
+
+def _hasher():
+    # Stateless: the feature space never changes, so new chunks can be appended without refitting
+    return HashingVectorizer(n_features=N_FEATURES, ngram_range=(1, 2), alternate_sign=False,
+                             norm=None, dtype=np.float32)
+
+
+def _section_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalIndex:
+    """Hashed term counts per chunk plus running document frequencies; IDF is applied lazily at query time.
+
+    Chunk text is never stored separately: chunks are [start, end) spans into one corpus buffer and
+    only the retrieved top-k are sliced out.
+    """
+
+    def __init__(self):
+        self._parts = []                         # section texts, joined lazily into `buffer`
+        self._buffer = ""
+        self.length = 0                          # total characters in the buffer
+        self.spans = np.zeros((0, 2), dtype=np.int64)
+        self.docs = {}                           # section hash → [first_row, end_row, char_start, char_end]
+        self.alive = np.zeros(0, dtype=bool)
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        self.n_docs = 0                          # live chunks (IDF "documents")
+        self._blocks = []                        # pending CSR blocks, stacked on demand
+        self._tf = sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+        self._idf = None                         # IDF and TF-IDF row norms, dropped whenever df changes
+        self._norms = None
+        self._postings = None                    # column-major (term → chunks) view, dropped when tf changes
+
+    def __len__(self):
+        return int(self.n_docs)
+
+    @property
+    def buffer(self) -> str:
+        if self._parts:
+            self._buffer = "".join([self._buffer] + self._parts)
+            self._parts = []
+        return self._buffer
+
+    @property
+    def tf(self):
+        if self._blocks:
+            self._tf = sparse.vstack([self._tf] + self._blocks, format="csr")
+            self._blocks = []
+        return self._tf
+
+    def chunk(self, i: int) -> str:
+        a, b = self.spans[i]
+        return self.buffer[a:b]
+
+    def add_section(self, text: str) -> int:
+        """Chunk, hash and append one section; returns the number of new chunks (0 if already indexed)."""
+        key = _section_key(text)
+        if key in self.docs or not text:
+            return 0
+        text = text + "\n\n"                     # sections never share a chunk
+        base = self.length
+        spans = chunk_spans(text, size=1000, overlap=150, base=base)
+        block = _hasher().transform(text[a - base:b - base] for a, b in spans).tocsr()
+        first = len(self.spans)
+        self._parts.append(text)
+        self.length += len(text)
+        self.spans = np.vstack([self.spans, spans])
+        self.docs[key] = [first, first + len(spans), base, self.length]
+        self.alive = np.concatenate([self.alive, np.ones(len(spans), dtype=bool)])
+        self.df += np.bincount(block.indices, minlength=N_FEATURES).astype(np.int32)
+        self.n_docs += len(spans)
+        self._blocks.append(block)
+        self._invalidate(tf_changed=True)
+        return len(spans)
+
+    def remove_section(self, key: str):
+        """Tombstone a section's chunks and take them out of the document frequencies."""
+        first, end, _a, _b = self.docs.pop(key)
+        rows = self.tf[first:end]
+        self.df -= np.bincount(rows.indices, minlength=N_FEATURES).astype(np.int32)
+        self.alive[first:end] = False
+        self.n_docs -= end - first
+        self._invalidate()
+
+    def sync_corpus(self, corpus_text: str) -> dict:
+        """Make the index mirror `corpus_text`: append new sections, drop sections no longer present."""
+        sections = split_sections(corpus_text)
+        wanted = {_section_key(s) for s in sections}
+        removed = [k for k in self.docs if k not in wanted]
+        for k in removed:
+            self.remove_section(k)
+        if removed and self.alive.sum() < len(self.alive) / 2:
+            self.compact()
+        added = sum(self.add_section(s) for s in sections)
+        return {"added_chunks": added, "removed_sections": len(removed)}
+
+    def compact(self):
+        """Physically drop tombstoned chunks and their text (row slicing only — nothing is re-vectorised)."""
+        buf = self.buffer
+        keep = np.flatnonzero(self.alive)
+        new_parts, new_docs, spans, row, pos = [], {}, [], 0, 0
+        for key, (first, end, a, b) in sorted(self.docs.items(), key=lambda kv: kv[1][0]):
+            new_parts.append(buf[a:b])
+            spans.append(self.spans[first:end] - a + pos)
+            new_docs[key] = [row, row + (end - first), pos, pos + (b - a)]
+            row += end - first
+            pos += b - a
+        self._tf = self.tf[keep]
+        self._buffer, self._parts, self.length = "".join(new_parts), [], pos
+        self.spans = np.vstack(spans) if spans else np.zeros((0, 2), dtype=np.int64)
+        self.docs = new_docs
+        self.alive = np.ones(len(keep), dtype=bool)
+        self._invalidate(tf_changed=True)
+
+    def _invalidate(self, tf_changed: bool = False):
+        self._idf = self._norms = None
+        if tf_changed:
+            self._postings = None
+
+    def idf(self):
+        if self._idf is None:
+            self._idf = (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        return self._idf
+
+    def row_norms(self):
+        """L2 norm of every chunk's TF-IDF row, computed straight from the counts (no weighted copy)."""
+        if self._norms is None:
+            tf, idf = self.tf, self.idf()
+            sq = np.square(tf.data, dtype=np.float32) * np.square(idf[tf.indices])
+            norms = np.zeros(tf.shape[0], dtype=np.float32)
+            nonempty = np.diff(tf.indptr) > 0
+            if nonempty.any():
+                norms[nonempty] = np.add.reduceat(sq, tf.indptr[:-1][nonempty])
+            self._norms = np.sqrt(norms)
+        return self._norms
+
+    def postings(self):
+        if self._postings is None:
+            self._postings = self.tf.tocsc()
+        return self._postings
+
+    def match(self, question: str):
+        """(rows, cosine scores) of the live chunks sharing at least one term with `question`.
+
+        Only the query terms' posting lists are read: one sparse mat-vec over those columns, with the
+        query carrying both IDF factors and the row normalisation taken from the cached norms.
+        """
+        q = _hasher().transform([question])
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if not q.nnz or not self.n_docs:
+            return empty
+        idf = self.idf()[q.indices]
+        qv = q.data.astype(np.float32) * idf
+        qv *= idf / np.linalg.norm(qv)
+        sub = self.postings()[:, q.indices]
+        acc = np.bincount(sub.indices, weights=sub.data * np.repeat(qv, np.diff(sub.indptr)),
+                          minlength=sub.shape[0])
+        rows = np.flatnonzero(acc)
+        rows = rows[self.alive[rows]]
+        if not len(rows):
+            return empty
+        norms = self.row_norms()[rows]
+        return rows, (acc[rows] / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+    def search_spans(self, question: str, top_k: int = 8, min_score: float = None):
+        """Best chunks as (start, end, score) offsets into `buffer`, best first."""
+        if not question or not self.n_docs:
+            return []
+        rows, sims = self.match(question)
+        return [(int(self.spans[rows[i], 0]), int(self.spans[rows[i], 1]), float(sims[i]))
+                for i in top_k_indices(sims, top_k, min_score)]
+
+    def search(self, question: str, top_k: int = 8, min_score: float = None):
+        buf = self.buffer
+        return [(buf[a:b], score) for a, b, score in self.search_spans(question, top_k, min_score)]
+
+
+def top_k_indices(scores: np.ndarray, k: int, min_score: float = None) -> np.ndarray:
+    """Indices of the `k` highest finite scores (>= `min_score`), best first.
+
+    argpartition selects the top k in O(n); only those k are sorted.
+    """
+    n = len(scores)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    scores = np.where(np.isfinite(scores), scores, -np.inf)     # NaN would otherwise take a top-k slot
+    idx = np.argpartition(scores, n - k)[n - k:] if k < n else np.arange(n)
+    idx = idx[np.argsort(scores[idx], kind="stable")[::-1]]
+    keep = np.isfinite(scores[idx])
+    if min_score is not None:
+        keep &= scores[idx] >= min_score
+    return idx[keep]
+
+
+def build_index(corpus_text: str):
+    index = IncrementalIndex()
+    index.sync_corpus(corpus_text)
+    return index
+
+
+def retrieve(question: str, index, top_k: int = 8, min_score: float = None):
+    if not question or not index: return []
+    return index.search(question, top_k=top_k, min_score=min_score)
+
+
+# --- Serialisation: corpus buffer + chunk spans + CSR term counts + document frequencies ---
+INDEX_FORMAT = 3
+
+
+def _json_default(o):
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+CURRENT = "CURRENT"          # pointer file naming the live generation subdirectory
+
+
+def _live_generation(directory: Path):
+    try:
+        name = (directory / CURRENT).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return directory / name if name else None
+
+
+def _prune_generations(directory: Path, keep):
+    """Best effort: generations still memory-mapped by a loaded index (Windows) are removed on a later save."""
+    for d in directory.iterdir():
+        if d.name in (keep, CURRENT):
+            continue
+        try:
+            shutil.rmtree(d) if d.is_dir() else d.unlink()
+        except OSError:
+            pass
+
+
+def save_index(index: IncrementalIndex, directory) -> Path:
+    """Write an index to a new generation under `directory`, then switch the CURRENT pointer to it.
+
+    Earlier generations are never rewritten in place, so an index loaded (memory-mapped) from one of them
+    stays valid; arrays are plain .npy so they can be memory-mapped on load.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = "g" + uuid.uuid4().hex[:12]
+    tmp = directory / name
+    tmp.mkdir()
+    tf = index.tf
+    df_cols = np.flatnonzero(index.df)
+    np.save(tmp / "tf_data.npy", tf.data)
+    np.save(tmp / "tf_indices.npy", tf.indices)
+    np.save(tmp / "tf_indptr.npy", tf.indptr)
+    np.save(tmp / "df_cols.npy", df_cols.astype(np.int32))
+    np.save(tmp / "df_vals.npy", index.df[df_cols])
+    np.save(tmp / "alive.npy", index.alive)
+    np.save(tmp / "spans.npy", index.spans)
+    with open(tmp / "corpus.txt", "w", encoding="utf-8", newline="") as f:
+        f.write(index.buffer)
+    with open(tmp / "index.json", "w", encoding="utf-8") as f:
+        json.dump({"format": INDEX_FORMAT, "n_features": N_FEATURES, "n_docs": int(index.n_docs),
+                   "length": index.length, "docs": index.docs, "shape": list(tf.shape)}, f)
+    pointer = directory / (CURRENT + ".tmp")
+    pointer.write_text(name, encoding="utf-8")
+    os.replace(pointer, directory / CURRENT)
+    _prune_generations(directory, keep=name)
+    return tmp
+
+
+def load_index(directory, mmap: bool = True):
+    """Rebuild an index from disk without re-vectorising; returns None when nothing usable is stored."""
+    directory = Path(directory)
+    directory = _live_generation(directory) or directory          # flat layout from before generations
+    if not (directory / "index.json").exists():
+        return None
+    with open(directory / "index.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != INDEX_FORMAT or meta.get("n_features") != N_FEATURES:
+        return None
+    mode = "r" if mmap else None
+    index = IncrementalIndex()
+    with open(directory / "corpus.txt", encoding="utf-8", newline="") as f:
+        index._buffer = f.read()
+    index.length, index.docs = meta["length"], meta["docs"]
+    index.spans = np.load(directory / "spans.npy", mmap_mode=mode)
+    index._tf = sparse.csr_matrix((np.load(directory / "tf_data.npy", mmap_mode=mode),
+                                   np.load(directory / "tf_indices.npy", mmap_mode=mode),
+                                   np.load(directory / "tf_indptr.npy", mmap_mode=mode)),
+                                  shape=tuple(meta["shape"]), copy=False)
+    index.df[np.load(directory / "df_cols.npy")] = np.load(directory / "df_vals.npy")
+    index.alive = np.load(directory / "alive.npy")
+    index.n_docs = int(meta["n_docs"])
+    return index
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+class ThreadStore:
+    """Per-user directory of chat threads: thread.json (metadata + messages) and index/ (retrieval index)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _dir(self, thread_id: str) -> Path:
+        return self.root / thread_id
+
+    def save_thread(self, thread_id: str, meta: dict):
+        d = self._dir(thread_id)
+        d.mkdir(parents=True, exist_ok=True)
+        data = {k: v for k, v in meta.items() if k != "index"}
+        tmp = d / "thread.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, d / "thread.json")
+
+    def save_index(self, thread_id: str, index):
+        if index is None:
+            d = self._dir(thread_id) / "index"
+            if d.exists():
+                (d / CURRENT).unlink(missing_ok=True)
+                _prune_generations(d, keep=None)
+            return None
+        return save_index(index, self._dir(thread_id) / "index")
+
+    def load_threads(self) -> dict:
+        """All stored threads (without indexes — those load lazily via load_index)."""
+        threads = {}
+        if not self.root.exists():
+            return threads
+        for d in sorted(self.root.iterdir(), key=lambda p: p.stat().st_mtime):
+            try:
+                with open(d / "thread.json", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                continue
+            meta["messages"] = [tuple(m) for m in meta.get("messages", [])]
+            meta["index"] = None
+            threads[d.name] = meta
+        return threads
+
+    def load_index(self, thread_id: str):
+        try:
+            return load_index(self._dir(thread_id) / "index")
+        except Exception:
+            return None
+
+    def delete(self, thread_id: str):
+        shutil.rmtree(self._dir(thread_id), ignore_errors=True)
+
+    def index_size(self, thread_id: str) -> int:
+        return _dir_size(self._dir(thread_id) / "index")
+
+    def sizes(self) -> dict:
+        if not self.root.exists():
+            return {}
+        return {d.name: _dir_size(d / "index") for d in self.root.iterdir() if d.is_dir()}
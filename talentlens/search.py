@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Cross-candidate search — one BM25 full-text index over every processed CV (SQLite FTS5),
+# keyed by content hash, with sector / role / experience-band filters and highlighted snippets.
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from . import DATA_DIR
+
+
+def _fts5_available() -> bool:
+    try:
+        con = sqlite3.connect(":memory:")
+        con.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        con.close()
+        return True
+    except Exception:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+EXPERIENCE_BANDS = ("0-2", "3-5", "6-10", "10+")
+
+
+def experience_band(years) -> str:
+    y = int(years or 0)
+    if y <= 2: return "0-2"
+    if y <= 5: return "3-5"
+    if y <= 10: return "6-10"
+    return "10+"
+
+
+def content_hash(text: str) -> str:
+    """Whitespace-insensitive hash, so re-extracting the same CV never duplicates it."""
+    return hashlib.sha1(re.sub(r"\s+", " ", text or "").strip().encode("utf-8")).hexdigest()
+
+
+class SearchHit(NamedTuple):
+    hash: str
+    filename: str
+    sector: str
+    role: str
+    experience_years: int
+    experience_band: str
+    score: float
+    snippet: str
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    sector TEXT,
+    role TEXT,
+    experience_years INTEGER,
+    experience_band TEXT,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_candidates_sector ON candidates(sector);
+CREATE INDEX IF NOT EXISTS ix_candidates_role ON candidates(role);
+CREATE INDEX IF NOT EXISTS ix_candidates_band ON candidates(experience_band);
+CREATE VIRTUAL TABLE IF NOT EXISTS cv_text USING fts5(body, tokenize='unicode61 remove_diacritics 2');
+"""
+
+
+def _fts_query(text: str, match_all: bool = False) -> str:
+    """Free text → FTS5 MATCH expression; every token is quoted so user input is never parsed as syntax."""
+    tokens = re.findall(r"\w+", (text or "").lower())
+    return (" AND " if match_all else " OR ").join(f'"{tok}"' for tok in tokens)
+
+
+class CandidateIndex:
+    """Process-wide candidate search index; safe to share across Streamlit sessions."""
+
+    def __init__(self, path=None):
+        if not FTS5_AVAILABLE:
+            raise RuntimeError("Candidate search requires SQLite with the FTS5 extension.")
+        self.path = Path(path or DATA_DIR / "candidates.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(_SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def contains(self, text_or_hash: str) -> bool:
+        key = text_or_hash if re.fullmatch(r"[0-9a-f]{40}", text_or_hash or "") else content_hash(text_or_hash)
+        with self._lock:
+            return self._con.execute("SELECT 1 FROM candidates WHERE hash = ?", (key,)).fetchone() is not None
+
+    def add(self, text: str, filename: str = "", sector: str = "", role: str = "", experience_years: int = 0) -> bool:
+        """Index one CV; returns False when that exact text is already indexed (its fields are refreshed)."""
+        if not (text or "").strip():
+            return False
+        key = content_hash(text)
+        row = (filename or "", sector or "", role or "", int(experience_years or 0),
+               experience_band(experience_years), time.strftime("%Y-%m-%d %H:%M:%S"))
+        with self._lock, self._con:
+            cur = self._con.execute(
+                "INSERT OR IGNORE INTO candidates (hash, filename, sector, role, experience_years, experience_band, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key,) + row)
+            if cur.rowcount:
+                self._con.execute("INSERT INTO cv_text (rowid, body) VALUES (?, ?)", (cur.lastrowid, text))
+                return True
+            self._con.execute(
+                "UPDATE candidates SET filename = ?, sector = ?, role = ?, experience_years = ?, "
+                "experience_band = ?, indexed_at = ? WHERE hash = ?", row + (key,))
+            return False
+
+    def remove(self, key: str):
+        with self._lock, self._con:
+            found = self._con.execute("SELECT id FROM candidates WHERE hash = ?", (key,)).fetchone()
+            if found:
+                self._con.execute("DELETE FROM cv_text WHERE rowid = ?", found)
+                self._con.execute("DELETE FROM candidates WHERE id = ?", found)
+
+    def facets(self) -> dict:
+        """Distinct filter values currently present in the index."""
+        with self._lock:
+            q = lambda col: [r[0] for r in self._con.execute(
+                f"SELECT DISTINCT {col} FROM candidates WHERE {col} <> '' ORDER BY {col}")]
+            bands = set(q("experience_band"))
+            return {"sector": q("sector"), "role": q("role"),
+                    "experience_band": [b for b in EXPERIENCE_BANDS if b in bands]}
+
+    def search(self, query: str, sector=None, role=None, experience_band=None,
+               match_all: bool = False, limit: int = 20):
+        """BM25-ranked candidates for `query`, optionally filtered; each filter accepts a value or a list."""
+        match = _fts_query(query, match_all)
+        if not match:
+            return []
+        where, params = ["cv_text MATCH ?"], [match]
+        for col, value in (("c.sector", sector), ("c.role", role), ("c.experience_band", experience_band)):
+            values = [value] if isinstance(value, str) else list(value or [])
+            if values:
+                where.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        sql = ("SELECT c.hash, c.filename, c.sector, c.role, c.experience_years, c.experience_band, "
+               "bm25(cv_text) AS rank, snippet(cv_text, 0, '**', '**', ' … ', 24) "
+               "FROM cv_text JOIN candidates c ON c.id = cv_text.rowid "
+               f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ?")
+        with self._lock:
+            rows = self._con.execute(sql, params + [int(limit)]).fetchall()
+        # FTS5 bm25() is "lower is better"; flip the sign so higher scores rank first everywhere
+        return [SearchHit(h, f, s, r, int(y), b, -float(rank), snip) for h, f, s, r, y, b, rank, snip in rows]
+
+    def close(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Plotly renderings of precomputed SHAP data — drawn in the browser, no matplotlib round-trip.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .explain import explain_row
+
+ACCENT_RED = "#E50046"
+TEXT_LIGHT = "#EAEAEA"
+
+
+def _themed(fig, title: str, font_color: str = TEXT_LIGHT):
+    fig.update_layout(
+        title=dict(text=title, font=dict(color=font_color)),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color=font_color,
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+    return fig
+
+
+def _top_features(summary: dict, max_display: int):
+    order = np.argsort(summary["global_mean_abs"])[::-1][:max_display]
+    return order[::-1]   # least important first → most important drawn on top
+
+
+def sector_importance_figure(summary: dict, sector: str = None, max_display: int = 10):
+    """Mean |SHAP| per feature for `sector` next to the global mean."""
+    feats = summary["features"]
+    idx = _top_features(summary, max_display)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=feats[idx], x=summary["global_mean_abs"][idx], orientation="h",
+                         name="All sectors", marker_color="rgba(234,234,234,0.45)"))
+    sectors = list(summary["sectors"])
+    if sector in sectors:
+        row = summary["sector_mean_abs"][sectors.index(sector)]
+        fig.add_trace(go.Bar(y=feats[idx], x=row[idx], orientation="h", name=sector, marker_color=ACCENT_RED))
+    fig.update_layout(barmode="group", xaxis_title="mean |SHAP| (log-odds)")
+    return _themed(fig, f"Feature importance — {sector or 'global'} vs. all sectors")
+
+
+def beeswarm_figure(summary: dict, max_display: int = 10, seed: int = 0):
+    """Beeswarm-style strip: one dot per sampled candidate, coloured by the (per-feature scaled) value."""
+    feats = summary["features"]
+    idx = _top_features(summary, max_display)
+    values, data = summary["sample_values"][:, idx], summary["sample_data"][:, idx]
+    lo, hi = data.min(axis=0), data.max(axis=0)
+    scaled = (data - lo) / np.where(hi > lo, hi - lo, 1)
+    rng = np.random.default_rng(seed)
+    n, k = values.shape
+    ypos = np.repeat(np.arange(k)[None, :], n, axis=0) + rng.uniform(-0.3, 0.3, size=(n, k))
+    fig = go.Figure(go.Scattergl(
+        x=values.ravel(), y=ypos.ravel(), mode="markers",
+        marker=dict(size=4, color=scaled.ravel(), colorscale="RdBu_r", showscale=True,
+                    colorbar=dict(title="value", tickvals=[0, 1], ticktext=["low", "high"])),
+        hoverinfo="x",
+    ))
+    fig.update_layout(yaxis=dict(tickvals=list(range(k)), ticktext=list(feats[idx])), xaxis_title="SHAP value")
+    return _themed(fig, "SHAP beeswarm (training sample)")
+
+
+def dependence_figure(summary: dict, feature: str):
+    """Feature value vs. its SHAP value across the training sample, coloured by sector."""
+    j = list(summary["features"]).index(feature)
+    df = pd.DataFrame({
+        feature: summary["sample_data"][:, j],
+        "SHAP": summary["sample_values"][:, j],
+        "Sector": summary["sectors"][summary["sample_sector"]],
+    })
+    fig = px.scatter(df, x=feature, y="SHAP", color="Sector", opacity=0.7, render_mode="webgl")
+    return _themed(fig, f"SHAP dependence — {feature}")
+
+
+def waterfall_figure(values, base_value: float, data, feature_names, max_display: int = 10):
+    """Horizontal SHAP waterfall: E[f(x)] at the bottom, largest contributions on top, f(x) as total."""
+    values = np.asarray(values, dtype=float)
+    data = np.asarray(data, dtype=float)
+    names = np.asarray(feature_names, dtype=str)
+    order = np.argsort(np.abs(values))[::-1]
+    shown, rest = order[:max_display - 1], order[max_display - 1:]
+    labels, contribs = [], []
+    if len(rest):
+        labels.append(f"{len(rest)} other features")
+        contribs.append(float(values[rest].sum()))
+    for j in shown[::-1]:
+        labels.append(f"{names[j]} = {data[j]:.3g}")
+        contribs.append(float(values[j]))
+    fx = float(base_value + values.sum())
+    fig = go.Figure(go.Waterfall(
+        orientation="h", base=float(base_value),
+        measure=["relative"] * len(contribs) + ["total"],
+        y=labels + ["f(x)"], x=contribs + [fx - float(base_value)],
+        text=[f"{v:+.3f}" for v in contribs] + [f"{fx:.3f}"], textposition="outside",
+        increasing=dict(marker=dict(color=ACCENT_RED)), decreasing=dict(marker=dict(color="#1E88E5")),
+        totals=dict(marker=dict(color="rgba(234,234,234,0.6)")),
+        connector=dict(line=dict(color="rgba(234,234,234,0.25)")),
+    ))
+    fig.update_layout(showlegend=False, xaxis_title=f"model output (log-odds) · E[f(x)] = {base_value:.3f}")
+    return _themed(fig, "SHAP waterfall")
+
+
+# ---------- Per-candidate cache: (model uid, feature vector hash) → (values, base, figure) ----------
+_WATERFALLS = OrderedDict()
+_WATERFALL_LOCK = threading.Lock()
+WATERFALL_CACHE_SIZE = 256
+
+
+def row_hash(row: pd.DataFrame) -> str:
+    return hashlib.sha1(np.ascontiguousarray(row.to_numpy(dtype=np.float64)).tobytes()).hexdigest()
+
+
+def explain_and_plot(mv, row: pd.DataFrame, max_display: int = 10):
+    """SHAP values + waterfall for a single-row frame, reused across reruns and sessions."""
+    key = (mv.uid, row_hash(row), max_display)
+    with _WATERFALL_LOCK:
+        hit = _WATERFALLS.get(key)
+        if hit is not None:
+            _WATERFALLS.move_to_end(key)
+            values, base, fig = hit
+            return values, base, go.Figure(fig)      # callers may restyle their figure; the cached one stays intact
+    values, base = explain_row(mv, row)
+    fig = waterfall_figure(values, base, row.iloc[0].to_numpy(dtype=float), list(row.columns), max_display)
+    with _WATERFALL_LOCK:
+        _WATERFALLS[key] = (values, base, fig)
+        while len(_WATERFALLS) > WATERFALL_CACHE_SIZE:
+            _WATERFALLS.popitem(last=False)
+    return values, base, go.Figure(fig)
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Local stand-in for the OpenAI API (stdlib only), so latency, concurrency, caching, streaming and
+# batch jobs can be exercised without network or a key:
+#   python -m talentlens.standin_server --port 8765 --latency-ms 400 --tokens-per-second 60 --failure-rate 0.05
+#   TALENTLENS_LLM_BACKEND="Local stand-in" streamlit run Update_recruit.py
+# Implements POST /v1/chat/completions (plain and stream=true), GET /v1/models, POST /v1/files,
+# GET /v1/files/<id>[/content], POST /v1/batches, GET /v1/batches/<id>, plus GET /stats.
+# Answers are synthetic, derived from the prompt; usage is reported in approximate tokens (words).
+# Prompt caching is simulated like the provider's: a message prefix seen before (≥ 1024 tokens,
+# counted in 128-token steps) is reported as cached_tokens and skips the simulated prefill time.
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+FILLER = ("the candidate shows relevant experience skills and motivation for this role with clear evidence "
+          "in the cv and letter including measurable results teamwork ownership and growth potential").split()
+
+
+class Simulation(NamedTuple):
+    latency_ms: float = 300.0          # time to first token
+    jitter_ms: float = 100.0           # uniform extra latency
+    tokens_per_second: float = 80.0    # generation speed (0 = instant)
+    reply_tokens: int = 120            # answer length, capped by the request's max_tokens
+    failure_rate: float = 0.0          # share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0       # share of requests answered with HTTP 429
+    batch_delay: float = 0.5           # seconds per batch state transition
+    prefill_ms_per_1k: float = 40.0    # prompt processing time per 1k uncached prompt tokens
+
+
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+
+def _id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+
+def fake_reply(messages, n_tokens: int = 120) -> str:
+    """Deterministic placeholder answer: the task, the start of the last user message, then filler."""
+    users = [m.get("content") or "" for m in messages or [] if m.get("role") == "user"]
+    last, task = (users or [""])[-1], ""
+    for content in users:
+        try:
+            task = task or json.loads(content).get("task", "")
+        except Exception:
+            pass
+    words = [f"[stand-in {task or 'reply'}]"] + re.findall(r"\w+", str(last))[:40]
+    words += [FILLER[i % len(FILLER)] for i in range(max(0, n_tokens - len(words)))]
+    return " ".join(words[:max(1, n_tokens)])
+
+
+def _tokens(messages) -> int:
+    return sum(len(str(m.get("content", ""))) // 4 for m in messages or [])
+
+
+def _usage(body: dict, text: str, cached_tokens: int = 0) -> dict:
+    prompt_tokens = _tokens(body.get("messages"))
+    completion_tokens = len(text.split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+def chat_completion(body: dict, text: str = None, cached_tokens: int = 0) -> dict:
+    text = fake_reply(body.get("messages"), int(body.get("max_tokens") or 120)) if text is None else text
+    return {
+        "id": _id("chatcmpl"), "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model", "stand-in"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": _usage(body, text, cached_tokens),
+    }
+
+
+class StandInState:
+    """Simulation settings, uploaded files, batches and request counters, in memory."""
+
+    def __init__(self, sim: Simulation = Simulation(), seed: int = None):
+        self.sim = sim
+        self.rng = random.Random(seed)
+        self.files, self.batches = {}, {}
+        self.prefixes = set()
+        self.stats = {"requests": 0, "streamed": 0, "failed": 0, "rate_limited": 0, "in_flight": 0, "peak_in_flight": 0,
+                      "prompt_tokens": 0, "cached_tokens": 0}
+        self.lock = threading.Lock()
+
+    def roll(self):
+        """Simulated outcome for one chat request: None (ok), 429 or 500."""
+        with self.lock:
+            r = self.rng.random()
+        if r < self.sim.rate_limit_rate:
+            return 429
+        if r < self.sim.rate_limit_rate + self.sim.failure_rate:
+            return 500
+        return None
+
+    def cached_tokens(self, messages) -> int:
+        """Tokens of the longest message prefix seen before (provider rules), then remember this prompt's prefixes."""
+        messages = messages or []
+        keys = [hashlib.sha1(json.dumps(messages[:k], sort_keys=True).encode("utf-8")).hexdigest()
+                for k in range(1, len(messages) + 1)]
+        with self.lock:
+            seen = max((k for k in range(1, len(keys) + 1) if keys[k - 1] in self.prefixes), default=0)
+            self.prefixes.update(keys)
+            total = _tokens(messages)
+            self.stats["prompt_tokens"] += total
+            cached = _tokens(messages[:seen])
+            cached = cached // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS if cached >= CACHE_MIN_TOKENS else 0
+            self.stats["cached_tokens"] += cached
+        return cached
+
+    def first_token_delay(self, uncached_tokens: int = 0) -> float:
+        with self.lock:
+            return (self.sim.latency_ms + self.rng.uniform(0, self.sim.jitter_ms)
+                    + self.sim.prefill_ms_per_1k * uncached_tokens / 1000.0) / 1000.0
+
+    def count(self, key: str, delta: int = 1):
+        with self.lock:
+            self.stats[key] += delta
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def add_file(self, filename: str, data: bytes, purpose: str) -> dict:
+        meta = {"id": _id("file"), "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose}
+        with self.lock:
+            self.files[meta["id"]] = (meta, data)
+        return meta
+
+    def create_batch(self, body: dict) -> dict:
+        batch = {"id": _id("batch"), "object": "batch", "endpoint": body.get("endpoint"),
+                 "input_file_id": body.get("input_file_id"), "completion_window": body.get("completion_window"),
+                 "status": "validating", "output_file_id": None, "error_file_id": None, "errors": None,
+                 "created_at": int(time.time()), "completed_at": None, "metadata": body.get("metadata"),
+                 "request_counts": {"total": 0, "completed": 0, "failed": 0}}
+        with self.lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(target=self._run_batch, args=(batch["id"],), daemon=True).start()
+        return batch
+
+    def _run_batch(self, batch_id: str):
+        batch = self.batches[batch_id]
+        time.sleep(self.sim.batch_delay)
+        entry = self.files.get(batch["input_file_id"])
+        if entry is None:
+            batch.update(status="failed", errors={"object": "list", "data": [{"message": "input file not found"}]})
+            return
+        lines = [json.loads(l) for l in entry[1].decode("utf-8").splitlines() if l.strip()]
+        batch["request_counts"]["total"] = len(lines)
+        batch["status"] = "in_progress"
+        out, errors = [], []
+        for req in lines:
+            if self.roll() == 500:
+                errors.append({"id": _id("batch_req"), "custom_id": req.get("custom_id"), "response": None,
+                               "error": {"code": "server_error", "message": "Simulated failure"}})
+                batch["request_counts"]["failed"] += 1
+                continue
+            body = req.get("body") or {}
+            out.append({"id": _id("batch_req"), "custom_id": req.get("custom_id"), "error": None,
+                        "response": {"status_code": 200, "request_id": _id("req"),
+                                     "body": chat_completion(body, cached_tokens=self.cached_tokens(
+                                         body.get("messages")))}})
+            batch["request_counts"]["completed"] += 1
+        time.sleep(self.sim.batch_delay)
+        for rows, purpose, key in ((out, "batch_output", "output_file_id"), (errors, "batch_output", "error_file_id")):
+            if rows:
+                data = "".join(json.dumps(o) + "\n" for o in rows).encode("utf-8")
+                batch[key] = self.add_file(f"{batch_id}_{key}.jsonl", data, purpose)["id"]
+        batch.update(status="completed", completed_at=int(time.time()))
+
+
+def make_handler(state: StandInState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _send(self, status: int, payload, content_type: str = "application/json", headers=None):
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str, kind: str, headers=None):
+            self._send(status, {"error": {"message": message, "type": kind, "code": None}}, headers=headers)
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _chat(self, body: dict):
+            sim = state.sim
+            state.count("requests")
+            state.count("in_flight")
+            try:
+                cached = state.cached_tokens(body.get("messages"))
+                time.sleep(state.first_token_delay(_tokens(body.get("messages")) - cached))
+                outcome = state.roll()
+                if outcome == 429:
+                    state.count("rate_limited")
+                    return self._error(429, "Simulated rate limit", "rate_limit_exceeded", {"Retry-After": "1"})
+                if outcome == 500:
+                    state.count("failed")
+                    return self._error(500, "Simulated server error", "server_error")
+                text = fake_reply(body.get("messages"), min(int(body.get("max_tokens") or sim.reply_tokens),
+                                                            sim.reply_tokens))
+                step = 1.0 / sim.tokens_per_second if sim.tokens_per_second > 0 else 0.0
+                if not body.get("stream"):
+                    time.sleep(step * len(text.split()))
+                    return self._send(200, chat_completion(body, text, cached))
+                state.count("streamed")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                cid, created, model = _id("chatcmpl"), int(time.time()), body.get("model", "stand-in")
+
+                def event(delta, finish=None):
+                    chunk = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                    self._chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+
+                event({"role": "assistant", "content": ""})
+                for i, word in enumerate(text.split()):
+                    event({"content": (" " if i else "") + word})
+                    if step:
+                        time.sleep(step)
+                event({}, "stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [], "usage": _usage(body, text, cached)}
+                    self._chunk(b"data: " + json.dumps(usage).encode("utf-8") + b"\n\n")
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+            finally:
+                state.count("in_flight", -1)
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0].rstrip("/")
+            raw = self._body()
+            if path == "/v1/chat/completions":
+                return self._chat(json.loads(raw or b"{}"))
+            if path == "/v1/files":
+                msg = BytesParser(policy=email_policy).parsebytes(
+                    f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("latin-1") + raw)
+                fields, upload = {}, (None, b"")
+                for part in msg.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    if part.get_filename():
+                        upload = (part.get_filename(), part.get_payload(decode=True) or b"")
+                    else:
+                        fields[name] = (part.get_payload(decode=True) or b"").decode("utf-8")
+                return self._send(200, state.add_file(upload[0] or "upload.jsonl", upload[1],
+                                                      fields.get("purpose", "batch")))
+            if path == "/v1/batches":
+                return self._send(200, state.create_batch(json.loads(raw or b"{}")))
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/v1/models":
+                return self._send(200, {"object": "list", "data": [
+                    {"id": "stand-in", "object": "model", "created": 0, "owned_by": "talentlens"}]})
+            if path == "/stats":
+                with state.lock:
+                    return self._send(200, dict(state.stats, simulation=state.sim._asdict()))
+            m = re.fullmatch(r"/v1/files/([\w-]+)(/content)?", path)
+            if m and m.group(1) in state.files:
+                meta, data = state.files[m.group(1)]
+                return self._send(200, data, "application/octet-stream") if m.group(2) else self._send(200, meta)
+            m = re.fullmatch(r"/v1/batches/([\w-]+)", path)
+            if m and m.group(1) in state.batches:
+                return self._send(200, state.batches[m.group(1)])
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, sim: Simulation = Simulation(),
+          seed: int = None) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread; returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), make_handler(StandInState(sim, seed)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=Simulation.latency_ms, help="time to first token")
+    ap.add_argument("--jitter-ms", type=float, default=Simulation.jitter_ms)
+    ap.add_argument("--tokens-per-second", type=float, default=Simulation.tokens_per_second)
+    ap.add_argument("--reply-tokens", type=int, default=Simulation.reply_tokens)
+    ap.add_argument("--failure-rate", type=float, default=0.0, help="share of requests failing with HTTP 500")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    ap.add_argument("--batch-delay", type=float, default=Simulation.batch_delay,
+                    help="seconds per batch state transition")
+    ap.add_argument("--prefill-ms-per-1k", type=float, default=Simulation.prefill_ms_per_1k,
+                    help="prompt processing time per 1k uncached prompt tokens")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+    sim = Simulation(args.latency_ms, args.jitter_ms, args.tokens_per_second, args.reply_tokens,
+                     args.failure_rate, args.rate_limit_rate, args.batch_delay, args.prefill_ms_per_1k)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StandInState(sim, args.seed)))
+    server.daemon_threads = True
+    print(f"Stand-in OpenAI API on http://{args.host}:{args.port}/v1  ({sim})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Synthetic candidate dataset — same joint distribution as the original `make_data`,
+# generated in deterministic chunks (one RNG stream per (seed, chunk)) with compact dtypes.
+#
+#   python -m talentlens.synthetic --rows 10000000 --out candidates.parquet
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+except Exception:
+    JOBLIB_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_SECTORS = ("IT", "HR", "Marketing", "Logistics", "Finance", "Sales", "Engineering", "Legal", "Healthcare")
+EDUCATION_LEVELS = ("HBO", "MBO", "WO")   # sorted → same dummy columns as the old object dtype
+GENDERS = ("F", "M", "X")
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def _categorical(values, categories):
+    return pd.Categorical(values, categories=list(categories))
+
+
+def generate_chunk(n: int, seed: int = 13, chunk: int = 0, sectors=DEFAULT_SECTORS) -> pd.DataFrame:
+    """Generate one chunk of `n` rows; identical output for the same (seed, chunk)."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+    sectors = sorted(sectors)
+    edu = rng.choice(["MBO", "HBO", "WO"], size=n, p=[0.35, 0.45, 0.20])
+    yrs = rng.integers(0, 16, size=n)
+    mot = np.clip(rng.normal(0.68, 0.15, size=n), 0, 1)
+    skill = np.clip(rng.normal(0.72, 0.12, size=n), 0.2, 1)
+    fit = np.clip(rng.normal(0.66, 0.18, size=n), 0, 1)
+    sent = np.clip(rng.normal(0.65, 0.2, size=n), 0, 1)
+    emo_pos = np.clip(sent + rng.normal(0, 0.1, size=n), 0, 1)
+    emo_neg = np.clip(1 - sent + rng.normal(0, 0.1, size=n), 0, 1)
+    gender = rng.choice(list(GENDERS), size=n, p=[0.48, 0.48, 0.04])
+    sector = rng.choice(sectors, size=n)
+    logit = (-1.1 + 0.06*yrs + 0.9*mot + 1.2*skill + 0.9*fit + 0.4*sent
+             + np.where(edu == "WO", 0.25, np.where(edu == "HBO", 0.15, 0)) + rng.normal(0, 0.55, size=n))
+    prob = 1/(1+np.exp(-logit))
+    hired = prob > 0.6
+    ret = (1/(1+np.exp(-0.5 + 0.04*yrs + 1.0*fit + 0.6*mot + rng.normal(0, 0.5, size=n)))) > 0.55
+    return pd.DataFrame({
+        "Sector": _categorical(sector, sectors),
+        "EducationLevel": _categorical(edu, EDUCATION_LEVELS),
+        "ExperienceYears": yrs.astype(np.int8),
+        "MotivationScore": mot.astype(np.float32),
+        "SkillMatch": skill.astype(np.float32),
+        "CultureFit": fit.astype(np.float32),
+        "SentimentScore": sent.astype(np.float32),
+        "EmotionPos": emo_pos.astype(np.float32),
+        "EmotionNeg": emo_neg.astype(np.float32),
+        "Gender": _categorical(gender, GENDERS),
+        "Hired": hired.astype(np.int8),
+        "Retained12m": ret.astype(np.int8),
+    })
+
+
+def _chunk_sizes(n: int, chunk_size: int):
+    chunk_size = max(1, int(chunk_size))
+    return [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+
+
+def iter_chunks(n: int, seed: int = 13, sectors=DEFAULT_SECTORS,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, n_jobs: int = -1):
+    """Yield the dataset chunk by chunk, in order, generating chunks in parallel when possible."""
+    sizes = _chunk_sizes(n, chunk_size)
+    if len(sizes) <= 1 or n_jobs == 1 or not JOBLIB_AVAILABLE:
+        for i, size in enumerate(sizes):
+            yield generate_chunk(size, seed, i, sectors)
+        return
+    parallel = Parallel(n_jobs=n_jobs, return_as="generator")
+    yield from parallel(delayed(generate_chunk)(size, seed, i, sectors) for i, size in enumerate(sizes))
+
+
+def generate_dataset(n: int = 1000, seed: int = 13, sectors=DEFAULT_SECTORS,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, n_jobs: int = -1) -> pd.DataFrame:
+    """Return the full dataset in memory (categoricals survive concatenation since categories are fixed)."""
+    chunks = list(iter_chunks(n, seed, sectors, chunk_size, n_jobs))
+    if not chunks:
+        return generate_chunk(0, seed, 0, sectors)
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_parquet(path, n: int, seed: int = 13, sectors=DEFAULT_SECTORS,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, n_jobs: int = -1) -> Path:
+    """Stream chunks straight to a Parquet file (one row group per chunk) without holding the dataset."""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Writing Parquet requires pyarrow (pip install pyarrow).")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    try:
+        for chunk in iter_chunks(n, seed, sectors, chunk_size, n_jobs):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate the TalentLens synthetic candidate dataset.")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--seed", type=int, default=13)
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    ap.add_argument("--jobs", type=int, default=-1)
+    ap.add_argument("--out", type=str, default="", help="Parquet output path (omit to only time generation)")
+    args = ap.parse_args(argv)
+    if args.out and not PYARROW_AVAILABLE:
+        ap.error("--out writes Parquet, which needs the optional pyarrow package (pip install pyarrow).")
+
+    t0 = time.perf_counter()
+    if args.out:
+        write_parquet(args.out, args.rows, args.seed, chunk_size=args.chunk_size, n_jobs=args.jobs)
+        print(f"Wrote {args.rows:,} rows to {args.out} in {time.perf_counter()-t0:.2f}s")
+    else:
+        df = generate_dataset(args.rows, args.seed, chunk_size=args.chunk_size, n_jobs=args.jobs)
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"Generated {len(df):,} rows ({mb:.1f} MB) in {time.perf_counter()-t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# Live vacancy connectors — fetch many (source, company) pairs concurrently over pooled keep-alive
+# sessions (one per host, with urllib3 retries), with per-host concurrency limits, connect/read
+# timeouts and an overall deadline, so one slow ATS never holds up the others. Every source is
+# normalised to the same columns: title, location, url, description, source, company.
+
+import html
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, NamedTuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 15.0
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.5               # urllib3: sleeps 0.5, 1, 2 ... s between retries
+MAX_RETRY_AFTER = 3.0              # a server's Retry-After is honoured up to this many seconds
+PER_HOST_LIMIT = 4                 # concurrent requests to one host (many companies share api.lever.co)
+MAX_WORKERS = 16
+DEADLINE = 20.0                    # seconds; pairs still running after this are reported as timed out
+COLUMNS = ["title", "location", "url", "description", "source", "company"]
+USER_AGENT = "TalentLens/1.0 (+vacancy connector)"
+
+
+def _text(value) -> str:
+    """HTML fragment / None → plain text."""
+    if not value:
+        return ""
+    return re.sub(r"\s+", " ", html.unescape(re.sub(r"<[^>]+>", " ", str(value)))).strip()
+
+
+def _recruitee(resp, company):
+    return [{"title": o.get("title"), "location": o.get("location") or o.get("city"),
+             "url": o.get("careers_url") or o.get("url"),
+             "description": _text(o.get("description")) + (" " + _text(o.get("requirements")) if o.get("requirements") else "")}
+            for o in resp.json().get("offers", [])]
+
+
+def _lever(resp, company):
+    return [{"title": p.get("text"), "location": (p.get("categories") or {}).get("location"),
+             "url": p.get("hostedUrl"), "description": p.get("descriptionPlain") or _text(p.get("description"))}
+            for p in resp.json()]
+
+
+def _greenhouse(resp, company):
+    return [{"title": j.get("title"), "location": (j.get("location") or {}).get("name"),
+             "url": j.get("absolute_url"), "description": _text(j.get("content"))}
+            for j in resp.json().get("jobs", [])]
+
+
+def _personio(resp, company):
+    root = ET.fromstring(resp.content)
+    return [{"title": job.findtext("name"), "location": job.findtext("office"), "url": job.findtext("url"),
+             "description": _text(job.findtext("description", ""))}
+            for job in root.findall(".//job")]
+
+
+def _adzuna(resp, company):
+    return [{"title": j.get("title"), "location": (j.get("location") or {}).get("display_name"),
+             "url": j.get("redirect_url"), "description": j.get("description", "")}
+            for j in resp.json().get("results", [])]
+
+
+def _adzuna_url(company, api_key):
+    if not api_key or ":" not in api_key:
+        raise ValueError("Adzuna requires app_id:app_key format.")
+    app_id, app_key = api_key.split(":", 1)
+    return f"https://api.adzuna.com/v1/api/jobs/nl/search/1?app_id={app_id}&app_key={app_key}&results_per_page=25"
+
+
+class VacancySource(NamedTuple):
+    name: str
+    url: Callable                  # (company, api_key) → URL
+    parse: Callable                # (response, company) → [{title, location, url, description}, ...]
+    per_company: bool = True       # False: one request regardless of the companies asked for
+
+
+SOURCES = {
+    "recruitee": VacancySource("Recruitee", lambda c, k: f"https://{c}.recruitee.com/api/offers/", _recruitee),
+    "lever": VacancySource("Lever", lambda c, k: f"https://api.lever.co/v0/postings/{c}?mode=json", _lever),
+    "greenhouse": VacancySource("Greenhouse", lambda c, k: f"https://boards-api.greenhouse.io/v1/boards/{c}/jobs?content=true",
+                                _greenhouse),
+    "personio": VacancySource("Personio", lambda c, k: f"https://{c}.jobs.personio.de/xml", _personio),
+    "adzuna": VacancySource("Adzuna", _adzuna_url, _adzuna, per_company=False),
+}
+RESTRICTED = {"linkedin": "LinkedIn", "indeed": "Indeed"}
+DEMO_ROWS = {
+    "monsterboard": [{"title": "Audit Consultant (demo)", "location": "Eindhoven",
+                      "url": "https://www.monsterboard.nl/vacatures/",
+                      "description": "Demo placeholder — replace with licensed API."}],
+}
+
+
+class FetchResult(NamedTuple):
+    source: str
+    company: str
+    status: str                    # ok / error / timeout / restricted / demo
+    rows: list
+    error: str
+    elapsed_ms: float
+
+
+# --- pooled sessions and per-host limits ---
+_SESSIONS = {}
+_HOST_SLOTS = {}
+_POOL_LOCK = threading.Lock()
+
+
+class CappedRetry(Retry):
+    """Retry whose Retry-After sleeps are capped: retries sleep inside a pool worker while holding one of
+    the host's slots, so a 429 asking for minutes would block later fetches long after the deadline."""
+
+    def get_retry_after(self, response):
+        after = super().get_retry_after(response)
+        return None if after is None else min(after, MAX_RETRY_AFTER)
+
+
+def _retry() -> Retry:
+    return CappedRetry(total=MAX_RETRIES, connect=MAX_RETRIES, read=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                 status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+                 respect_retry_after_header=True, raise_on_status=False)
+
+
+def session_for(host: str):
+    """Shared keep-alive session and concurrency semaphore for `host`."""
+    with _POOL_LOCK:
+        if host not in _SESSIONS:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PER_HOST_LIMIT, max_retries=_retry())
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _SESSIONS[host] = session
+            _HOST_SLOTS[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _SESSIONS[host], _HOST_SLOTS[host]
+
+
+def http_get(url: str, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """GET through the host's pooled session, holding one of its PER_HOST_LIMIT slots; raises on HTTP errors."""
+    session, slots = session_for(urlsplit(url).netloc.lower())
+    with slots:
+        resp = session.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp
+
+
+# --- fetching ---
+def _label(key: str) -> str:
+    return SOURCES[key].name if key in SOURCES else RESTRICTED.get(key, key.title())
+
+
+def fetch_one(source: str, company: str = "", api_key: str = None) -> FetchResult:
+    """One (source, company) pair; never raises — failures come back as a FetchResult with an error."""
+    key, company = (source or "").strip().lower(), (company or "").strip()
+    t0 = time.perf_counter()
+    if key in RESTRICTED:
+        return FetchResult(_label(key), company, "restricted", [],
+                           f"{RESTRICTED[key]} API is restricted — manual or partner integration needed.", 0.0)
+    if key in DEMO_ROWS:
+        return FetchResult(_label(key), company, "demo", list(DEMO_ROWS[key]), "", 0.0)
+    if key not in SOURCES:
+        return FetchResult(_label(key), company, "error", [], f"Unknown source '{source}'.", 0.0)
+    src = SOURCES[key]
+    try:
+        if src.per_company and not re.fullmatch(r"[\w.-]+", company):
+            raise ValueError("Company must be the board slug, e.g. 'openai' or 'crowe-foederer'.")
+        rows = src.parse(http_get(src.url(company, api_key)), company)
+        status, error = "ok", ""
+    except Exception as e:
+        rows, status, error = [], "error", f"{type(e).__name__}: {e}"
+        for secret in (api_key or "").split(":"):
+            if secret:
+                error = error.replace(secret, "***")        # request URLs in error messages carry the key
+    return FetchResult(src.name, company, status, rows, error, (time.perf_counter() - t0) * 1000)
+
+
+def expand_pairs(sources, companies) -> list:
+    """Every (source, company) pair to fetch; sources that are not per-company are fetched once."""
+    companies = [c.strip() for c in companies if c and c.strip()] or [""]
+    pairs = []
+    for source in sources:
+        src = SOURCES.get((source or "").strip().lower())
+        for company in (companies if src is not None and src.per_company else companies[:1]):
+            if (source, company) not in pairs:
+                pairs.append((source, company))
+    return pairs
+
+
+_POOL = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="vacancy-fetch")
+        return _POOL
+
+
+def fetch_vacancies(pairs, api_key: str = None, deadline: float = DEADLINE):
+    """Fetch (source, company) pairs concurrently → (normalised DataFrame, [FetchResult, ...] in pair order).
+
+    Pairs still running at `deadline` are reported as timed out and left to finish in the background;
+    the results that did arrive are returned without waiting for them."""
+    pairs = list(pairs)
+    futures = [_pool().submit(fetch_one, source, company, api_key) for source, company in pairs]
+    wait(futures, timeout=deadline)
+    results = []
+    for (source, company), fut in zip(pairs, futures):
+        if fut.done():
+            results.append(fut.result())
+        else:
+            results.append(FetchResult(_label((source or "").strip().lower()), (company or "").strip(), "timeout", [],
+                                       f"No response within {deadline:.0f}s.", deadline * 1000))
+    return merge_results(results), results
+
+
+def merge_results(results) -> pd.DataFrame:
+    """One DataFrame over all results: COLUMNS, rows without a title dropped, duplicate URLs removed."""
+    rows = [{**row, "source": r.source, "company": r.company} for r in results for row in r.rows]
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    if df.empty:
+        return df
+    df = df[df["title"].notna() & (df["title"].astype(str).str.strip() != "")]
+    df = df.fillna({"location": "", "url": "", "description": ""})
+    has_url = df["url"] != ""
+    return pd.concat([df[has_url].drop_duplicates("url"), df[~has_url]]).sort_index().reset_index(drop=True)
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# Keep every persisted artifact (indexes, caches, stores) out of the working copy.
+
+import os
+import tempfile
+
+os.environ.setdefault("TALENTLENS_DATA_DIR", tempfile.mkdtemp(prefix="talentlens-tests-"))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import json
+from types import SimpleNamespace as NS
+
+from talentlens import client as tc
+from talentlens.batch import BatchItem, BatchJob, merge_results
+from talentlens.features import prepare_cv
+from talentlens.narrative import build_messages
+
+
+class Transient(Exception):
+    status_code = 503
+
+
+def _items(n=3):
+    return [BatchItem(f"cv-{i}", f"cv{i}.pdf", f"h{i}", [{"role": "user", "content": f"cv {i}"}], {"score": i})
+            for i in range(n)]
+
+
+class FakeBatchClient:
+    def __init__(self, fail_uploads=1, status="completed", answered=("cv-0", "cv-1", "cv-2")):
+        self.fail_uploads, self.uploads, self.status, self.answered = fail_uploads, [], status, answered
+        self.files = NS(create=self._upload, content=self._content)
+        self.batches = NS(create=lambda **kw: NS(id="batch_1", status="validating"), retrieve=self._retrieve)
+
+    def _upload(self, file, purpose):
+        name, data = file
+        self.uploads.append(data)
+        if len(self.uploads) <= self.fail_uploads:
+            raise Transient()
+        return NS(id="file_in")
+
+    def _retrieve(self, batch_id):
+        return NS(status=self.status, output_file_id="file_out", error_file_id=None,
+                  request_counts=NS(total=3, completed=len(self.answered), failed=0))
+
+    def _content(self, file_id):
+        lines = [{"custom_id": cid, "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": f"narrative {cid}"}}], "usage": {"prompt_tokens": 5}}}}
+            for cid in self.answered]
+        return NS(text="\n".join(json.dumps(line) for line in lines))
+
+
+def test_retried_upload_sends_whole_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tc.time, "sleep", lambda s: None)
+    job = BatchJob.create(_items(), model="stand-in", root=tmp_path)
+    fake = FakeBatchClient(fail_uploads=1)
+    job.submit(fake)
+    expected = (job.dir / "requests.jsonl").read_bytes()
+    assert len(fake.uploads) == 2 and fake.uploads[1] == expected
+    assert len(expected.splitlines()) == 3
+
+
+def test_expired_batch_keeps_partial_output(tmp_path):
+    job = BatchJob.create(_items(), model="stand-in", root=tmp_path)
+    fake = FakeBatchClient(fail_uploads=0, status="expired", answered=("cv-0", "cv-2"))
+    job.submit(fake)
+    assert job.refresh(fake) == "expired"
+    rows = job.fetch(fake)
+    assert [r["filename"] for r in rows] == ["cv0.pdf", "cv2.pdf"]
+    assert rows[1]["narrative"] == "narrative cv-2"
+
+
+def test_narrative_job_items_from_prepared_cvs(tmp_path):
+    """The offline job path: prepare each CV, build its single-pass prompt, write the JSONL."""
+    vac_row = {"JobTitle": "Data Analyst", "RequiredSkills": ["Python", "SQL"]}
+    items = []
+    for i, (name, text) in enumerate([("anna.txt", "Python and SQL for 4 years."), ("bob.txt", "Recruiter.")]):
+        prep = prepare_cv(name, text.encode(), "Data Analyst", vac_row, "Data Analyst at Acme")
+        messages = build_messages(None, "en", "Data Analyst", 0.5, prep["features"], vac_row,
+                                  corpus_text=prep["corpus_text"], narrative_mode="Single pass")
+        items.append(BatchItem(f"{i:05d}", prep["filename"], f"h{i}", messages, {}))
+    job = BatchJob.create(items, model="stand-in", root=tmp_path)
+    lines = [json.loads(line) for line in (job.dir / "requests.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [line["custom_id"] for line in lines] == ["00000", "00001"]
+    shared = [line["body"]["messages"][1]["content"] for line in lines]
+    assert shared[0] == shared[1] and "Data Analyst at Acme" in shared[0]
+    assert "anna.txt" in lines[0]["body"]["messages"][2]["content"]
+    assert job.manifest["request_counts"]["total"] == 2
+
+
+def test_merge_results_replaces_by_filename_and_hash():
+    existing = [{"filename": "a", "content_hash": "1", "v": 0}, {"filename": "b", "content_hash": "2", "v": 0}]
+    merged = merge_results(existing, [{"filename": "b", "content_hash": "2", "v": 1},
+                                      {"filename": "c", "content_hash": "3", "v": 1}])
+    assert [(r["filename"], r["v"]) for r in merged] == [("a", 0), ("b", 1), ("c", 1)]
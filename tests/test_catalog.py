@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from talentlens.catalog import CatalogStore, VacancyMatcher
+
+SEED = {"IT": [{"JobTitle": "Data Analyst", "RequiredSkills": ["Python", "SQL"], "ValueWords": ["analysis"],
+                "ExpMin": 2, "ExpMax": 6}],
+        "HR": [{"JobTitle": "Recruiter", "RequiredSkills": ["Sourcing"], "ValueWords": ["speed"],
+                "ExpMin": 1, "ExpMax": 5}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CatalogStore(tmp_path / "catalog.db")
+    store.import_sectors(SEED)
+    return store
+
+
+def test_seed_import_is_idempotent(store):
+    assert store.import_sectors(SEED) == store.active_version() == 1
+    assert store.sectors() == ["IT", "HR"]
+    assert store.vacancies("IT")[0]["RequiredSkills"] == ["Python", "SQL"]
+
+
+def test_csv_from_text_and_path(store, tmp_path):
+    text = "JobTitle,RequiredSkills\n" + "".join(f"Engineer {i},\"Python, SQL\"\n" for i in range(300))
+    version = store.import_csv(text, sector="IT")
+    assert len(store.job_titles("IT", version)) == 300
+    path = tmp_path / "vacancies.csv"
+    path.write_text("JobTitle\nData Steward\n", encoding="utf-8")
+    assert store.job_titles("HR", store.import_csv(path, sector="HR")) == ["Data Steward"]
+    assert store.job_titles("HR", store.import_csv(str(path), sector="HR")) == ["Data Steward"]
+
+
+def test_csv_layers_on_active_version(store):
+    version = store.import_csv(b"jobtitle,RequiredSkills\nML Engineer,\"Python, PyTorch\"\n", sector="IT")
+    assert store.job_titles("IT", version) == ["ML Engineer"]
+    assert store.job_titles("HR", version) == ["Recruiter"]
+    assert store.job_titles("IT") == ["Data Analyst"]           # the active version is unchanged
+    assert store.import_csv(b"jobtitle,RequiredSkills\nML Engineer,\"Python, PyTorch\"\n", sector="IT") == version
+
+
+def test_cp1252_csv_keeps_accents(store):
+    raw = "JobTitle,RequiredSkills\nVerpleegkundige zorgcoördinator,\"Zorg, Coördinatie\"\n".encode("cp1252")
+    version = store.import_csv(raw, sector="Healthcare")
+    vac = store.vacancies("Healthcare", version)[0]
+    assert vac["JobTitle"] == "Verpleegkundige zorgcoördinator"
+    assert vac["RequiredSkills"] == ["Zorg", "Coördinatie"]
+
+
+def test_matcher_from_store(store):
+    match = VacancyMatcher.from_store(store).match("We need a recruiter for sourcing", 1)
+    assert (match[0].sector, match[0].job_title) == ("HR", "Recruiter")
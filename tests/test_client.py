@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from talentlens import client as tc
+from talentlens.client import CircuitBreaker, CircuitOpenError, call_with_retries
+
+
+class Transient(Exception):
+    status_code = 503
+
+
+class Rejected(Exception):
+    status_code = 401
+
+
+class FakeClient:
+    pass
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    fake = FakeClient()
+    brk = CircuitBreaker(failures=2, cooldown=10.0)
+    monkeypatch.setitem(tc._BREAKERS, id(fake), brk)
+    monkeypatch.setattr(tc.time, "sleep", lambda s: None)
+    now = [1000.0]
+    monkeypatch.setattr(tc.time, "monotonic", lambda: now[0])
+    return fake, brk, now
+
+
+def _raise(exc):
+    def fn():
+        raise exc
+    return fn
+
+
+def test_opens_after_consecutive_transient_failures(breaker):
+    fake, brk, _ = breaker
+    with pytest.raises(Transient):
+        call_with_retries(fake, _raise(Transient()), retries=1)
+    assert brk.state == "open"
+    assert not tc.llm_available(fake)
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(fake, lambda: "never")
+
+
+def test_half_open_trial_success_closes(breaker):
+    fake, brk, now = breaker
+    brk.record_failure(); brk.record_failure()
+    now[0] += 11
+    assert brk.state == "half-open"
+    assert call_with_retries(fake, lambda: "ok") == "ok"
+    assert brk.state == "closed"
+
+
+def test_half_open_trial_transient_failure_reopens(breaker):
+    fake, brk, now = breaker
+    brk.record_failure(); brk.record_failure()
+    now[0] += 11
+    with pytest.raises(Transient):
+        call_with_retries(fake, _raise(Transient()), retries=0)
+    assert brk.state == "open"
+
+
+def test_half_open_trial_only_one_probe(breaker):
+    _, brk, now = breaker
+    brk.record_failure(); brk.record_failure()
+    now[0] += 11
+    assert brk.allow()
+    assert not brk.allow()
+
+
+@pytest.mark.parametrize("exc", [Rejected(), ValueError("bad request")])
+def test_half_open_trial_non_transient_error_ends_probe(breaker, exc):
+    fake, brk, now = breaker
+    brk.record_failure(); brk.record_failure()
+    now[0] += 11
+    with pytest.raises(type(exc)):
+        call_with_retries(fake, _raise(exc))
+    assert brk.state == "half-open"                     # no verdict: the next request is the probe
+    assert call_with_retries(fake, lambda: "ok") == "ok"
+    assert brk.state == "closed"
+
+
+def test_non_transient_errors_do_not_reset_failure_count(breaker):
+    fake, brk, _ = breaker
+    for exc in (Transient(), Rejected(), ValueError("bad request"), Transient()):
+        with pytest.raises(type(exc)):
+            call_with_retries(fake, _raise(exc), retries=0)
+    assert brk.state == "open"
+
+
+def test_interrupted_trial_releases_probe(breaker):
+    fake, brk, now = breaker
+    brk.record_failure(); brk.record_failure()
+    now[0] += 11
+    with pytest.raises(KeyboardInterrupt):
+        call_with_retries(fake, _raise(KeyboardInterrupt()))
+    assert brk.allow()
+
+
+def test_non_transient_errors_are_not_retried(breaker):
+    fake, _, _ = breaker
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise Rejected()
+    with pytest.raises(Rejected):
+        call_with_retries(fake, fn, retries=3)
+    assert len(calls) == 1
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from talentlens import context
+from talentlens.context import pack_spans, prefixed_messages
+
+BUFFER = "".join(f"w{i:03d} " for i in range(200))     # 5 characters per word
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    """Deterministic token counts: one token per 5 characters (no tiktoken download)."""
+    monkeypatch.setattr(context, "count_tokens", lambda text, model=None: -(-len(text) // 5))
+
+
+def test_drops_weak_hits_and_respects_budget():
+    packed = pack_spans(BUFFER, [(0, 50, 0.9), (100, 150, 0.8), (200, 250, 0.01)], budget=15)
+    assert [s for _t, s in packed.snippets] == [0.9]
+    assert packed.tokens == 10 and packed.candidates == 3 and packed.dropped == 2
+
+
+def test_overlapping_hit_is_merged_and_charged_once():
+    packed = pack_spans(BUFFER, [(0, 50, 0.9), (40, 90, 0.8)], budget=100)
+    assert len(packed.snippets) == 1
+    assert packed.snippets[0] == (BUFFER[0:90].strip(), 0.9)
+    assert packed.tokens == 18
+
+
+def test_hit_bridging_two_spans_coalesces_them():
+    packed = pack_spans(BUFFER, [(0, 50, 0.9), (100, 150, 0.8), (40, 110, 0.7)], budget=100)
+    assert len(packed.snippets) == 1
+    assert packed.snippets[0] == (BUFFER[0:150].strip(), 0.9)
+    assert packed.tokens == 30
+
+
+def test_merge_that_exceeds_budget_is_dropped():
+    packed = pack_spans(BUFFER, [(0, 50, 0.9), (100, 150, 0.8), (40, 110, 0.7)], budget=25)
+    assert len(packed.snippets) == 2 and packed.tokens == 20 and packed.dropped == 1
+
+
+def test_snippets_keep_score_order():
+    packed = pack_spans(BUFFER, [(300, 350, 0.5), (0, 50, 0.9), (600, 650, 0.7)], budget=100)
+    assert [s for _t, s in packed.snippets] == [0.9, 0.7, 0.5]
+
+
+def test_prefixed_messages_share_a_byte_identical_prefix():
+    a = prefixed_messages("sys", {"role": "x", "lang": "en"}, {"cv": 1})
+    b = prefixed_messages("sys", {"lang": "en", "role": "x"}, {"cv": 2})
+    assert a[:2] == b[:2] and a[2] != b[2]
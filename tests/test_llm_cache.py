@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from talentlens.llm import ResponseCache, cache_key
+
+
+def test_key_covers_every_request_field():
+    messages = [{"role": "user", "content": "hi"}]
+    key = cache_key("m", messages, 0.4, 100)
+    assert key == cache_key("m", [{"role": "user", "content": "hi"}], 0.4, 100)
+    assert key != cache_key("m", messages, 0.5, 100)
+    assert key != cache_key("m", messages, 0.4, 101)
+    assert key != cache_key("other", messages, 0.4, 100)
+
+
+def test_put_get_and_stats(tmp_path):
+    cache = ResponseCache(tmp_path / "c.db")
+    assert cache.get("a") is None
+    cache.put("a", "m", "answer")
+    assert cache.get("a") == "answer"
+    assert cache.stats() == {"entries": 1, "bytes": 6, "hits": 1, "misses": 1}
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_expired_entries_miss_and_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path / "c.db", ttl=0.05)
+    cache.put("old", "m", "stale")
+    time.sleep(0.1)
+    assert cache.get("old") is None
+    cache.put("new", "m", "fresh")                  # each put drops expired rows
+    assert cache.stats()["entries"] == 1
+    assert cache.get("new") == "fresh"
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    cache = ResponseCache(tmp_path / "c.db", max_bytes=25)
+    cache.put("a", "m", "x" * 10)
+    time.sleep(0.01)
+    cache.put("b", "m", "y" * 10)
+    time.sleep(0.01)
+    assert cache.get("a") == "x" * 10               # a is now more recently used than b
+    time.sleep(0.01)
+    cache.put("c", "m", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 10
+    assert cache.stats()["bytes"] <= 25
+
+
+def test_cache_is_shared_across_connections(tmp_path):
+    ResponseCache(tmp_path / "c.db").put("k", "m", "shared")
+    assert ResponseCache(tmp_path / "c.db").get("k") == "shared"
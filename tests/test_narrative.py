@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from talentlens import narrative
+from talentlens.features import cv_corpus
+from talentlens.narrative import SummaryStore, build_messages
+
+VACANCY = {"JobTitle": "Data Analyst", "RequiredSkills": ["Python", "SQL"]}
+FEATURES = {"SkillMatch": 0.5, "ExperienceYears": 3}
+
+
+def _corpus(cover_letter=""):
+    return cv_corpus("anna.pdf", "Data analyst, 3 years of Python and SQL.", "Data Analyst at Acme", cover_letter)
+
+
+def test_single_pass_narrative_carries_vacancy_and_cv():
+    messages = build_messages(None, "en", "Data Analyst", 0.7, FEATURES, VACANCY, corpus_text=_corpus(),
+                              narrative_mode="Single pass")
+    shared, specific = json.loads(messages[1]["content"]), json.loads(messages[2]["content"])
+    assert shared["task"] == "narrative"
+    assert shared["VACANCY_CONTEXT"].startswith("### VACANCY MATCHED CONTEXT")
+    assert "Data Analyst at Acme" in shared["VACANCY_CONTEXT"]
+    assert specific["CONTEXT"].startswith("### FILE: anna.pdf") and "VACANCY" not in specific["CONTEXT"]
+    assert specific["probability"] == 0.7
+
+
+def test_shared_block_is_identical_across_candidates():
+    a = build_messages(None, "en", "Data Analyst", 0.7, FEATURES, VACANCY, corpus_text=_corpus(),
+                       narrative_mode="Single pass")
+    b = build_messages(None, "en", "Data Analyst", 0.2, FEATURES, VACANCY,
+                       corpus_text=cv_corpus("bob.pdf", "Recruiter.", "Data Analyst at Acme"),
+                       narrative_mode="Single pass")
+    assert a[:2] == b[:2] and a[2] != b[2]
+
+
+def test_map_reduce_narrative_uses_section_summaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(narrative, "summarise_section", lambda client, section, lang, model: f"sum {section[:14]}")
+    messages = build_messages(None, "en", "Data Analyst", 0.7, FEATURES, VACANCY,
+                              corpus_text=_corpus("I love data."), narrative_mode="Map-reduce",
+                              store=SummaryStore(tmp_path))
+    context = json.loads(messages[2]["content"])["CONTEXT"]
+    assert [c["summary"] for c in context] == ["sum ### FILE: anna", "sum ### COVER LETT"]
+    assert "one summary per source document" in json.loads(messages[1]["content"])["instructions"]
+
+
+def test_question_builds_grounded_qa():
+    messages = build_messages(None, "en", "Data Analyst", 0.7, FEATURES, VACANCY, question="Knows SQL?",
+                              retrieved=[("uses SQL daily", 0.9), ("Python", 0.5)])
+    specific = json.loads(messages[2]["content"])
+    assert json.loads(messages[1]["content"])["task"] == "qa"
+    assert specific == {"RETRIEVED_SNIPPETS": "uses SQL daily\n\n---\n\nPython", "question": "Knows SQL?"}
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from talentlens import explain
+from talentlens.registry import ModelRegistry, fit_model
+from talentlens.synthetic import generate_dataset
+
+pytest.importorskip("shap")
+
+
+@pytest.fixture
+def shap_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(explain, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(explain, "_SUMMARIES", {})
+    return tmp_path / "shap"
+
+
+def _register(registry, df):
+    mv = registry.register(*fit_model(df), source="test", data=df)
+    registry._summary_executor.submit(lambda: None).result()        # wait for the summary job
+    return mv
+
+
+def test_summary_is_reused_after_a_restart(shap_dir):
+    df = generate_dataset(n=400, seed=1)
+    first = _register(ModelRegistry(), df)
+    assert explain.summary_path(first).exists()
+    explain._SUMMARIES.clear()
+    registry = ModelRegistry()                                       # a fresh process: new uid, same model
+    again = _register(registry, df)
+    assert again.uid != first.uid and explain.summary_key(again) == explain.summary_key(first)
+    assert registry._queue_summary(again, df) is None                # nothing to recompute
+
+
+def test_summaries_of_dropped_versions_are_pruned(shap_dir):
+    registry = ModelRegistry(keep=2)
+    versions = [_register(registry, generate_dataset(n=400, seed=s)) for s in (1, 2, 3)]
+    stored = sorted(p.name for p in shap_dir.glob("*.npz"))
+    assert stored == sorted(f"{explain.summary_key(mv)}.npz" for mv in versions[1:])
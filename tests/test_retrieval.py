@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from talentlens.retrieval import CURRENT, IncrementalIndex, ThreadStore, load_index, save_index, top_k_indices
+
+CV_A = "### FILE: anna.pdf\nAnna built Airflow pipelines and SQL warehouses for logistics planning. " * 20
+CV_B = "### FILE: bram.pdf\nBram negotiates enterprise contracts and manages CRM forecasting. " * 20
+CV_C = "### FILE: cleo.pdf\nCleo designs mechanical parts in CAD and runs FEA simulations. " * 20
+
+
+def _index(*sections):
+    index = IncrementalIndex()
+    index.sync_corpus("".join(sections))
+    return index
+
+
+def _top(index, question, k=3):
+    return [(text[:40], round(score, 5)) for text, score in index.search(question, top_k=k)]
+
+
+def test_add_is_incremental_and_idempotent():
+    index = _index(CV_A, CV_B)
+    n = len(index)
+    assert index.sync_corpus(CV_A + CV_B) == {"added_chunks": 0, "removed_sections": 0}
+    assert index.add_section(CV_C) > 0 and len(index) > n
+    assert "Cleo" in index.search("CAD FEA simulations", top_k=1)[0][0]
+
+
+def test_remove_tombstones_and_updates_document_frequencies():
+    index = _index(CV_A, CV_B, CV_C)
+    stats = index.sync_corpus(CV_A + CV_C)
+    assert stats["removed_sections"] == 1
+    assert all("Bram" not in text for text, _ in index.search("CRM forecasting contracts", top_k=10))
+    fresh = _index(CV_A, CV_C)
+    assert np.array_equal(index.df, fresh.df) and len(index) == len(fresh)
+
+
+def test_compact_keeps_results():
+    index = _index(CV_A, CV_B, CV_C)
+    index.remove_section(next(iter(index.docs)))
+    before = _top(index, "SQL pipelines CAD")
+    index.compact()
+    assert index.alive.all() and len(index.alive) == len(index)
+    assert _top(index, "SQL pipelines CAD") == before
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index(CV_A, CV_B)
+    save_index(index, tmp_path / "idx")
+    loaded = load_index(tmp_path / "idx")
+    assert isinstance(loaded.spans, np.memmap)
+    assert loaded.buffer == index.buffer and len(loaded) == len(index)
+    assert _top(loaded, "enterprise CRM") == _top(index, "enterprise CRM")
+    loaded.sync_corpus(CV_A + CV_B + CV_C)              # appending to a loaded (memory-mapped) index
+    assert "Cleo" in loaded.search("CAD FEA", top_k=1)[0][0]
+
+
+def test_resave_while_loaded_switches_generation(tmp_path):
+    directory = tmp_path / "idx"
+    first = save_index(_index(CV_A), directory)
+    loaded = load_index(directory)
+    loaded.sync_corpus(CV_A + CV_B)
+    second = save_index(loaded, directory)
+    assert first != second and (directory / CURRENT).read_text() == second.name
+    assert not first.exists()
+    assert len(load_index(directory)) == len(loaded)
+
+
+def test_thread_store_drops_index(tmp_path):
+    store = ThreadStore(tmp_path)
+    store.save_index("t1", _index(CV_A))
+    assert store.load_index("t1") is not None
+    store.save_index("t1", None)
+    assert store.load_index("t1") is None
+
+
+def test_top_k_indices_order_and_threshold():
+    scores = np.array([0.1, 0.9, np.nan, 0.5, 0.7], dtype=np.float32)
+    assert top_k_indices(scores, 2).tolist() == [1, 4]
+    assert top_k_indices(scores, 10, min_score=0.5).tolist() == [1, 4, 3]
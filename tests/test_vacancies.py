@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from talentlens import vacancies
+from talentlens.vacancies import COLUMNS, FetchResult, expand_pairs, fetch_one, http_get, merge_results
+
+
+def test_expand_pairs_fetches_global_sources_once():
+    pairs = expand_pairs(["Lever", "Adzuna", "LinkedIn"], ["acme", " beta ", "", "acme"])
+    assert pairs == [("Lever", "acme"), ("Lever", "beta"), ("Adzuna", "acme"), ("LinkedIn", "acme")]
+    assert expand_pairs(["Recruitee"], []) == [("Recruitee", "")]
+
+
+def test_merge_results_normalises_and_dedupes():
+    results = [
+        FetchResult("Lever", "acme", "ok", [{"title": "Engineer", "location": None, "url": "https://x/1"},
+                                           {"title": "", "url": "https://x/2"}], "", 10.0),
+        FetchResult("Greenhouse", "acme", "ok", [{"title": "Engineer", "url": "https://x/1", "description": "d"},
+                                                {"title": "Analyst", "url": None}], "", 12.0),
+        FetchResult("Personio", "beta", "timeout", [], "No response", 20000.0),
+    ]
+    df = merge_results(results)
+    assert list(df.columns) == COLUMNS
+    assert df[["title", "source", "url"]].values.tolist() == [["Engineer", "Lever", "https://x/1"],
+                                                             ["Analyst", "Greenhouse", ""]]
+    assert df["location"].tolist() == ["", ""]
+    assert merge_results([]).columns.tolist() == COLUMNS
+
+
+def test_fetch_one_never_raises():
+    assert fetch_one("LinkedIn", "acme").status == "restricted"
+    assert fetch_one("Monsterboard").status == "demo"
+    bad = fetch_one("Lever", "evil.com/x#")
+    assert bad.status == "error" and "slug" in bad.error
+    adzuna = fetch_one("Adzuna", "", "nokey")
+    assert adzuna.status == "error" and "app_id:app_key" in adzuna.error
+
+
+@pytest.fixture
+def rate_limited_server():
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                self.send_response(429)
+                self.send_header("Retry-After", "600")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b"[]"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/postings", calls
+    server.shutdown()
+
+
+def test_retry_after_is_capped(rate_limited_server, monkeypatch):
+    monkeypatch.setattr(vacancies, "MAX_RETRY_AFTER", 0.2)
+    url, calls = rate_limited_server
+    t0 = time.monotonic()
+    assert http_get(url).json() == []
+    assert len(calls) == 2 and time.monotonic() - t0 < 5